@@ -56,15 +56,35 @@ hidden_modules = [
     'app.main',
     'app.api',
     'app.api.routes',
+    'app.compression',
+    'app.static_assets',
     'app.db',
     'app.db.database',
     'app.db.models',
+    'app.db.counters',
+    'app.db.change_log',
     'app.models',
     'app.models.schemas',
     'app.services',
     'app.services.database',
     'app.services.db_initializer',
     'app.services.references_importer',
+    'app.services.usage_service',
+    'app.services.dashboard_service',
+    'app.services.counter_service',
+    'app.services.startup_status',
+    'app.services.import_jobs',
+    'app.services.export_service',
+    'app.services.mirror_service',
+    'app.services.references_watcher',
+    # Загружаются лениво (импорт внутри функций)
+    'app.services.autotagging',
+    'app.services.keyword_analyzer',
+    'app.services.file_service',
+    'app.utils.importer',
+    'app.utils.json_stream',
+    'app.utils.auto_tagger',
+    'app.logging_setup',
     'app.config',
     'app.utils',
     'app.logging_config',
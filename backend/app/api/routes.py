@@ -1,20 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, File, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, Query, File, UploadFile, Request, Response
 from sqlalchemy.orm import Session
-from typing import List
-import json
+from typing import List, Optional
 from app.db import get_db
 from app.models import schemas
 from app.services.database import (
     PromptService, TagService, ProjectService, AutoTaggingService
 )
-from app.services.autotagging import AutoTaggingService as ATS
-from app.services.file_service import FileService
-from app.services.keyword_analyzer import analyzer as keyword_analyzer
-from app.utils.importer import PromptImporter
 
 router = APIRouter(prefix="/api", tags=["prompts"])
 
 
+def _not_modified(request: Request, response: Response, db: Session, resource: str) -> Optional[Response]:
+    """
+    Условный GET списка: 304, если If-None-Match совпадает с ETag ресурса
+    (выборка и сериализация не выполняются), иначе ETag ставится в ответ.
+    """
+    from app.services.counter_service import CounterService
+    from app.static_assets import etag_matches
+
+    etag = CounterService.get_resource_etag(db, resource)
+    if etag is None:
+        return None
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
 # ================ PROMPTS ENDPOINTS ================
 
 @router.post("/prompts", response_model=schemas.Prompt)
@@ -25,11 +39,16 @@ def create_prompt(prompt: schemas.PromptCreate, db: Session = Depends(get_db)):
 
 @router.get("/prompts", response_model=List[schemas.Prompt])
 def list_prompts(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, le=1000),
     db: Session = Depends(get_db)
 ):
-    """Получить список всех промптов"""
+    """Получить список всех промптов (ETag, 304 на If-None-Match)"""
+    cached = _not_modified(request, response, db, "prompts")
+    if cached is not None:
+        return cached
     return PromptService.get_all_prompts(db, skip, limit)
 
 
@@ -106,11 +125,20 @@ def create_tag(tag: schemas.TagCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/tags", response_model=List[schemas.Tag])
-def list_tags(db: Session = Depends(get_db)):
-    """Получить все теги"""
+def list_tags(request: Request, response: Response, db: Session = Depends(get_db)):
+    """Получить все теги (ETag, 304 на If-None-Match)"""
+    cached = _not_modified(request, response, db, "tags")
+    if cached is not None:
+        return cached
     return TagService.get_all_tags(db)
 
 
+@router.get("/tags/cloud", response_model=List[schemas.TagCloudEntry])
+def get_tag_cloud(limit: int = Query(50, ge=1, le=500), db: Session = Depends(get_db)):
+    """Облако тегов: самые используемые теги с количеством промптов"""
+    return TagService.get_tag_cloud(db, limit)
+
+
 @router.put("/tags/{tag_id}", response_model=schemas.Tag)
 def update_tag(tag_id: int, tag: schemas.TagCreate, db: Session = Depends(get_db)):
     """Обновить тег"""
@@ -156,6 +184,7 @@ def analyze_prompt_for_creation(data: dict):
         "category": "development" (optional)
     }
     """
+    from app.services.keyword_analyzer import analyzer as keyword_analyzer
     title = data.get("title", "")
     content = data.get("content", "")
     category = data.get("category")
@@ -193,55 +222,129 @@ def import_from_json(
     source_name: str = Query("import"),
     db: Session = Depends(get_db)
 ):
-    """Импортировать промпты из JSON файла"""
+    """
+    Импортировать промпты из JSON-массива, {"prompts": [...]} или NDJSON.
+    Файл разбирается потоково и пишется пачками, ответ - только итоги.
+    """
+    from app.utils.importer import PromptImporter
+    counts = {}
     try:
-        content = file.file.read().decode('utf-8')
-        data = json.loads(content)
-        
-        # Сохраняем временный файл
-        import tempfile
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as tmp:
-            json.dump(data, tmp)
-            tmp_path = tmp.name
-        
-        # Импортируем
-        prompts_data = PromptImporter.import_from_json(tmp_path, source_name)
-        imported = []
-        
-        for prompt_data in prompts_data:
-            prompt_data.imported_from = source_name
-            db_prompt = PromptService.create_prompt(db, prompt_data)
-            imported.append(db_prompt)
-        
-        return {
-            "message": f"Successfully imported {len(imported)} prompts",
-            "imported_count": len(imported),
-            "prompts": imported
-        }
-    except json.JSONDecodeError:
-        raise HTTPException(status_code=400, detail="Invalid JSON file")
+        PromptService.import_prompts_stream(
+            db, PromptImporter.iter_json_stream(file.file, source_name),
+            imported_from=source_name, counts=counts
+        )
+    except ValueError as e:
+        # Уже записанные пачки остаются; сообщаем, сколько успели
+        db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid JSON file: {e}. Imported before the error: {counts.get('imported', 0)}"
+        )
     except Exception as e:
+        db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
+    
+    return {
+        "message": f"Successfully imported {counts['imported']} prompts",
+        "imported_count": counts['imported'],
+        "skipped_count": counts['skipped']
+    }
 
 
 @router.post("/import/batch")
 def import_bulk_prompts(
     bulk_import: schemas.PromptBulkImport,
+    include_prompts: bool = Query(False, description="Вернуть созданные промпты целиком"),
     db: Session = Depends(get_db)
 ):
-    """Массовый импорт промптов"""
-    imported = []
-    
-    for prompt_data in bulk_import.prompts:
-        prompt_data.imported_from = bulk_import.import_source
-        db_prompt = PromptService.create_prompt(db, prompt_data)
-        imported.append(db_prompt)
+    """Массовый импорт промптов одной транзакцией (всё или ничего)"""
+    try:
+        prompt_ids = PromptService.bulk_create_prompts(
+            db, bulk_import.prompts, imported_from=bulk_import.import_source
+        )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Import failed, nothing was imported: {e}")
     
-    return {
-        "message": f"Successfully imported {len(imported)} prompts",
-        "imported_count": len(imported),
-        "prompts": imported
+    result = {
+        "message": f"Successfully imported {len(prompt_ids)} prompts",
+        "imported_count": len(prompt_ids),
+        "prompt_ids": prompt_ids
     }
+    if include_prompts:
+        from sqlalchemy.orm import selectinload
+        from app.db.models import Prompt
+        prompts = db.query(Prompt).options(selectinload(Prompt.tags)).filter(Prompt.id.in_(prompt_ids)).all()
+        result["prompts"] = [schemas.Prompt.model_validate(p) for p in sorted(prompts, key=lambda p: p.id)]
+    return result
+
+
+# ================ IMPORT JOBS ENDPOINTS ================
+
+@router.post("/import/jobs/json", status_code=202)
+def submit_json_import_job(
+    file: UploadFile = File(...),
+    source_name: str = Query("import"),
+    db: Session = Depends(get_db)
+):
+    """Импорт JSON/NDJSON фоновой задачей; прогресс - /import/jobs/{id}/events"""
+    from sqlalchemy.orm import sessionmaker
+    from app.services.import_jobs import ImportJobService
+    # Задача пишет в ту же БД, что и запрос, но своей сессией
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=db.get_bind())
+    job = ImportJobService.submit_json(file.file, source_name, session_factory)
+    return job.to_dict()
+
+
+@router.post("/import/jobs/references", status_code=202)
+def submit_references_import_job():
+    """Синхронизировать папку references фоновой задачей"""
+    from app.services.import_jobs import ImportJobService
+    return ImportJobService.submit_references().to_dict()
+
+
+@router.get("/import/jobs")
+def list_import_jobs():
+    """Задачи импорта (новые первыми)"""
+    from app.services.import_jobs import ImportJobService
+    return ImportJobService.list_jobs()
+
+
+@router.get("/import/jobs/{job_id}")
+def get_import_job(job_id: str):
+    """Состояние задачи импорта"""
+    from app.services.import_jobs import ImportJobService
+    job = ImportJobService.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job.to_dict()
+
+
+@router.get("/import/jobs/{job_id}/events")
+async def stream_import_job(job_id: str, request: Request):
+    """Прогресс задачи импорта (Server-Sent Events)"""
+    from fastapi.responses import StreamingResponse
+    from app.services.import_jobs import ImportJobService
+    if not ImportJobService.get(job_id):
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return StreamingResponse(
+        ImportJobService.stream_events(job_id, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/import/jobs/{job_id}/cancel")
+def cancel_import_job(job_id: str):
+    """Отменить задачу импорта (останавливается после текущей пачки)"""
+    from app.services.import_jobs import ImportJobService
+    job = ImportJobService.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    if job.finished:
+        raise HTTPException(status_code=409, detail=f"Import job already {job.status}")
+    return ImportJobService.cancel(job_id).to_dict()
 
 
 # ================ PROJECTS ENDPOINTS ================
@@ -249,22 +352,32 @@ def import_bulk_prompts(
 @router.post("/projects", response_model=schemas.Project)
 def create_project(project: schemas.ProjectCreate, db: Session = Depends(get_db)):
     """Создать новый проект"""
-    return ProjectService.create_project(db, project)
+    db_project = ProjectService.create_project(db, project)
+    return ProjectService.get_project_detail(db, db_project.id)
 
 
-@router.get("/projects", response_model=List[schemas.Project])
-def list_projects(db: Session = Depends(get_db)):
-    """Получить все проекты"""
-    return ProjectService.get_all_projects(db)
+@router.get("/projects", response_model=List[schemas.ProjectSummary])
+def list_projects(request: Request, response: Response, db: Session = Depends(get_db)):
+    """Получить все проекты (счётчики и последняя запись, без связей; ETag, 304 на If-None-Match)"""
+    cached = _not_modified(request, response, db, "projects")
+    if cached is not None:
+        return cached
+    return ProjectService.list_project_summaries(db)
 
 
 @router.get("/projects/{project_id}", response_model=schemas.Project)
-def get_project(project_id: int, db: Session = Depends(get_db)):
-    """Получить проект по ID"""
-    db_project = ProjectService.get_project(db, project_id)
-    if not db_project:
+def get_project(
+    project_id: int,
+    limit: int = Query(50, ge=1, le=200),
+    entries_cursor: Optional[int] = Query(None, description="process_entries_next_cursor предыдущей страницы"),
+    tasks_cursor: Optional[int] = Query(None, description="tasks_next_cursor предыдущей страницы"),
+    db: Session = Depends(get_db)
+):
+    """Получить проект по ID со страницей записей процесса и задач"""
+    project = ProjectService.get_project_detail(db, project_id, limit, entries_cursor, tasks_cursor)
+    if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-    return db_project
+    return project
 
 
 @router.put("/projects/{project_id}", response_model=schemas.Project)
@@ -277,14 +390,16 @@ def update_project(
     db_project = ProjectService.update_project(db, project_id, project_update)
     if not db_project:
         raise HTTPException(status_code=404, detail="Project not found")
-    return db_project
+    return ProjectService.get_project_detail(db, project_id)
 
 
 @router.delete("/projects/{project_id}")
 def delete_project(project_id: int, db: Session = Depends(get_db)):
     """Удалить проект"""
+    from app.services.file_service import file_service
     if not ProjectService.delete_project(db, project_id):
         raise HTTPException(status_code=404, detail="Project not found")
+    file_service.forget_project(project_id)
     return {"message": "Project deleted successfully"}
 
 
@@ -299,7 +414,7 @@ def add_process_entry(
     if not db_project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    process_entry = ProjectService.add_process_entry(db, project_id, entry)
+    process_entry = ProjectService.add_process_entry(db, project_id, entry, db_project.name)
     return process_entry
 
 
@@ -319,8 +434,8 @@ def add_task(
     return db_task
 
 
-@router.put("/tasks/{task_id}")
-def update_task(task_id: int, task_update: dict, db: Session = Depends(get_db)):
+@router.put("/tasks/{task_id}", response_model=schemas.TaskOut)
+def update_task(task_id: int, task_update: schemas.TaskUpdate, db: Session = Depends(get_db)):
     """Обновить задачу"""
     db_task = ProjectService.update_task(db, task_id, task_update)
     if not db_task:
@@ -328,49 +443,49 @@ def update_task(task_id: int, task_update: dict, db: Session = Depends(get_db)):
     return db_task
 
 
-# ================ STATISTICS ENDPOINTS ================
+@router.patch("/tasks")
+def update_tasks(data: schemas.TaskBulkUpdate, db: Session = Depends(get_db)):
+    """Переместить несколько задач (статус/приоритет) одной транзакцией"""
+    try:
+        task_ids = ProjectService.update_tasks(db, data.tasks)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail={"message": "Tasks not found", "task_ids": e.args[0]})
+    return {"updated": len(task_ids), "task_ids": task_ids}
 
-@router.get("/stats")
-def get_statistics(db: Session = Depends(get_db)):
-    """Получить статистику приложения"""
-    from sqlalchemy import func
-    from app.db.models import Prompt, Tag, Project
-    
-    from sqlalchemy import func
-    
-    total_prompts = db.query(func.count(Prompt.id)).scalar()
-    total_tags = db.query(func.count(Tag.id)).scalar()
-    total_projects = db.query(func.count(Project.id)).scalar()
-    total_categories = db.query(func.count(Prompt.category.distinct())).scalar()
-    
-    # Самые используемые промпты
-    top_prompts = db.query(Prompt).order_by(Prompt.usage_count.desc()).limit(5).all()
+
+@router.get("/projects/{project_id}/board")
+def get_project_board(project_id: int, db: Session = Depends(get_db)):
+    """Доска проекта: задачи по колонкам статусов"""
+    if not ProjectService.get_project(db, project_id):
+        raise HTTPException(status_code=404, detail="Project not found")
     
+    columns = ProjectService.get_board(db, project_id)
     return {
-        "total_prompts": total_prompts or 0,
-        "total_tags": total_tags or 0,
-        "total_projects": total_projects or 0,
-        "total_categories": total_categories or 0,
-        "top_prompts": top_prompts
+        "project_id": project_id,
+        "columns": {
+            status: [schemas.TaskOut.model_validate(task).model_dump() for task in tasks]
+            for status, tasks in columns.items()
+        },
+        "counts": {status: len(tasks) for status, tasks in columns.items()}
     }
 
 
+# ================ STATISTICS ENDPOINTS ================
+
 @router.get("/stats")
-def get_stats(db: Session = Depends(get_db)):
-    """Получить статистику"""
-    from sqlalchemy import func
-    from app.db.models import Prompt, Tag, Project
+def get_statistics(db: Session = Depends(get_db)):
+    """Получить статистику приложения"""
+    from app.services.dashboard_service import DashboardService
     
-    total_prompts = db.query(func.count(Prompt.id)).scalar() or 0
-    total_tags = db.query(func.count(Tag.id)).scalar() or 0
-    total_projects = db.query(func.count(Project.id)).scalar() or 0
-    total_categories = db.query(func.count(Prompt.category.distinct())).scalar() or 0
+    snapshot = DashboardService.get_snapshot(db)
+    totals = snapshot['totals']
     
     return {
-        "total_prompts": total_prompts,
-        "total_tags": total_tags,
-        "total_projects": total_projects,
-        "total_categories": total_categories
+        "total_prompts": totals['prompts'],
+        "total_tags": totals['tags'],
+        "total_projects": totals['projects'],
+        "total_categories": totals['categories'],
+        "top_prompts": snapshot['popular_prompts'][:5]
     }
 
 
@@ -379,6 +494,7 @@ def get_stats(db: Session = Depends(get_db)):
 @router.post("/prompts/{prompt_id}/auto-tag")
 def auto_tag_prompt(prompt_id: int, db: Session = Depends(get_db)):
     """Auto-tag a prompt based on its content"""
+    from app.services.autotagging import AutoTaggingService as ATS
     prompt = PromptService.get_prompt(db, prompt_id)
     if not prompt:
         raise HTTPException(status_code=404, detail="Prompt not found")
@@ -399,6 +515,7 @@ def auto_tag_prompt(prompt_id: int, db: Session = Depends(get_db)):
 @router.post("/prompts/extract-keywords")
 def extract_keywords(data: dict):
     """Extract keywords from text for highlighting"""
+    from app.services.autotagging import AutoTaggingService as ATS
     content = data.get("content", "")
     keywords = ATS.extract_keywords(content, limit=15)
     highlighted = ATS.highlight_keywords(content, keywords)
@@ -409,11 +526,35 @@ def extract_keywords(data: dict):
     }
 
 
+# ================ EXPORT ENDPOINTS ================
+
+@router.get("/export")
+def export_prompts(
+    fmt: str = Query("ndjson", alias="format", pattern="^(ndjson|zip)$"),
+    files: str = Query("txt", pattern="^(txt|json)$", description="Формат файлов внутри ZIP"),
+    q: str = Query(None),
+    category: str = Query(None),
+    tags: List[str] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """Потоковый экспорт библиотеки (или отфильтрованной части) в NDJSON или ZIP"""
+    from fastapi.responses import StreamingResponse
+    from sqlalchemy.orm import sessionmaker
+    from app.services.export_service import ExportService, MEDIA_TYPES
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=db.get_bind())
+    return StreamingResponse(
+        ExportService.stream(session_factory, fmt, files, q, category, tags),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{ExportService.filename(fmt)}"'}
+    )
+
+
 # ================ FILE SERVICE ENDPOINTS ================
 
 @router.post("/prompts/{prompt_id}/export-txt")
 def export_prompt_txt(prompt_id: int, db: Session = Depends(get_db)):
     """Export prompt as TXT file"""
+    from app.services.file_service import file_service
     prompt = PromptService.get_prompt(db, prompt_id)
     if not prompt:
         raise HTTPException(status_code=404, detail="Prompt not found")
@@ -422,7 +563,7 @@ def export_prompt_txt(prompt_id: int, db: Session = Depends(get_db)):
     tag_names = [tag.name for tag in prompt.tags]
     
     # Save file
-    file_path = FileService.save_prompt_as_txt(
+    file_path = file_service.save_prompt_as_txt(
         prompt_id, prompt.title, prompt.content, 
         prompt.category, tag_names
     )
@@ -433,14 +574,34 @@ def export_prompt_txt(prompt_id: int, db: Session = Depends(get_db)):
     }
 
 
+@router.get("/mirror/status")
+def mirror_status(db: Session = Depends(get_db)):
+    """Состояние файлового зеркала библиотеки"""
+    from app.config import settings
+    from app.services.mirror_service import MirrorService
+    return {
+        "enabled": settings.PROMPTS_MIRROR,
+        "pending_changes": MirrorService.pending(db),
+        "last_sync": MirrorService.last_result
+    }
+
+
+@router.post("/mirror/sync")
+def mirror_sync(db: Session = Depends(get_db)):
+    """Перенести накопившиеся изменения в зеркало сейчас"""
+    from app.services.mirror_service import MirrorService
+    return MirrorService.sync(db)
+
+
 @router.post("/projects/{project_id}/create-structure")
 def create_project_structure(project_id: int, db: Session = Depends(get_db)):
     """Create directory structure for a project"""
+    from app.services.file_service import file_service
     project = ProjectService.get_project(db, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    structure = FileService.create_project_structure(project_id, project.name)
+    structure = file_service.create_project_structure(project_id, project.name)
     
     return {
         "message": "Project structure created",
@@ -451,12 +612,13 @@ def create_project_structure(project_id: int, db: Session = Depends(get_db)):
 @router.put("/projects/{project_id}/tasks")
 def update_project_tasks(project_id: int, data: dict, db: Session = Depends(get_db)):
     """Update project tasks file"""
+    from app.services.file_service import file_service
     project = ProjectService.get_project(db, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
     content = data.get("content", "")
-    file_path = FileService.update_project_file(project_id, project.name, "tasks", content)
+    file_path = file_service.update_project_file(project_id, project.name, "tasks", content)
     
     return {
         "message": "Tasks updated successfully",
@@ -467,12 +629,13 @@ def update_project_tasks(project_id: int, data: dict, db: Session = Depends(get_
 @router.put("/projects/{project_id}/process")
 def update_project_process(project_id: int, data: dict, db: Session = Depends(get_db)):
     """Update project process file"""
+    from app.services.file_service import file_service
     project = ProjectService.get_project(db, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
     content = data.get("content", "")
-    file_path = FileService.update_project_file(project_id, project.name, "process", content)
+    file_path = file_service.update_project_file(project_id, project.name, "process", content)
     
     return {
         "message": "Process updated successfully",
@@ -483,11 +646,12 @@ def update_project_process(project_id: int, data: dict, db: Session = Depends(ge
 @router.get("/projects/{project_id}/tasks")
 def get_project_tasks(project_id: int, db: Session = Depends(get_db)):
     """Get project tasks file content"""
+    from app.services.file_service import file_service
     project = ProjectService.get_project(db, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    content = FileService.read_project_file(project_id, project.name, "tasks")
+    content = file_service.read_project_file(project_id, project.name, "tasks")
     
     return {
         "project_id": project_id,
@@ -496,17 +660,30 @@ def get_project_tasks(project_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/projects/{project_id}/process")
-def get_project_process(project_id: int, db: Session = Depends(get_db)):
-    """Get project process file content"""
+def get_project_process(
+    project_id: int,
+    tail_entries: Optional[int] = Query(None, ge=0, description="Только последние N записей"),
+    tail_bytes: Optional[int] = Query(None, ge=0, description="Только последние N байт"),
+    offset: Optional[int] = Query(None, ge=0, description="Всё, начиная с этого байта"),
+    db: Session = Depends(get_db)
+):
+    """Get project process file content (whole file or a tail/range)"""
+    from app.services.file_service import file_service
     project = ProjectService.get_project(db, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    content = FileService.read_project_file(project_id, project.name, "process")
+    if tail_entries is None and tail_bytes is None and offset is None:
+        content = file_service.read_project_file(project_id, project.name, "process")
+        return {
+            "project_id": project_id,
+            "content": content or ""
+        }
     
+    part = file_service.read_process_log(project_id, project.name, tail_entries, tail_bytes, offset)
     return {
         "project_id": project_id,
-        "content": content or ""
+        **(part or {"content": "", "offset": 0, "size": 0})
     }
 
 
@@ -544,60 +721,22 @@ def get_all_categories(db: Session = Depends(get_db)):
 @router.get("/analytics/dashboard")
 def get_analytics_dashboard(db: Session = Depends(get_db)):
     """Get comprehensive dashboard analytics"""
-    from sqlalchemy import func, distinct
-    from datetime import datetime, timedelta
-    from app.db.models import Prompt, Project, Tag
+    from app.services.dashboard_service import DashboardService
     
     try:
-        # Total counts
-        total_prompts = db.query(func.count(Prompt.id)).scalar() or 0
-        total_projects = db.query(func.count(Project.id)).scalar() or 0
-        total_tags = db.query(func.count(Tag.id)).scalar() or 0
-        
-        # Growth metrics
-        now = datetime.utcnow()
-        week_ago = now - timedelta(days=7)
-        month_ago = now - timedelta(days=30)
-        
-        prompts_7d = db.query(func.count(Prompt.id)).filter(
-            Prompt.created_at >= week_ago
-        ).scalar() or 0
-        
-        prompts_30d = db.query(func.count(Prompt.id)).filter(
-            Prompt.created_at >= month_ago
-        ).scalar() or 0
-        
-        # Popular prompts
-        popular = db.query(Prompt).order_by(
-            Prompt.usage_count.desc()
-        ).limit(10).all()
-        
-        # Category distribution
-        category_stats = db.query(
-            Prompt.category,
-            func.count(Prompt.id).label('count')
-        ).group_by(Prompt.category).all()
-        
-        category_dist = [
-            {'category': cat or 'Uncategorized', 'count': count}
-            for cat, count in category_stats
-        ]
+        snapshot = DashboardService.get_snapshot(db)
+        totals = snapshot['totals']
         
         return {
             'totals': {
-                'prompts': total_prompts,
-                'projects': total_projects,
-                'tags': total_tags
+                'prompts': totals['prompts'],
+                'projects': totals['projects'],
+                'tags': totals['tags']
             },
-            'growth': {
-                'prompts_7d': prompts_7d,
-                'prompts_30d': prompts_30d
-            },
-            'popular_prompts': [
-                {'id': p.id, 'title': p.title, 'usage_count': p.usage_count}
-                for p in popular
-            ],
-            'category_distribution': category_dist
+            'growth': snapshot['growth'],
+            'popular_prompts': snapshot['popular_prompts'],
+            'category_distribution': snapshot['category_distribution'],
+            'computed_at': snapshot['computed_at']
         }
     except Exception as e:
         return {
@@ -610,18 +749,22 @@ def get_analytics_dashboard(db: Session = Depends(get_db)):
 def get_analytics_insights(db: Session = Depends(get_db)):
     """Get AI-powered insights and recommendations"""
     from datetime import datetime, timedelta
-    from sqlalchemy import func
+    from sqlalchemy import func, or_, and_
     from app.db.models import Prompt
+    from app.services.counter_service import CounterService
+    from app.services.usage_service import UsageService
     
     try:
         insights = []
         recommendations = []
+        now = datetime.utcnow()
         
-        # Unused prompts
-        unused_threshold = datetime.utcnow() - timedelta(days=90)
-        unused_count = db.query(func.count(Prompt.id)).filter(
-            Prompt.last_used_at < unused_threshold
-        ).scalar() or 0
+        # Unused prompts: last used long ago, or never used since creation
+        unused_threshold = now - timedelta(days=90)
+        unused_count = db.query(func.count(Prompt.id)).filter(or_(
+            Prompt.last_used_at < unused_threshold,
+            and_(Prompt.last_used_at == None, Prompt.created_at < unused_threshold)
+        )).scalar() or 0
         
         if unused_count > 0:
             insights.append({
@@ -631,10 +774,22 @@ def get_analytics_insights(db: Session = Depends(get_db)):
                 'severity': 'info'
             })
         
+        # Usage trend: last 7 days vs the 7 days before (daily rollups only)
+        week_ago = now - timedelta(days=7)
+        usage_7d = UsageService.get_period_total(db, week_ago + timedelta(days=1))
+        usage_prev_7d = UsageService.get_period_total(
+            db, week_ago - timedelta(days=6), week_ago + timedelta(days=1)
+        )
+        if usage_7d or usage_prev_7d:
+            insights.append({
+                'type': 'usage_trend',
+                'title': 'Weekly Usage',
+                'description': f'{usage_7d} uses in the last 7 days ({usage_prev_7d} the week before)',
+                'severity': 'info' if usage_7d >= usage_prev_7d else 'warning'
+            })
+        
         # Uncategorized prompts
-        uncategorized = db.query(func.count(Prompt.id)).filter(
-            Prompt.category == None
-        ).scalar() or 0
+        uncategorized = CounterService.get_category_counts(db).get(None, 0)
         
         if uncategorized > 0:
             recommendations.append({
@@ -651,18 +806,31 @@ def get_analytics_insights(db: Session = Depends(get_db)):
         return {'error': str(e), 'insights': [], 'recommendations': []}
 
 
+@router.get("/analytics/usage")
+def get_analytics_usage(
+    granularity: str = Query("day", pattern="^(hour|day)$"),
+    periods: int = Query(30, ge=1, le=744),
+    prompt_id: int = Query(None),
+    db: Session = Depends(get_db)
+):
+    """Usage time series read from the hourly/daily rollups"""
+    from app.services.usage_service import UsageService
+    
+    return UsageService.get_timeseries(db, granularity, periods, prompt_id)
+
+
 @router.get("/analytics/summary")
 def get_analytics_summary(db: Session = Depends(get_db)):
     """Quick summary for dashboard"""
-    from sqlalchemy import func
-    from app.db.models import Prompt, Project, Tag
+    from app.services.dashboard_service import DashboardService
     
     try:
+        totals = DashboardService.get_snapshot(db)['totals']
         return {
-            'total_prompts': db.query(func.count(Prompt.id)).scalar() or 0,
-            'total_projects': db.query(func.count(Project.id)).scalar() or 0,
-            'total_tags': db.query(func.count(Tag.id)).scalar() or 0,
-            'total_usage': db.query(func.sum(Prompt.usage_count)).scalar() or 0
+            'total_prompts': totals['prompts'],
+            'total_projects': totals['projects'],
+            'total_tags': totals['tags'],
+            'total_usage': totals['usage']
         }
     except:
         return {'total_prompts': 0, 'total_projects': 0, 'total_tags': 0, 'total_usage': 0}
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+Сжатие HTTP-ответов.
+
+CompressionMiddleware сжимает ответы API (gzip или brotli - что лучше из
+принимаемого клиентом) крупнее порога. Потоковые ответы без Content-Length
+(SSE, экспорт) не трогаются: их нельзя буферизовать.
+
+Статика фронтенда сжимается заранее (app.utils.precompress при сборке), её
+готовые копии .br/.gz отдаёт app.static_assets.
+"""
+
+import gzip
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli - необязательная зависимость
+    brotli = None
+
+# Ответы меньше этого не сжимаются (заголовки и CPU дороже выигрыша)
+MINIMUM_SIZE = 1024
+# Крупнее этого сжимаем в потоке, чтобы не задерживать event loop
+THREAD_THRESHOLD = 256 * 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+
+COMPRESSIBLE_TYPES = (
+    "text/", "application/json", "application/javascript", "application/xml",
+    "application/x-ndjson", "image/svg+xml",
+)
+
+# Расширения заранее сжатых файлов в порядке предпочтения
+PRECOMPRESSED: Tuple[Tuple[str, str], ...] = (("br", ".br"), ("gzip", ".gz"))
+
+
+def encoding_weights(accept_encoding: str) -> Dict[str, float]:
+    """Кодировки из Accept-Encoding и их q (имена в нижнем регистре)"""
+    weights = {}
+    for part in accept_encoding.lower().split(","):
+        name, *params = [item.strip() for item in part.split(";")]
+        if not name:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        weights[name] = quality
+    return weights
+
+
+def negotiate_encoding(accept_encoding: str, available: Sequence[str]) -> Optional[str]:
+    """
+    Кодировка из available с наибольшим q (q=0 - запрещена); при равном q
+    побеждает более ранняя в available. "*" задаёт q для неназванных.
+    """
+    weights = encoding_weights(accept_encoding)
+    default = weights.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in available:
+        quality = weights.get(encoding, default)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Лучшая доступная кодировка для сжатия на лету"""
+    return negotiate_encoding(accept_encoding, ("br", "gzip") if brotli is not None else ("gzip",))
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class CompressionMiddleware:
+    """ASGI middleware: сжатие ответов с известным размером"""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = MINIMUM_SIZE,
+                 path_prefixes: Tuple[str, ...] = ("/api",)):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.path_prefixes = path_prefixes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        # HEAD без тела: Content-Length должен совпадать с несжатым GET
+        if (scope["type"] != "http" or scope["method"] == "HEAD"
+                or not scope["path"].startswith(self.path_prefixes)):
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        chunks: List[bytes] = []
+        compressing = False
+
+        async def wrapped_send(message: Message):
+            nonlocal start, compressing
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                length = headers.get("content-length")
+                compressing = (
+                    length is not None and int(length) >= self.minimum_size
+                    and "content-encoding" not in headers
+                    and headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+                )
+                if compressing:
+                    start = message
+                else:
+                    await send(message)
+                return
+
+            if message["type"] != "http.response.body" or not compressing:
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(chunks)
+            if len(body) > THREAD_THRESHOLD:
+                body = await anyio.to_thread.run_sync(compress, body, encoding)
+            else:
+                body = compress(body, encoding)
+
+            headers = MutableHeaders(raw=start["headers"])
+            headers["content-encoding"] = encoding
+            headers["content-length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, wrapped_send)
@@ -23,11 +23,26 @@ class Settings(BaseSettings):
         f"sqlite:///{Path(__file__).parent.parent.parent / 'data' / 'pandora.db'}"
     )
     
+    # Фоновая инициализация БД при старте (миграции + импорт references)
+    INIT_DB_ON_STARTUP: bool = os.getenv("INIT_DB_ON_STARTUP", "True").lower() == "true"
+    
+    # Фоновое зеркало библиотеки в data/mirror/<category>/ (см. MirrorService).
+    # Выключено по умолчанию: первый запуск выписывает на диск всю библиотеку
+    PROMPTS_MIRROR: bool = os.getenv("PROMPTS_MIRROR", "False").lower() == "true"
+    
+    # Наблюдение за папкой references: изменения импортируются без рескана (см. ReferencesWatcher)
+    WATCH_REFERENCES: bool = os.getenv("WATCH_REFERENCES", "True").lower() == "true"
+    
+    # Отдавать собранный фронтенд (frontend/dist, desktop/frontend_bundler.py) вместо
+    # исходных модулей; в собранном приложении используется всегда, если сборка есть
+    FRONTEND_BUNDLE: bool = os.getenv("FRONTEND_BUNDLE", "False").lower() == "true"
+    
     # Paths
     DATA_DIR: Path = Path(__file__).parent.parent.parent / "data"
     PROMPTS_DIR: Path = DATA_DIR / "prompts"
     IMPORTS_DIR: Path = DATA_DIR / "imports"
     PROJECTS_DIR: Path = DATA_DIR / "projects"
+    MIRROR_DIR: Path = DATA_DIR / "mirror"
     
     # AI Model for auto-tagging
     TAGGING_MODEL: str = os.getenv("TAGGING_MODEL", "cpu")  # or "gpu"
@@ -38,12 +53,11 @@ class Settings(BaseSettings):
         env_file = ".env"
         case_sensitive = True
         extra = "ignore"  # Игнорируем дополнительные переменные из .env
+    
+    def ensure_directories(self):
+        """Создать рабочие директории (вызывается при старте, не при импорте)"""
+        for directory in (self.DATA_DIR, self.PROMPTS_DIR, self.IMPORTS_DIR, self.PROJECTS_DIR):
+            directory.mkdir(parents=True, exist_ok=True)
 
 
 settings = Settings()
-
-# Create required directories
-settings.DATA_DIR.mkdir(exist_ok=True)
-settings.PROMPTS_DIR.mkdir(exist_ok=True)
-settings.IMPORTS_DIR.mkdir(exist_ok=True)
-settings.PROJECTS_DIR.mkdir(exist_ok=True)
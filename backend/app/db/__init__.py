@@ -1,18 +1,36 @@
 import os
-from sqlalchemy import create_engine
+import sqlite3
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool
 from app.config import settings
 from app.db.models import Base
 
+@event.listens_for(Engine, "connect")
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    """SQLite выполняет ON DELETE CASCADE только с PRAGMA foreign_keys (на каждое соединение)"""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
 # Создаем БД
-if settings.DATABASE_URL.startswith("sqlite"):
-    # Для SQLite используем специальные параметры
+if settings.DATABASE_URL.startswith("sqlite") and ":memory:" in settings.DATABASE_URL:
+    # БД в памяти живёт, пока открыто соединение - одно на всех
     engine = create_engine(
         settings.DATABASE_URL,
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,
     )
+elif settings.DATABASE_URL.startswith("sqlite"):
+    # Файловая БД: своё соединение на поток (запросы, фоновые импорт и зеркало),
+    # запись ждёт блокировку до timeout секунд
+    engine = create_engine(
+        settings.DATABASE_URL,
+        connect_args={"check_same_thread": False, "timeout": 30},
+    )
 else:
     engine = create_engine(
         settings.DATABASE_URL,
@@ -21,8 +39,7 @@ else:
         max_overflow=20
     )
 
-# Создаем таблицы
-Base.metadata.create_all(bind=engine)
+# Таблицы создаются и мигрируются в DatabaseInitializer.init_db (app.db.migrations)
 
 # SessionLocal для использования в endpoints
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
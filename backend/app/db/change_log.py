@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+Журнал изменений промптов в таблице prompt_changes.
+
+Триггеры SQLite добавляют строку на каждую вставку, удаление и изменение
+полей, попадающих в файл зеркала (title, content, category, теги). Журнал
+читает и очищает MirrorService, поэтому синхронизация зеркала стоит
+O(изменений), а не O(библиотеки). Изменения usage_count в журнал не попадают.
+"""
+
+from sqlalchemy import text
+
+
+def _log(prompt_id: str) -> str:
+    return (
+        "INSERT INTO prompt_changes (prompt_id, changed_at) "
+        f"VALUES ({prompt_id}, CURRENT_TIMESTAMP);"
+    )
+
+
+CHANGE_LOG_TRIGGERS = {
+    "trg_changes_prompts_insert": f"""
+        AFTER INSERT ON prompts BEGIN
+            {_log("NEW.id")}
+        END""",
+    "trg_changes_prompts_update": f"""
+        AFTER UPDATE OF title, content, category ON prompts
+        WHEN OLD.title IS NOT NEW.title
+          OR OLD.content IS NOT NEW.content
+          OR OLD.category IS NOT NEW.category BEGIN
+            {_log("NEW.id")}
+        END""",
+    "trg_changes_prompts_delete": f"""
+        AFTER DELETE ON prompts BEGIN
+            {_log("OLD.id")}
+        END""",
+    "trg_changes_prompt_tags_insert": f"""
+        AFTER INSERT ON prompt_tags BEGIN
+            {_log("NEW.prompt_id")}
+        END""",
+    "trg_changes_prompt_tags_delete": f"""
+        AFTER DELETE ON prompt_tags BEGIN
+            {_log("OLD.prompt_id")}
+        END""",
+}
+
+SEED_STATEMENT = """
+    INSERT INTO prompt_changes (prompt_id, changed_at)
+    SELECT id, CURRENT_TIMESTAMP FROM prompts"""
+
+
+def install_change_log_triggers(connection) -> None:
+    """Создать триггеры журнала (идемпотентно)"""
+    for name, body in CHANGE_LOG_TRIGGERS.items():
+        connection.execute(text(f"CREATE TRIGGER IF NOT EXISTS {name} {body}"))
+
+
+def seed_change_log(connection) -> None:
+    """Поставить в журнал все существующие промпты (первичное построение зеркала)"""
+    connection.execute(text(SEED_STATEMENT))
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+Материализованные счётчики в таблице counters.
+
+Триггеры SQLite держат счётчики точными при любой записи (ORM, bulk-операции,
+сырые запросы), поэтому итоги читаются за O(1) вместо COUNT(*) по таблицам.
+Триггеры ставятся и счётчики заполняются миграцией (app.db.migrations).
+
+Ключи:
+    prompts, tags, projects    - количество строк
+    usage                      - сумма prompts.usage_count
+    category:<name>            - промптов в категории ('category:' - без категории)
+    version:<table>            - номер изменения таблицы (растёт на каждой вставке,
+                                 изменении и удалении строки; ETag ответов API)
+
+Количество промптов на тег хранится прямо в tags.usage_count (индексирован для
+облака тегов) и поддерживается триггерами на prompt_tags.
+"""
+
+from sqlalchemy import text
+
+
+def _upsert(name_expr: str, delta: str) -> str:
+    return (
+        f"INSERT INTO counters (name, value) VALUES ({name_expr}, {delta}) "
+        f"ON CONFLICT(name) DO UPDATE SET value = value + ({delta});"
+    )
+
+
+def _add(name_expr: str, delta: str) -> str:
+    return f"UPDATE counters SET value = value + ({delta}) WHERE name = {name_expr};"
+
+
+NEW_CATEGORY = "'category:' || COALESCE(NEW.category, '')"
+OLD_CATEGORY = "'category:' || COALESCE(OLD.category, '')"
+
+COUNTER_TRIGGERS = {
+    "trg_counters_prompts_insert": f"""
+        AFTER INSERT ON prompts BEGIN
+            {_upsert("'prompts'", "1")}
+            {_upsert("'usage'", "COALESCE(NEW.usage_count, 0)")}
+            {_upsert(NEW_CATEGORY, "1")}
+        END""",
+    "trg_counters_prompts_delete": f"""
+        AFTER DELETE ON prompts BEGIN
+            {_add("'prompts'", "-1")}
+            {_add("'usage'", "-COALESCE(OLD.usage_count, 0)")}
+            {_add(OLD_CATEGORY, "-1")}
+        END""",
+    "trg_counters_prompts_category": f"""
+        AFTER UPDATE OF category ON prompts
+        WHEN OLD.category IS NOT NEW.category BEGIN
+            {_add(OLD_CATEGORY, "-1")}
+            {_upsert(NEW_CATEGORY, "1")}
+        END""",
+    "trg_counters_prompts_usage": f"""
+        AFTER UPDATE OF usage_count ON prompts
+        WHEN OLD.usage_count IS NOT NEW.usage_count BEGIN
+            {_upsert("'usage'", "COALESCE(NEW.usage_count, 0) - COALESCE(OLD.usage_count, 0)")}
+        END""",
+    "trg_counters_tags_insert": f"""
+        AFTER INSERT ON tags BEGIN
+            {_upsert("'tags'", "1")}
+        END""",
+    "trg_counters_tags_delete": f"""
+        AFTER DELETE ON tags BEGIN
+            {_add("'tags'", "-1")}
+        END""",
+    "trg_counters_projects_insert": f"""
+        AFTER INSERT ON projects BEGIN
+            {_upsert("'projects'", "1")}
+        END""",
+    "trg_counters_projects_delete": f"""
+        AFTER DELETE ON projects BEGIN
+            {_add("'projects'", "-1")}
+        END""",
+    "trg_tags_usage_insert": """
+        AFTER INSERT ON prompt_tags BEGIN
+            UPDATE tags SET usage_count = COALESCE(usage_count, 0) + 1 WHERE id = NEW.tag_id;
+        END""",
+    "trg_tags_usage_delete": """
+        AFTER DELETE ON prompt_tags BEGIN
+            UPDATE tags SET usage_count = COALESCE(usage_count, 0) - 1 WHERE id = OLD.tag_id;
+        END""",
+}
+
+# Таблицы с номером изменения: по ним строятся ETag списков (CounterService.get_resource_etag)
+VERSION_PREFIX = "version:"
+VERSIONED_TABLES = ("prompts", "tags", "prompt_tags", "projects", "process_entries", "tasks")
+
+VERSION_TRIGGERS = {
+    f"trg_version_{table}_{event.lower()}": f"""
+        AFTER {event} ON {table} BEGIN
+            {_upsert(f"'{VERSION_PREFIX}{table}'", "1")}
+        END"""
+    for table in VERSIONED_TABLES
+    for event in ("INSERT", "UPDATE", "DELETE")
+}
+
+REBUILD_STATEMENTS = [
+    # Номера изменений не пересчитываются: после сброса старые ETag совпали бы снова
+    f"DELETE FROM counters WHERE name NOT LIKE '{VERSION_PREFIX}%'",
+    "INSERT INTO counters (name, value) SELECT 'prompts', COUNT(*) FROM prompts",
+    "INSERT INTO counters (name, value) SELECT 'tags', COUNT(*) FROM tags",
+    "INSERT INTO counters (name, value) SELECT 'projects', COUNT(*) FROM projects",
+    "INSERT INTO counters (name, value) SELECT 'usage', COALESCE(SUM(usage_count), 0) FROM prompts",
+    """INSERT INTO counters (name, value)
+       SELECT 'category:' || COALESCE(category, ''), COUNT(*) FROM prompts
+       GROUP BY COALESCE(category, '')""",
+]
+
+TAG_USAGE_REBUILD = """
+    UPDATE tags SET usage_count = (
+        SELECT COUNT(*) FROM prompt_tags WHERE prompt_tags.tag_id = tags.id
+    )"""
+
+
+def install_counter_triggers(connection) -> None:
+    """Создать триггеры счётчиков (идемпотентно)"""
+    for name, body in COUNTER_TRIGGERS.items():
+        connection.execute(text(f"CREATE TRIGGER IF NOT EXISTS {name} {body}"))
+
+
+def install_version_triggers(connection) -> None:
+    """Создать триггеры номеров изменений таблиц (идемпотентно)"""
+    for name, body in VERSION_TRIGGERS.items():
+        connection.execute(text(f"CREATE TRIGGER IF NOT EXISTS {name} {body}"))
+
+
+def rebuild_counters(connection) -> None:
+    """Пересчитать все счётчики по текущим данным"""
+    for statement in REBUILD_STATEMENTS:
+        connection.execute(text(statement))
+    rebuild_tag_usage(connection)
+
+
+def rebuild_tag_usage(connection) -> None:
+    """Пересчитать tags.usage_count по prompt_tags"""
+    connection.execute(text(TAG_USAGE_REBUILD))
+
+
+def counters_supported(connection) -> bool:
+    """Триггеры счётчиков поддерживаются только для SQLite"""
+    return connection.dialect.name == "sqlite"
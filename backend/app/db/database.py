@@ -7,9 +7,11 @@ import os
 import sys
 import shutil
 from pathlib import Path
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import StaticPool
+
+# Engine, сессии и get_db - общие с приложением (app.db, settings.DATABASE_URL):
+# своё соединение на поток, а не одно общее на всех (инициализация, watcher и
+# запросы идут параллельно)
+from app.db import engine, SessionLocal, get_db  # noqa: F401
 
 # Определяем путь к БД
 # Для exe ищем data в папке с exe, для разработки - в корне проекта
@@ -33,9 +35,6 @@ try:
 except Exception as e:
     print(f"[DB] Failed to create data dir at {DATA_DIR}: {e}")
 
-# Правильный путь для SQLite URL
-db_path = DATA_DIR / 'pandora.db'
-DATABASE_URL = f"sqlite:///{str(db_path).replace(chr(92), '/')}"
 
 def _attempt_copy_prebuilt_db(target_path: Path) -> bool:
     """Попытаться найти и скопировать предсозданную базу данных в целевой путь.
@@ -81,31 +80,18 @@ def _attempt_copy_prebuilt_db(target_path: Path) -> bool:
     return False
 
 
+# Файл БД приложения (None - БД не файловая SQLite)
+db_path = (
+    Path(engine.url.database)
+    if engine.url.get_backend_name() == "sqlite" and engine.url.database not in (None, "", ":memory:")
+    else None
+)
+
 # Если БД не существует, копируем готовую (если она есть в распределении)
-if not db_path.exists():
+if db_path is not None and not db_path.exists():
     try:
         copied = _attempt_copy_prebuilt_db(db_path)
         if not copied:
             print(f"[DB] No pre-built database found for target {db_path}")
     except Exception as e:
         print(f"[DB] Error while attempting to copy pre-built DB: {e}")
-
-# Создаем engine с правильными параметрами для SQLite
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-    echo=False
-)
-
-# Создаем SessionLocal factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-
-def get_db() -> Session:
-    """Dependency для получения сессии БД"""
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
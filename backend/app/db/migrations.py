@@ -1,107 +1,228 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-Database migrations для добавления новых полей к существующей БД
+Версионные миграции схемы БД.
+
+Применённые шаги записываются в таблицу schema_version. Новые шаги выполняются
+по порядку, один раз, в одной транзакции на соединении того же engine, что и
+приложение. Если схема актуальна, запуск стоит один запрос к schema_version.
+
+Каждый шаг идемпотентен: на свежей БД (таблицы только что созданы create_all)
+он просто ничего не меняет.
 """
 
-import sqlite3
-from pathlib import Path
 from datetime import datetime
+from typing import Callable, List, NamedTuple
 
+from sqlalchemy import inspect, text
 
-def get_db_path():
-    """Получить путь к БД"""
-    # Пытаемся найти БД в разных местах
-    possible_paths = [
-        Path(__file__).parent.parent.parent.parent / "data" / "pandora.db",
-        Path(__file__).parent.parent.parent / "frontend" / "pandora.db",
-        Path(__file__).parent.parent.parent.parent / "frontend" / "pandora.db",
-    ]
-    
-    for path in possible_paths:
-        if path.exists():
-            return path
-    
-    # По умолчанию
-    return Path(__file__).parent.parent.parent.parent / "data" / "pandora.db"
-
-
-def add_column_if_not_exists(conn, table: str, column: str, column_type: str):
-    """Добавить колонку в таблицу если её нет"""
-    cursor = conn.cursor()
-    
-    # Проверяем есть ли колонка
-    cursor.execute(f"PRAGMA table_info({table})")
-    columns = {row[1] for row in cursor.fetchall()}
-    
-    if column not in columns:
-        print(f"  Adding column: {table}.{column} ({column_type})")
-        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
-        conn.commit()
-        return True
-    else:
-        print(f"  Column already exists: {table}.{column}")
-        return False
+from app.db.models import Base, MirrorFile, PromptChange, ReferenceFile, SchemaVersion
+from app.db.counters import (
+    counters_supported, install_counter_triggers, install_version_triggers, rebuild_counters
+)
+from app.db.change_log import install_change_log_triggers, seed_change_log
 
 
-def migrate_database():
-    """Миграция БД: добавление новых полей для расширенных метаданных"""
-    db_path = get_db_path()
-    
-    if not db_path.exists():
-        print(f"Database not found at {db_path}")
-        return False
-    
-    print(f"[Migration] Connecting to database: {db_path}")
-    
+class Migration(NamedTuple):
+    """Шаг миграции"""
+    version: int
+    name: str
+    apply: Callable
+
+
+# ================ ШАГИ ================
+
+PROMPT_METADATA_COLUMNS = [
+    ("subcategory", "VARCHAR(50)"),
+    ("emoji", "VARCHAR(10)"),
+    ("difficulty", "VARCHAR(50) DEFAULT 'intermediate'"),
+    ("context_window", "VARCHAR(50)"),
+    ("models", "TEXT"),  # JSON array
+    ("use_cases", "TEXT"),  # JSON array
+    ("examples", "TEXT"),  # JSON array
+    ("changelog", "TEXT"),
+    ("rating", "REAL DEFAULT 0.0"),
+    ("author", "VARCHAR(255)"),
+    ("author_url", "VARCHAR(500)"),
+    ("keywords", "TEXT"),  # JSON array
+    ("is_featured", "BOOLEAN DEFAULT 0"),
+    ("is_experimental", "BOOLEAN DEFAULT 0"),
+    ("last_used_at", "DATETIME"),
+]
+
+
+def add_missing_columns(conn, table: str, columns) -> List[str]:
+    """Добавить в таблицу отсутствующие колонки (одна проверка схемы на таблицу)"""
+    existing = {column["name"] for column in inspect(conn).get_columns(table)}
+    added = []
+    for column, column_type in columns:
+        if column not in existing:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}"))
+            added.append(column)
+    return added
+
+
+def _prompt_metadata(conn):
+    """Расширенные метаданные промптов для БД, созданных до v2"""
+    added = add_missing_columns(conn, "prompts", PROMPT_METADATA_COLUMNS)
+    if added:
+        print(f"  Added columns: {', '.join(added)}")
+
+    # Заполняем default значения одним проходом
+    conn.execute(text("""
+        UPDATE prompts SET
+            difficulty = COALESCE(difficulty, 'intermediate'),
+            rating = COALESCE(rating, 0.0),
+            is_featured = COALESCE(is_featured, 0),
+            is_experimental = COALESCE(is_experimental, 0)
+        WHERE difficulty IS NULL OR rating IS NULL
+           OR is_featured IS NULL OR is_experimental IS NULL
+    """))
+
+
+def _analytics_indexes(conn):
+    """Индексы для аналитики использования и облака тегов"""
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_prompts_last_used_at ON prompts (last_used_at)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_prompts_usage_count ON prompts (usage_count)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_tags_usage_count ON tags (usage_count)"))
+
+
+def _materialized_counters(conn):
+    """Триггеры счётчиков и tags.usage_count, первичный пересчёт"""
+    if not counters_supported(conn):
+        return
+    install_counter_triggers(conn)
+    rebuild_counters(conn)
+
+
+def _reference_manifest(conn):
+    """Манифест файлов references для инкрементального импорта"""
+    ReferenceFile.__table__.create(bind=conn, checkfirst=True)
+
+
+def _prompt_change_log(conn):
+    """Журнал изменений промптов и состояние файлового зеркала"""
+    PromptChange.__table__.create(bind=conn, checkfirst=True)
+    MirrorFile.__table__.create(bind=conn, checkfirst=True)
+    if not counters_supported(conn):
+        return
+    install_change_log_triggers(conn)
+    seed_change_log(conn)
+
+
+def _project_indexes(conn):
+    """Индексы для агрегатов списка проектов и пагинации записей/задач"""
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_process_entries_project_id_id ON process_entries (project_id, id)"
+    ))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_tasks_project_id_status ON tasks (project_id, status)"))
+
+
+def _table_versions(conn):
+    """Номера изменений таблиц для ETag и индекс последнего изменения промптов"""
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_prompts_updated_at ON prompts (updated_at)"))
+    if not counters_supported(conn):
+        return
+    install_version_triggers(conn)
+
+
+def _prompt_source_paths(conn):
+    """Файл references для каждого промпта: ключ синхронизации вместо заголовка"""
+    add_missing_columns(conn, "prompts", [("source_path", "VARCHAR(500)")])
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_prompts_source_path ON prompts (source_path)"))
+    # agents.json даёт много промптов из одного файла - их сопоставит следующий импорт
+    conn.execute(text("""
+        UPDATE prompts SET source_path = (
+            SELECT MIN(path) FROM reference_files
+            WHERE reference_files.prompt_id = prompts.id AND path NOT LIKE '%agents.json'
+        )
+        WHERE source_path IS NULL
+    """))
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "prompt metadata columns", _prompt_metadata),
+    Migration(2, "analytics indexes", _analytics_indexes),
+    Migration(3, "materialized counters", _materialized_counters),
+    Migration(4, "reference file manifest", _reference_manifest),
+    Migration(5, "prompt change log", _prompt_change_log),
+    Migration(6, "project indexes", _project_indexes),
+    Migration(7, "table versions", _table_versions),
+    Migration(8, "prompt source paths", _prompt_source_paths),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+# ================ RUNNER ================
+
+def get_schema_version(conn) -> int:
+    """Текущая версия схемы (0 - миграции ещё не применялись)"""
+    if not inspect(conn).has_table(SchemaVersion.__tablename__):
+        return 0
+    return conn.execute(text("SELECT MAX(version) FROM schema_version")).scalar() or 0
+
+
+def _begin_ddl_transaction(conn):
+    """
+    pysqlite сам открывает транзакцию только перед DML, поэтому DDL
+    выполнялся бы в autocommit. Открываем транзакцию явно.
+    """
+    if conn.dialect.name != "sqlite":
+        return
+    if not getattr(conn.connection.dbapi_connection, "in_transaction", False):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def run_migrations(engine) -> int:
+    """
+    Привести схему к актуальной версии.
+
+    Returns:
+        Количество применённых шагов (0 если схема актуальна)
+    """
+    with engine.connect() as conn:
+        if get_schema_version(conn) >= LATEST_VERSION:
+            return 0
+
+    with engine.begin() as conn:
+        _begin_ddl_transaction(conn)
+
+        # Повторная проверка уже под блокировкой записи
+        current = get_schema_version(conn)
+        if current >= LATEST_VERSION:
+            return 0
+
+        print(f"[Migration] Schema version {current} -> {LATEST_VERSION}")
+        Base.metadata.create_all(bind=conn)
+
+        applied = 0
+        for migration in MIGRATIONS:
+            if migration.version <= current:
+                continue
+            print(f"[Migration] Applying {migration.version}: {migration.name}")
+            migration.apply(conn)
+            conn.execute(
+                SchemaVersion.__table__.insert().values(
+                    version=migration.version,
+                    name=migration.name,
+                    applied_at=datetime.utcnow()
+                )
+            )
+            applied += 1
+
+    print(f"[Migration] ✓ Applied {applied} migration(s)")
+    return applied
+
+
+def migrate_database(engine=None) -> bool:
+    """Применить миграции к БД приложения"""
+    if engine is None:
+        from app.db import engine
+
     try:
-        conn = sqlite3.connect(str(db_path))
-        cursor = conn.cursor()
-        
-        print("[Migration] Adding new columns to prompts table...")
-        
-        # Новые колонки с их типами
-        new_columns = [
-            ("subcategory", "VARCHAR(50)"),
-            ("emoji", "VARCHAR(10)"),
-            ("difficulty", "VARCHAR(50) DEFAULT 'intermediate'"),
-            ("context_window", "VARCHAR(50)"),
-            ("models", "TEXT"),  # JSON array
-            ("use_cases", "TEXT"),  # JSON array
-            ("examples", "TEXT"),  # JSON array
-            ("changelog", "TEXT"),
-            ("rating", "REAL DEFAULT 0.0"),
-            ("author", "VARCHAR(255)"),
-            ("author_url", "VARCHAR(500)"),
-            ("keywords", "TEXT"),  # JSON array
-            ("is_featured", "BOOLEAN DEFAULT 0"),
-            ("is_experimental", "BOOLEAN DEFAULT 0"),
-        ]
-        
-        for col_name, col_type in new_columns:
-            add_column_if_not_exists(conn, "prompts", col_name, col_type)
-        
-        # Обновляем ячейки с default значениями где они NULL
-        print("[Migration] Updating NULL values with defaults...")
-        updates = [
-            ("UPDATE prompts SET difficulty = 'intermediate' WHERE difficulty IS NULL", "difficulty"),
-            ("UPDATE prompts SET rating = 0.0 WHERE rating IS NULL", "rating"),
-            ("UPDATE prompts SET is_featured = 0 WHERE is_featured IS NULL", "is_featured"),
-            ("UPDATE prompts SET is_experimental = 0 WHERE is_experimental IS NULL", "is_experimental"),
-        ]
-        
-        for update_sql, field_name in updates:
-            try:
-                cursor.execute(update_sql)
-                conn.commit()
-                print(f"  Updated {field_name}")
-            except Exception as e:
-                print(f"  Warning: Could not update {field_name}: {e}")
-        
-        conn.close()
-        print("[Migration] ✓ Database migration completed successfully!")
+        run_migrations(engine)
         return True
-        
     except Exception as e:
         print(f"[Migration] ✗ Error during migration: {e}")
         import traceback
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Float, Table, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, Table, ForeignKey, Boolean, Index
 from sqlalchemy.orm import declarative_base, relationship
 from datetime import datetime
 
@@ -20,7 +20,7 @@ class Tag(Base):
     id = Column(Integer, primary_key=True)
     name = Column(String(50), unique=True, index=True, nullable=False)
     color = Column(String(7), default="#3B82F6")
-    usage_count = Column(Integer, default=0)
+    usage_count = Column(Integer, default=0, index=True)  # Промптов с тегом (триггеры, app.db.counters)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     prompts = relationship(
@@ -49,15 +49,17 @@ class Prompt(Base):
     examples = Column(Text)  # JSON array: ["example1.md", "example2.md"]
     changelog = Column(Text)  # История изменений (версионирование)
     rating = Column(Float, default=0.0)  # Рейтинг от 0 до 5
-    usage_count = Column(Integer, default=0)
+    usage_count = Column(Integer, default=0, index=True)
+    last_used_at = Column(DateTime, index=True)  # Время последнего использования
     author = Column(String(255))  # Автор промта
     author_url = Column(String(500))  # URL автора (GitHub profile и т.д.)
     imported_from = Column(String(255))  # Источник импорта
+    source_path = Column(String(500), index=True)  # Файл в references, из которого импортирован промпт
     keywords = Column(Text)  # JSON array: ["keyword1", "keyword2"] для поиска
     is_featured = Column(Boolean, default=False)
     is_experimental = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     tags = relationship(
         "Tag",
@@ -67,6 +69,82 @@ class Prompt(Base):
     )
 
 
+class UsageEvent(Base):
+    """Событие использования промпта (сырой журнал)"""
+    __tablename__ = "usage_events"
+    
+    id = Column(Integer, primary_key=True)
+    prompt_id = Column(Integer, ForeignKey('prompts.id', ondelete='CASCADE'), nullable=False, index=True)
+    used_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+
+class UsageHourly(Base):
+    """Почасовой агрегат использования промптов"""
+    __tablename__ = "usage_hourly"
+    
+    bucket = Column(DateTime, primary_key=True)  # Начало часа (UTC)
+    prompt_id = Column(Integer, ForeignKey('prompts.id', ondelete='CASCADE'), primary_key=True, index=True)
+    count = Column(Integer, default=0, nullable=False)
+
+
+class UsageDaily(Base):
+    """Посуточный агрегат использования промптов"""
+    __tablename__ = "usage_daily"
+    
+    bucket = Column(DateTime, primary_key=True)  # Начало суток (UTC)
+    prompt_id = Column(Integer, ForeignKey('prompts.id', ondelete='CASCADE'), primary_key=True, index=True)
+    count = Column(Integer, default=0, nullable=False)
+
+
+class Counter(Base):
+    """Материализованный счётчик (поддерживается триггерами, см. app.db.counters)"""
+    __tablename__ = "counters"
+    
+    name = Column(String(100), primary_key=True)  # prompts, tags, projects, usage, category:<name>
+    value = Column(Integer, default=0, nullable=False)
+
+
+class ReferenceFile(Base):
+    """Манифест импортированных файлов references (для инкрементального импорта)"""
+    __tablename__ = "reference_files"
+    
+    path = Column(String(1000), primary_key=True)  # Относительно папки references, posix
+    size = Column(Integer, nullable=False)
+    mtime = Column(Float, nullable=False)
+    content_hash = Column(String(64), nullable=False)  # sha256
+    is_prompt = Column(Boolean, default=False)
+    prompt_id = Column(Integer, ForeignKey('prompts.id', ondelete='SET NULL'), nullable=True, index=True)
+    imported_at = Column(DateTime, default=datetime.utcnow)
+
+
+class PromptChange(Base):
+    """Журнал изменений промптов (пишется триггерами, см. app.db.change_log)"""
+    __tablename__ = "prompt_changes"
+    
+    id = Column(Integer, primary_key=True)
+    prompt_id = Column(Integer, nullable=False)  # Без FK: запись переживает удаление промпта
+    changed_at = Column(DateTime, default=datetime.utcnow)
+
+
+class MirrorFile(Base):
+    """Файл зеркала библиотеки на диске (data/mirror/<category>/<id>_<title>.txt)"""
+    __tablename__ = "mirror_files"
+    
+    prompt_id = Column(Integer, primary_key=True)
+    path = Column(String(1000), nullable=False)  # Относительно папки зеркала, posix
+    content_hash = Column(String(64), nullable=False)  # sha256 записанного текста
+    synced_at = Column(DateTime, default=datetime.utcnow)
+
+
+class SchemaVersion(Base):
+    """Применённые миграции схемы (см. app.db.migrations)"""
+    __tablename__ = "schema_version"
+    
+    version = Column(Integer, primary_key=True)
+    name = Column(String(255), nullable=False)
+    applied_at = Column(DateTime, default=datetime.utcnow)
+
+
 class Project(Base):
     """Модель проекта"""
     __tablename__ = "projects"
@@ -92,6 +170,9 @@ class ProcessEntry(Base):
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
     
     project = relationship("Project", back_populates="process_entries")
+    
+    # Счётчики/последняя запись по проекту и курсорная пагинация
+    __table_args__ = (Index("ix_process_entries_project_id_id", "project_id", "id"),)
 
 
 class Task(Base):
@@ -109,3 +190,5 @@ class Task(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     project = relationship("Project", back_populates="tasks")
+    
+    __table_args__ = (Index("ix_tasks_project_id_status", "project_id", "status"),)
@@ -9,11 +9,22 @@ from pathlib import Path
 from datetime import datetime
 import os
 
+logger = logging.getLogger(__name__)
+_configured = False
+
+
 def setup_logging():
     """
     Настроить логирование для приложения
     Логи сохраняются в LOCALAPPDATA/PANDORA/logs/app.log
+    
+    Вызывается явно при старте приложения (app.main); повторные вызовы
+    ничего не делают, чтобы не дублировать обработчики.
     """
+    global _configured
+    if _configured:
+        return logger
+    _configured = True
     
     # Определяем директорию логов
     if os.name == 'nt':  # Windows
@@ -49,12 +60,8 @@ def setup_logging():
     root_logger.addHandler(console_handler)
     
     # Log initial info
-    logger = logging.getLogger(__name__)
     logger.info(f"Logging initialized. Log file: {log_file}")
     logger.info(f"Python version: {sys.version}")
     logger.info(f"Platform: {sys.platform}")
     
     return logger
-
-# Инициализируем логирование при импорте
-logger = setup_logging()
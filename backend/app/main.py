@@ -1,12 +1,14 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, FileResponse, JSONResponse, PlainTextResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
 from pathlib import Path
 from app.config import settings
 from app.api.routes import router
+from app.compression import CompressionMiddleware
+from app.static_assets import StaticAssets, StaticAssetsApp, load_manifest, manifest_paths, normalize_path
 from app.logging_setup import logger, setup_logging
-import threading
+from contextlib import asynccontextmanager
+import asyncio
 import os
 import logging
 
@@ -16,39 +18,71 @@ logger.info("=" * 60)
 logger.info("PANDORA v2.0 Backend Starting...")
 logger.info("=" * 60)
 
-# Database initialization flag
-_db_initialized = False
-_db_init_lock = threading.Lock()
+# Максимум, сколько запрос к API ждёт завершения миграций
+SCHEMA_WAIT_TIMEOUT = 60.0
 
-# Create FastAPI app (database will be initialized on first request)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start database initialization in the background and log startup info"""
+    from app.services.startup_status import StartupStatus
+
+    StartupStatus.reset()
+    settings.ensure_directories()
+    if settings.INIT_DB_ON_STARTUP:
+        from app.services.db_initializer import DatabaseInitializer
+        logger.info("[DATABASE] Initializing database in background...")
+        DatabaseInitializer.start_background()
+    else:
+        StartupStatus.mark_ready()
+    if settings.PROMPTS_MIRROR:
+        from app.db import SessionLocal
+        from app.services.mirror_service import MirrorService
+        MirrorService.start_background(SessionLocal)
+    if settings.WATCH_REFERENCES:
+        from app.services.references_watcher import ReferencesWatcher
+        ReferencesWatcher.start_background()
+
+    logger.info("=" * 60)
+    logger.info("✓ PANDORA v2.0 Backend Ready")
+    logger.info(f"✓ API Running at: http://127.0.0.1:8000")
+    logger.info(f"✓ API Documentation: http://127.0.0.1:8000/docs")
+    logger.info(f"✓ Static Files Mounted: /src, /dist")
+    logger.info(f"✓ Logging to: %LOCALAPPDATA%/PANDORA/logs/application.log")
+    logger.info("=" * 60)
+    yield
+
+    from app.services.import_jobs import ImportJobService
+    ImportJobService.shutdown()
+    if settings.PROMPTS_MIRROR:
+        from app.services.mirror_service import MirrorService
+        MirrorService.stop_background()
+    if settings.WATCH_REFERENCES:
+        from app.services.references_watcher import ReferencesWatcher
+        ReferencesWatcher.stop_background()
+
+
+# Create FastAPI app (database is initialized in the background by lifespan)
 app = FastAPI(
     title=settings.API_TITLE,
     version=settings.API_VERSION,
     description="Professional prompt management system with auto-tagging and project tracking",
     docs_url="/docs",
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    lifespan=lifespan
 )
 
-# Add initialization middleware
+# Hold API requests until the schema is migrated (import may still be running)
 @app.middleware("http")
-async def init_db_middleware(request: Request, call_next):
-    """Initialize database on first request"""
-    global _db_initialized
-    
-    if not _db_initialized:
-        with _db_init_lock:
-            if not _db_initialized:
-                try:
-                    from app.services.db_initializer import DatabaseInitializer
-                    logger.info("[DATABASE] Initializing database...")
-                    DatabaseInitializer.init_db()
-                    _db_initialized = True
-                    logger.info("[DATABASE] ✓ Database initialized successfully")
-                except Exception as e:
-                    logger.error(f"[DATABASE] ✗ Initialization error: {e}")
-    
-    response = await call_next(request)
-    return response
+async def schema_ready_middleware(request: Request, call_next):
+    """Wait for migrations without blocking the event loop"""
+    from app.services.startup_status import StartupStatus
+
+    if request.url.path.startswith("/api") and not StartupStatus.schema_ready.is_set():
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, StartupStatus.schema_ready.wait, SCHEMA_WAIT_TIMEOUT)
+
+    return await call_next(request)
 
 # Add CORS middleware
 app.add_middleware(
@@ -59,9 +93,56 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON/text API responses (gzip or brotli, negotiated per request)
+app.add_middleware(CompressionMiddleware)
+
 # Include routes
 app.include_router(router)
 
+
+@app.get("/health")
+def health_check():
+    """Health check endpoint returning DB and basic stats."""
+    try:
+        from app.db import SessionLocal
+        from app.db.database import db_path as db_file
+        from app.services.counter_service import CounterService
+
+        db_exists = db_file is None or db_file.exists()
+        info = {
+            'status': 'healthy',
+            'db_path': str(db_file) if db_file is not None else None,
+            'db_exists': db_exists,
+            'db_size': db_file.stat().st_size if db_file is not None and db_exists else 0,
+        }
+
+        # Try to get counts if DB is available
+        if db_exists:
+            db = SessionLocal()
+            try:
+                totals = CounterService.get_totals(db)
+                info['total_prompts'] = totals['prompts']
+                info['total_tags'] = totals['tags']
+            except Exception as e:
+                info['db_error'] = str(e)
+            finally:
+                db.close()
+
+        return info
+    except Exception as e:
+        print(f"[HEALTH] Error building health info: {e}")
+        return {"status": "unhealthy", "error": str(e)}
+
+
+@app.get("/ready")
+def readiness_check():
+    """Startup progress: 200 when initialization finished, 503 while it runs"""
+    from app.services.startup_status import StartupStatus
+
+    info = StartupStatus.snapshot()
+    return JSONResponse(info, status_code=200 if info["ready"] else 503)
+
+
 # Mount static files for frontend
 import sys
 
@@ -93,87 +174,71 @@ frontend_dir = resolve_frontend_dir()
 logger.info(f"[STATIC] Frontend directory resolved to: {frontend_dir}")
 logger.info(f"[STATIC] Frontend dir exists: {frontend_dir.exists()}")
 
-# Mount static directories FIRST (before catch-all route)
-# Mount dist folder (compiled/distributed assets)
-dist_dir = frontend_dir / "dist"
-if dist_dir.exists():
-    try:
-        app.mount("/dist", StaticFiles(directory=str(dist_dir)), name="dist")
-        logger.info(f"[STATIC] ✓ Mounted /dist -> {dist_dir}")
-    except Exception as e:
-        logger.error(f"[STATIC] ✗ Failed to mount /dist: {e}")
+# Bundled frontend (desktop/frontend_bundler.py): dist/index.html references
+# content-hashed files listed as immutable in dist/manifest.json.
+frontend_manifest = None
+if getattr(sys, 'frozen', False) or settings.FRONTEND_BUNDLE:
+    frontend_manifest = load_manifest(frontend_dir)
+    if frontend_manifest is None:
+        logger.warning(f"[STATIC] No frontend bundle in {frontend_dir}, serving source modules")
+if frontend_manifest is not None:
+    index_path, immutable_paths = manifest_paths(frontend_manifest)
+    logger.info(f"[STATIC] ✓ Serving frontend bundle ({len(frontend_manifest.get('files', {}))} files)")
 else:
-    logger.warning(f"[STATIC] dist dir not found at {dist_dir}")
+    index_path, immutable_paths = "index.html", ()
+
+# Frontend files are served from memory (ETag/304, immutable for hashed names).
+# In development the cache re-checks files on disk, so edits show up on reload.
+frontend_assets = StaticAssets(frontend_dir, watch=not getattr(sys, 'frozen', False),
+                               immutable=immutable_paths)
+
+# Mount static directories FIRST (before catch-all route)
+for mount_name in ("dist", "src"):
+    mount_dir = frontend_dir / mount_name
+    if mount_dir.exists():
+        app.mount(f"/{mount_name}", StaticAssetsApp(frontend_assets, mount_name), name=mount_name)
+        logger.info(f"[STATIC] ✓ Mounted /{mount_name} -> {mount_dir}")
+    else:
+        logger.warning(f"[STATIC] {mount_name} dir not found at {mount_dir}")
+
+
+def serve_index(request: Request):
+    """index.html from the asset cache (built-in fallback page if missing)"""
+    response = frontend_assets.response(index_path, request.headers)
+    if response is None:
+        logger.warning(f"[STATIC] {index_path} not found in {frontend_dir}")
+        return HTMLResponse(get_index_html_fallback())
+    return response
 
-# Mount src folder (source assets)
-src_dir = frontend_dir / "src"
-if src_dir.exists():
-    try:
-        app.mount("/src", StaticFiles(directory=str(src_dir)), name="src")
-        logger.info(f"[STATIC] ✓ Mounted /src -> {src_dir}")
-    except Exception as e:
-        logger.error(f"[STATIC] ✗ Failed to mount /src: {e}")
-else:
-    logger.warning(f"[STATIC] src dir not found at {src_dir}")
 
 # ROOT route - serve index.html
 @app.get("/", response_class=HTMLResponse)
-async def root():
+async def root(request: Request):
     """Serve main HTML page"""
-    index_path = frontend_dir / "index.html"
-    if index_path.exists():
-        try:
-            content = index_path.read_text(encoding='utf-8')
-            logger.info(f"[STATIC] ✓ Serving index.html from {index_path}")
-            return content
-        except Exception as e:
-            logger.error(f"[STATIC] ✗ Error reading index.html: {e}")
-            return get_index_html_fallback()
-    else:
-        logger.warning(f"[STATIC] index.html not found at {index_path}")
-        return get_index_html_fallback()
+    return serve_index(request)
 
 # Catch-all for individual static files (MUST BE AFTER api/router and root route)
 @app.get("/{file_path:path}", response_class=HTMLResponse)
-async def serve_static(file_path: str):
+async def serve_static(file_path: str, request: Request):
     """Serve static files from frontend directory (catch-all for non-API routes)"""
     try:
         # Skip if this looks like an API endpoint (shouldn't happen but safety measure)
         if file_path.startswith(('api/', 'docs', 'openapi.json', 'health')):
             return PlainTextResponse("Not found", status_code=404)
         
-        static_path = frontend_dir / file_path
-
-        # Security check: prevent directory traversal
-        try:
-            static_resolved = static_path.resolve()
-            frontend_resolved = frontend_dir.resolve()
-            if not str(static_resolved).startswith(str(frontend_resolved)):
-                logger.warning(f"[STATIC] Security violation attempt: {static_path}")
-                return PlainTextResponse("Forbidden", status_code=403)
-        except Exception as e:
-            logger.error(f"[STATIC] Path resolution error: {e}")
-            return PlainTextResponse("Invalid path", status_code=400)
-
-        # Check if file exists
-        if static_path.exists() and static_path.is_file():
-            logger.debug(f"[STATIC] Serving {file_path}")
-            return FileResponse(static_path)
-
-        # If not found, try to serve index.html for SPA routing
-        # This allows React Router / Vue Router to handle the route client-side
-        index_path = frontend_dir / "index.html"
-        if index_path.exists():
-            logger.debug(f"[STATIC] Route not found ({file_path}), serving index.html for SPA routing")
-            try:
-                return index_path.read_text(encoding='utf-8')
-            except Exception as e:
-                logger.error(f"[STATIC] Error serving fallback index.html: {e}")
-                return get_index_html_fallback()
+        # Security check: prevent directory traversal (no filesystem access needed)
+        if normalize_path(file_path) is None:
+            logger.warning(f"[STATIC] Security violation attempt: {file_path}")
+            return PlainTextResponse("Forbidden", status_code=403)
+
+        response = frontend_assets.response(file_path, request.headers)
+        if response is not None:
+            return response
 
-        # Helpful debug: log the attempted path
-        logger.debug(f"[STATIC] Not found: {static_path} (requested: {file_path})")
-        return PlainTextResponse("Not found", status_code=404)
+        # If not found, serve index.html for SPA routing
+        # This allows the client-side router to handle the route
+        logger.debug(f"[STATIC] Route not found ({file_path}), serving index.html for SPA routing")
+        return serve_index(request)
     except Exception as e:
         logger.error(f"[STATIC] Error serving {file_path}: {e}")
         return PlainTextResponse("Internal error", status_code=500)
@@ -332,50 +397,3 @@ def get_index_html_fallback() -> str:
     </body>
     </html>
     """
-
-
-# Startup event
-@app.on_event("startup")
-async def startup_event():
-    """Log startup information"""
-    logger.info("=" * 60)
-    logger.info("✓ PANDORA v2.0 Backend Ready")
-    logger.info(f"✓ API Running at: http://127.0.0.1:8000")
-    logger.info(f"✓ API Documentation: http://127.0.0.1:8000/docs")
-    logger.info(f"✓ Static Files Mounted: /src, /dist")
-    logger.info(f"✓ Logging to: %LOCALAPPDATA%/PANDORA/logs/application.log")
-    logger.info("=" * 60)
-
-
-@app.get("/health")
-async def health_check():
-    """Health check endpoint returning DB and basic stats."""
-    try:
-        from app.db.database import DATA_DIR
-        from app.db.database import SessionLocal
-        from app.db.models import Prompt, Tag
-
-        db_file = DATA_DIR / 'pandora.db'
-        info = {
-            'status': 'healthy',
-            'db_path': str(db_file),
-            'db_exists': db_file.exists(),
-            'db_size': db_file.stat().st_size if db_file.exists() else 0,
-        }
-
-        # Try to get counts if DB is available
-        if db_file.exists():
-            db = SessionLocal()
-            try:
-                info['total_prompts'] = db.query(Prompt).count()
-                info['total_tags'] = db.query(Tag).count()
-            except Exception as e:
-                info['db_error'] = str(e)
-            finally:
-                db.close()
-
-        return info
-    except Exception as e:
-        print(f"[HEALTH] Error building health info: {e}")
-        return {"status": "unhealthy", "error": str(e)}
-
@@ -39,6 +39,15 @@ class Tag(TagBase):
         from_attributes = True
 
 
+class TagCloudEntry(BaseModel):
+    """Элемент облака тегов"""
+    id: int
+    name: str
+    color: Optional[str] = None
+    count: int
+    weight: float = Field(..., description="Доля от самого популярного тега (0..1]")
+
+
 class DifficultyEnum(str, Enum):
     """Уровни сложности промптов"""
     BEGINNER = "beginner"
@@ -135,6 +144,47 @@ class ProcessEntry(BaseModel):
     project_id: int
 
 
+class TaskStatusEnum(str, Enum):
+    """Статусы задач (колонки доски)"""
+    TODO = "todo"
+    IN_PROGRESS = "in_progress"
+    DONE = "done"
+
+
+class TaskPriorityEnum(str, Enum):
+    """Приоритеты задач"""
+    LOW = "low"
+    MEDIUM = "medium"
+    HIGH = "high"
+
+
+class TaskUpdate(BaseModel):
+    """Изменение задачи: только известные поля"""
+    title: Optional[str] = Field(None, min_length=1, max_length=255)
+    description: Optional[str] = None
+    status: Optional[TaskStatusEnum] = None
+    priority: Optional[TaskPriorityEnum] = None
+    due_date: Optional[datetime] = None
+    
+    class Config:
+        extra = "forbid"
+
+
+class TaskMove(BaseModel):
+    """Перемещение карточки: новый статус и/или приоритет"""
+    id: int
+    status: Optional[TaskStatusEnum] = None
+    priority: Optional[TaskPriorityEnum] = None
+    
+    class Config:
+        extra = "forbid"
+
+
+class TaskBulkUpdate(BaseModel):
+    """Схема для массового изменения задач"""
+    tasks: List[TaskMove] = Field(..., min_items=1, max_items=1000)
+
+
 class TaskEntry(BaseModel):
     """Запись задачи"""
     task_id: Optional[int] = None
@@ -146,17 +196,52 @@ class TaskEntry(BaseModel):
     due_date: Optional[datetime] = None
 
 
-class Project(ProjectBase):
+class ProcessEntryOut(BaseModel):
+    """Запись процесса в ответах API"""
     id: int
+    project_id: int
+    entry: str
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class TaskOut(BaseModel):
+    """Задача в ответах API"""
+    id: int
+    project_id: int
+    title: str
+    description: Optional[str] = None
+    status: str
+    priority: str
+    due_date: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
-    process_entries: List[ProcessEntry] = []
-    tasks: List[TaskEntry] = []
     
     class Config:
         from_attributes = True
 
 
+class ProjectSummary(ProjectBase):
+    """Проект в списке: счётчики и последняя запись вместо связей"""
+    id: int
+    created_at: datetime
+    updated_at: datetime
+    process_entries_count: int = 0
+    tasks_count: int = 0
+    tasks_done_count: int = 0
+    latest_entry: Optional[ProcessEntryOut] = None
+
+
+class Project(ProjectSummary):
+    """Проект с первой страницей записей (новые первыми) и задач"""
+    process_entries: List[ProcessEntryOut] = []
+    tasks: List[TaskOut] = []
+    process_entries_next_cursor: Optional[int] = None
+    tasks_next_cursor: Optional[int] = None
+
+
 class PromptBulkImport(BaseModel):
     """Схема для массовой загрузки промптов"""
     import_source: str = Field(..., description="Источник импорта (e.g., 'awesome-prompts', 'agent-library')")
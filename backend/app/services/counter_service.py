@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Чтение материализованных счётчиков (см. app.db.counters).
+
+Для SQLite значения берутся из таблицы counters за O(1) строк;
+для других СУБД, где триггеры не ставятся, считаются запросами COUNT.
+
+По номерам изменений таблиц (version:<table>) строятся слабые ETag списков
+API: проверка If-None-Match стоит два точечных запроса вместо выборки.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.db.counters import VERSION_PREFIX, counters_supported
+from app.db.models import Counter, Prompt, Tag, Project, prompt_tags
+
+
+TOTAL_MODELS = {"prompts": Prompt, "tags": Tag, "projects": Project}
+CATEGORY_PREFIX = "category:"
+
+# Ресурс API -> (таблицы, от которых зависит ответ; колонка последнего изменения)
+RESOURCE_TABLES = {
+    "prompts": (("prompts", "prompt_tags", "tags"), Prompt.updated_at),
+    "tags": (("tags",), None),
+    "projects": (("projects", "process_entries", "tasks"), Project.updated_at),
+}
+
+
+class CounterService:
+    """Сервис чтения счётчиков"""
+
+    @staticmethod
+    def get_values(db: Session, names: Iterable[str]) -> Dict[str, int]:
+        """Получить значения счётчиков по именам (отсутствующие = 0)"""
+        names = list(names)
+        rows = db.query(Counter.name, Counter.value).filter(Counter.name.in_(names)).all()
+        values = {name: 0 for name in names}
+        values.update({name: value or 0 for name, value in rows})
+        return values
+
+    @staticmethod
+    def get_totals(db: Session) -> Dict[str, int]:
+        """Итоги: prompts, tags, projects, usage"""
+        if counters_supported(db.get_bind()):
+            return CounterService.get_values(db, ["prompts", "tags", "projects", "usage"])
+
+        totals = {
+            name: db.query(func.count(model.id)).scalar() or 0
+            for name, model in TOTAL_MODELS.items()
+        }
+        totals["usage"] = db.query(func.sum(Prompt.usage_count)).scalar() or 0
+        return totals
+
+    @staticmethod
+    def get_total(db: Session, name: str) -> int:
+        """Итог по одной таблице"""
+        return CounterService.get_totals(db)[name]
+
+    @staticmethod
+    def get_category_counts(db: Session) -> Dict[str, int]:
+        """Количество промптов по категориям (None - без категории)"""
+        if counters_supported(db.get_bind()):
+            rows = db.query(Counter.name, Counter.value).filter(
+                Counter.name.startswith(CATEGORY_PREFIX),
+                Counter.value > 0
+            ).all()
+            return {
+                (name[len(CATEGORY_PREFIX):] or None): value
+                for name, value in rows
+            }
+
+        rows = db.query(Prompt.category, func.count(Prompt.id)).group_by(Prompt.category).all()
+        return {category: count for category, count in rows}
+
+    @staticmethod
+    def get_tag_counts(db: Session, limit: int = 50) -> List[Tuple[Tag, int]]:
+        """Самые используемые теги с количеством промптов"""
+        if counters_supported(db.get_bind()):
+            tags = db.query(Tag).filter(Tag.usage_count > 0).order_by(
+                Tag.usage_count.desc(), Tag.name
+            ).limit(limit).all()
+            return [(tag, tag.usage_count) for tag in tags]
+
+        count = func.count(prompt_tags.c.prompt_id).label("count")
+        rows = db.query(Tag, count).join(prompt_tags, prompt_tags.c.tag_id == Tag.id).group_by(
+            Tag.id
+        ).order_by(count.desc(), Tag.name).limit(limit).all()
+        return [(tag, total) for tag, total in rows]
+
+    @staticmethod
+    def get_resource_etag(db: Session, resource: str) -> Optional[str]:
+        """
+        Слабый ETag ресурса: номера изменений его таблиц и последний updated_at.
+        None - номера изменений не ведутся (не SQLite).
+        """
+        if not counters_supported(db.get_bind()):
+            return None
+        tables, updated_column = RESOURCE_TABLES[resource]
+        versions = CounterService.get_values(db, [VERSION_PREFIX + table for table in tables])
+        tag = ".".join(str(versions[VERSION_PREFIX + table]) for table in tables)
+        if updated_column is not None:
+            latest = db.query(func.max(updated_column)).scalar()
+            tag += f"-{latest:%Y%m%d%H%M%S%f}" if latest else "-0"
+        return f'W/"{resource}-{tag}"'
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+Снимок аналитики для дашборда с кэшированием.
+
+Все агрегаты для /api/analytics/dashboard, /api/analytics/summary и /api/stats
+читаются из материализованных счётчиков, плюс запрос роста по индексу created_at
+и выборка топ-промптов по индексу usage_count. Снимок кэшируется до первой
+записи в prompts/tags/projects или до истечения TTL.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import case, event, func, select
+from sqlalchemy.orm import Session
+
+from app.db.models import Prompt, Tag, Project
+from app.services.counter_service import CounterService
+
+
+# Таблицы, изменения в которых делают снимок устаревшим
+TRACKED_TABLES = {"prompts", "tags", "projects", "prompt_tags"}
+TRACKED_MODELS = (Prompt, Tag, Project)
+
+SNAPSHOT_TTL_SECONDS = 30.0
+POPULAR_LIMIT = 10
+
+
+class DashboardService:
+    """Вычисляет и кэширует снимок аналитики"""
+
+    _lock = threading.Lock()
+    _snapshot: Optional[Dict] = None
+    _computed_at: float = 0.0
+    _generation: int = 0
+
+    @classmethod
+    def invalidate(cls):
+        """Сбросить кэшированный снимок"""
+        with cls._lock:
+            cls._snapshot = None
+            cls._generation += 1
+
+    @classmethod
+    def get_snapshot(cls, db: Session) -> Dict:
+        """Вернуть снимок из кэша или пересчитать его"""
+        with cls._lock:
+            snapshot = cls._snapshot
+            fresh = time.monotonic() - cls._computed_at < SNAPSHOT_TTL_SECONDS
+            generation = cls._generation
+        if snapshot is not None and fresh:
+            return snapshot
+
+        snapshot = cls.compute_snapshot(db)
+        with cls._lock:
+            # Не сохраняем снимок, если пока считали, его успели инвалидировать
+            if generation == cls._generation:
+                cls._snapshot = snapshot
+                cls._computed_at = time.monotonic()
+        return snapshot
+
+    @staticmethod
+    def compute_snapshot(db: Session, now: Optional[datetime] = None) -> Dict:
+        """Посчитать все агрегаты дашборда"""
+        now = now or datetime.utcnow()
+        week_ago = now - timedelta(days=7)
+        month_ago = now - timedelta(days=30)
+
+        # 1. Итоги и распределение по категориям из материализованных счётчиков
+        totals = CounterService.get_totals(db)
+        category_counts = CounterService.get_category_counts(db)
+
+        # 2. Рост одним запросом по диапазону индекса created_at
+        prompts_7d, prompts_30d = db.execute(
+            select(
+                func.sum(case((Prompt.created_at >= week_ago, 1), else_=0)),
+                func.count(Prompt.id),
+            ).where(Prompt.created_at >= month_ago)
+        ).one()
+
+        # 3. Топ по индексу usage_count
+        popular = db.execute(
+            select(Prompt.id, Prompt.title, Prompt.usage_count)
+            .order_by(Prompt.usage_count.desc())
+            .limit(POPULAR_LIMIT)
+        ).all()
+
+        return {
+            "totals": {
+                "prompts": totals["prompts"],
+                "projects": totals["projects"],
+                "tags": totals["tags"],
+                "categories": sum(1 for category in category_counts if category),
+                "usage": totals["usage"],
+            },
+            "growth": {
+                "prompts_7d": int(prompts_7d or 0),
+                "prompts_30d": int(prompts_30d or 0),
+            },
+            "popular_prompts": [
+                {"id": pid, "title": title, "usage_count": usage_count or 0}
+                for pid, title, usage_count in popular
+            ],
+            "category_distribution": [
+                {"category": category or "Uncategorized", "count": count}
+                for category, count in sorted(category_counts.items(), key=lambda item: item[0] or "")
+            ],
+            "computed_at": now.isoformat(),
+        }
+
+
+# ================ ИНВАЛИДАЦИЯ ПРИ ЗАПИСИ ================
+
+def _mark_if_tracked(session: Session, instances) -> None:
+    if any(isinstance(obj, TRACKED_MODELS) for obj in instances):
+        session.info["dashboard_dirty"] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session, flush_context):
+    _mark_if_tracked(session, session.new)
+    _mark_if_tracked(session, session.dirty)
+    _mark_if_tracked(session, session.deleted)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _on_orm_execute(orm_execute_state):
+    if orm_execute_state.is_select:
+        return
+    table = getattr(orm_execute_state.statement, "table", None)
+    if table is not None and table.name in TRACKED_TABLES:
+        orm_execute_state.session.info["dashboard_dirty"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    if session.info.pop("dashboard_dirty", False):
+        DashboardService.invalidate()
@@ -1,16 +1,30 @@
 import json
-from typing import List, Optional
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
-from app.db.models import Prompt, Tag, Project, ProcessEntry, Task
+from sqlalchemy import or_, and_, insert, case, func, select, update
+from app.db.models import Prompt, Tag, Project, ProcessEntry, Task, prompt_tags
 from app.models.schemas import (
     PromptCreate, PromptUpdate, TagCreate, AutoTagResult,
     ProjectCreate, ProjectUpdate, ProcessEntry as ProcessEntrySchema,
-    TaskEntry
+    TaskEntry, TaskUpdate, TaskMove, TaskStatusEnum
 )
-from app.utils.auto_tagger import AutoTagger
+from app.services.counter_service import CounterService
+from app.services.usage_service import UsageService
 
-auto_tagger = AutoTagger()
+_auto_tagger = None
+
+# Промптов на транзакцию при потоковом импорте
+IMPORT_BATCH_SIZE = 1000
+
+
+def get_auto_tagger():
+    """AutoTagger создаётся при первом использовании, а не при импорте"""
+    global _auto_tagger
+    if _auto_tagger is None:
+        from app.utils.auto_tagger import AutoTagger
+        _auto_tagger = AutoTagger()
+    return _auto_tagger
 
 
 class PromptService:
@@ -37,6 +51,91 @@ class PromptService:
         db.refresh(db_prompt)
         return db_prompt
     
+    @staticmethod
+    def bulk_create_prompts(
+        db: Session,
+        prompts: List[PromptCreate],
+        imported_from: Optional[str] = None
+    ) -> List[int]:
+        """
+        Создать пачку промптов одним executemany (без коммита - транзакцией
+        управляет вызывающий). Теги всей пачки читаются одним запросом.
+        
+        Returns:
+            id созданных промптов в порядке prompts
+        """
+        if not prompts:
+            return []
+        
+        tag_ids = {tag_id for prompt in prompts for tag_id in (prompt.tag_ids or [])}
+        known_tags = set()
+        if tag_ids:
+            known_tags = {tag_id for (tag_id,) in db.query(Tag.id).filter(Tag.id.in_(tag_ids))}
+        
+        prompt_ids = db.scalars(
+            insert(Prompt).returning(Prompt.id, sort_by_parameter_order=True),
+            [
+                {
+                    'title': prompt.title,
+                    'content': prompt.content,
+                    'description': prompt.description,
+                    'category': prompt.category.value,
+                    'version': prompt.version,
+                    'imported_from': imported_from,
+                }
+                for prompt in prompts
+            ]
+        ).all()
+        
+        links = [
+            {'prompt_id': prompt_id, 'tag_id': tag_id}
+            for prompt_id, prompt in zip(prompt_ids, prompts)
+            for tag_id in dict.fromkeys(prompt.tag_ids or [])
+            if tag_id in known_tags
+        ]
+        if links:
+            db.execute(prompt_tags.insert(), links)
+        return prompt_ids
+    
+    @staticmethod
+    def import_prompts_stream(
+        db: Session,
+        prompts: Iterable[Optional[PromptCreate]],
+        imported_from: Optional[str] = None,
+        counts: Optional[Dict[str, int]] = None,
+        on_batch: Optional[Callable[[Dict[str, int]], bool]] = None,
+        batch_size: int = IMPORT_BATCH_SIZE
+    ) -> Dict[str, int]:
+        """
+        Импортировать поток промптов пачками, коммит после каждой пачки.
+        None в потоке - невалидный элемент (считается пропущенным).
+        
+        counts обновляется по ходу импорта, поэтому после исключения в нём
+        видно, сколько уже записано. on_batch вызывается после каждой пачки;
+        если он вернул False, импорт останавливается.
+        """
+        counts = counts if counts is not None else {}
+        counts.setdefault('imported', 0)
+        counts.setdefault('skipped', 0)
+        batch = []
+        
+        def flush() -> bool:
+            PromptService.bulk_create_prompts(db, batch, imported_from=imported_from)
+            db.commit()
+            counts['imported'] += len(batch)
+            batch.clear()
+            return on_batch(counts) is not False if on_batch else True
+        
+        for prompt in prompts:
+            if prompt is None:
+                counts['skipped'] += 1
+                continue
+            batch.append(prompt)
+            if len(batch) >= batch_size and not flush():
+                return counts
+        flush()
+        return counts
+    
     @staticmethod
     def get_prompt(db: Session, prompt_id: int) -> Optional[Prompt]:
         """Получить промпт по ID"""
@@ -48,17 +147,9 @@ class PromptService:
         return db.query(Prompt).offset(skip).limit(limit).all()
     
     @staticmethod
-    def search_prompts(
-        db: Session,
-        query: str,
-        category: Optional[str] = None,
-        tags: Optional[List[str]] = None,
-        skip: int = 0,
-        limit: int = 100
-    ) -> tuple[int, List[Prompt]]:
-        """Поиск промптов"""
-        q = db.query(Prompt)
-        
+    def apply_filters(q, query: Optional[str] = None, category: Optional[str] = None,
+                      tags: Optional[List[str]] = None):
+        """Фильтры поиска (текст, категория, теги) для запроса по Prompt"""
         # Поиск по заголовку и содержимому
         if query:
             q = q.filter(or_(
@@ -75,6 +166,20 @@ class PromptService:
         if tags:
             q = q.join(Prompt.tags).filter(Tag.name.in_(tags)).distinct()
         
+        return q
+    
+    @staticmethod
+    def search_prompts(
+        db: Session,
+        query: str,
+        category: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        skip: int = 0,
+        limit: int = 100
+    ) -> tuple[int, List[Prompt]]:
+        """Поиск промптов"""
+        q = PromptService.apply_filters(db.query(Prompt), query, category, tags)
+        
         total = q.count()
         results = q.offset(skip).limit(limit).all()
         
@@ -116,10 +221,11 @@ class PromptService:
     
     @staticmethod
     def increment_usage(db: Session, prompt_id: int):
-        """Увеличить счётчик использования"""
+        """Увеличить счётчик использования и записать событие в журнал"""
         db_prompt = db.query(Prompt).filter(Prompt.id == prompt_id).first()
         if db_prompt:
-            db_prompt.usage_count += 1
+            db_prompt.usage_count = (db_prompt.usage_count or 0) + 1
+            db_prompt.last_used_at = UsageService.record_use(db, prompt_id)
             db.commit()
 
 
@@ -140,6 +246,23 @@ class TagService:
         """Получить все теги"""
         return db.query(Tag).order_by(Tag.usage_count.desc()).all()
     
+    @staticmethod
+    def get_tag_cloud(db: Session, limit: int = 50) -> List[dict]:
+        """Облако тегов: топ-N по количеству промптов с относительным весом"""
+        tag_counts = CounterService.get_tag_counts(db, limit)
+        max_count = max((count for _, count in tag_counts), default=0)
+        
+        return [
+            {
+                "id": tag.id,
+                "name": tag.name,
+                "color": tag.color,
+                "count": count,
+                "weight": round(count / max_count, 3) if max_count else 0.0
+            }
+            for tag, count in tag_counts
+        ]
+    
     @staticmethod
     def get_tag(db: Session, tag_id: int) -> Optional[Tag]:
         """Получить тег по ID"""
@@ -173,7 +296,7 @@ class AutoTaggingService:
             return None
         
         # Получаем предложенные теги и категорию
-        suggested = auto_tagger.tag_prompt(db_prompt.title, db_prompt.content)
+        suggested = get_auto_tagger().tag_prompt(db_prompt.title, db_prompt.content)
         
         result = AutoTagResult(
             prompt_id=prompt_id,
@@ -211,6 +334,89 @@ class ProjectService:
         """Получить все проекты"""
         return db.query(Project).order_by(Project.updated_at.desc()).all()
     
+    @staticmethod
+    def list_project_summaries(db: Session, project_id: Optional[int] = None) -> List[Dict]:
+        """
+        Проекты со счётчиками записей/задач и последней записью процесса -
+        одним запросом с агрегирующими подзапросами, без загрузки связей
+        """
+        entries = select(
+            ProcessEntry.project_id,
+            func.count(ProcessEntry.id).label("count"),
+            func.max(ProcessEntry.id).label("latest_id"),
+        ).group_by(ProcessEntry.project_id).subquery()
+        tasks = select(
+            Task.project_id,
+            func.count(Task.id).label("count"),
+            func.sum(case((Task.status == "done", 1), else_=0)).label("done"),
+        ).group_by(Task.project_id).subquery()
+        
+        q = db.query(
+            Project.id, Project.name, Project.description, Project.status,
+            Project.created_at, Project.updated_at,
+            func.coalesce(entries.c.count, 0).label("process_entries_count"),
+            func.coalesce(tasks.c.count, 0).label("tasks_count"),
+            func.coalesce(tasks.c.done, 0).label("tasks_done_count"),
+            ProcessEntry.id.label("latest_id"), ProcessEntry.entry.label("latest_entry"),
+            ProcessEntry.created_at.label("latest_created_at"),
+        ).outerjoin(entries, entries.c.project_id == Project.id) \
+         .outerjoin(tasks, tasks.c.project_id == Project.id) \
+         .outerjoin(ProcessEntry, ProcessEntry.id == entries.c.latest_id)
+        if project_id is not None:
+            q = q.filter(Project.id == project_id)
+        
+        projects = []
+        for row in q.order_by(Project.updated_at.desc()):
+            data = row._asdict()
+            latest_id = data.pop("latest_id")
+            latest_entry = data.pop("latest_entry")
+            latest_created_at = data.pop("latest_created_at")
+            data["latest_entry"] = {
+                "id": latest_id,
+                "project_id": data["id"],
+                "entry": latest_entry,
+                "created_at": latest_created_at,
+            } if latest_id is not None else None
+            projects.append(data)
+        return projects
+    
+    @staticmethod
+    def get_project_detail(db: Session, project_id: int, limit: int = 50,
+                           entries_cursor: Optional[int] = None,
+                           tasks_cursor: Optional[int] = None) -> Optional[Dict]:
+        """
+        Проект с одной страницей записей процесса (новые первыми) и задач.
+        Курсор - id последнего элемента предыдущей страницы.
+        """
+        summaries = ProjectService.list_project_summaries(db, project_id)
+        if not summaries:
+            return None
+        project = summaries[0]
+        project["process_entries"], project["process_entries_next_cursor"] = \
+            ProjectService.page_process_entries(db, project_id, entries_cursor, limit)
+        project["tasks"], project["tasks_next_cursor"] = \
+            ProjectService.page_tasks(db, project_id, tasks_cursor, limit)
+        return project
+    
+    @staticmethod
+    def page_process_entries(db: Session, project_id: int, cursor: Optional[int],
+                             limit: int) -> tuple:
+        """Страница записей процесса (id по убыванию) и курсор следующей"""
+        q = db.query(ProcessEntry).filter(ProcessEntry.project_id == project_id)
+        if cursor is not None:
+            q = q.filter(ProcessEntry.id < cursor)
+        items = q.order_by(ProcessEntry.id.desc()).limit(limit + 1).all()
+        return items[:limit], (items[limit - 1].id if len(items) > limit else None)
+    
+    @staticmethod
+    def page_tasks(db: Session, project_id: int, cursor: Optional[int], limit: int) -> tuple:
+        """Страница задач (id по возрастанию) и курсор следующей"""
+        q = db.query(Task).filter(Task.project_id == project_id)
+        if cursor is not None:
+            q = q.filter(Task.id > cursor)
+        items = q.order_by(Task.id).limit(limit + 1).all()
+        return items[:limit], (items[limit - 1].id if len(items) > limit else None)
+    
     @staticmethod
     def update_project(db: Session, project_id: int, project_update: ProjectUpdate) -> Optional[Project]:
         """Обновить проект"""
@@ -239,11 +445,39 @@ class ProjectService:
         return True
     
     @staticmethod
-    def add_process_entry(db: Session, project_id: int, entry: str) -> ProcessEntry:
-        """Добавить запись в процесс"""
+    def add_process_entry(db: Session, project_id: int, entry: str,
+                          project_name: Optional[str] = None) -> ProcessEntry:
+        """
+        Добавить запись в процесс.
+        С project_name запись дописывается и в process.txt проекта (O_APPEND)
+        вместе с записями БД, которых там ещё нет; если коммит не удался,
+        файл откатывается к прежнему размеру.
+        """
         db_entry = ProcessEntry(project_id=project_id, entry=entry)
         db.add(db_entry)
-        db.commit()
+        if project_name is None:
+            db.commit()
+            db.refresh(db_entry)
+            return db_entry
+
+        from app.services.file_service import file_service
+
+        db.flush()
+        try:
+            last_id = file_service.last_process_entry_id(project_id, project_name)
+            missing = db.query(ProcessEntry.id, ProcessEntry.entry, ProcessEntry.created_at).filter(
+                ProcessEntry.project_id == project_id, ProcessEntry.id > last_id
+            ).all()
+            size = file_service.append_process_entries(project_id, project_name, missing)
+        except Exception:
+            db.rollback()
+            raise
+        try:
+            db.commit()
+        except Exception:
+            db.rollback()
+            file_service.truncate_process_log(project_id, project_name, size, last_id)
+            raise
         db.refresh(db_entry)
         return db_entry
     
@@ -264,17 +498,54 @@ class ProjectService:
         return db_task
     
     @staticmethod
-    def update_task(db: Session, task_id: int, task_update: dict) -> Optional[Task]:
+    def update_task(db: Session, task_id: int, task_update: TaskUpdate) -> Optional[Task]:
         """Обновить задачу"""
         db_task = db.query(Task).filter(Task.id == task_id).first()
         if not db_task:
             return None
         
-        for field, value in task_update.items():
-            if value is not None:
-                setattr(db_task, field, value)
+        for field, value in task_update.model_dump(exclude_none=True, mode="json").items():
+            setattr(db_task, field, value)
         
         db.add(db_task)
         db.commit()
         db.refresh(db_task)
         return db_task
+    
+    @staticmethod
+    def update_tasks(db: Session, moves: List[TaskMove]) -> List[int]:
+        """
+        Применить перемещения задач одной транзакцией (UPDATE по первичному
+        ключу пачкой). Если хотя бы одной задачи нет - KeyError, ничего не меняется.
+        Повторы id: действует последнее перемещение.
+        """
+        changes: Dict[int, Dict] = {}
+        for move in moves:
+            changes.setdefault(move.id, {}).update(
+                move.model_dump(exclude={"id"}, exclude_none=True, mode="json")
+            )
+        
+        found = {row[0] for row in db.query(Task.id).filter(Task.id.in_(changes))}
+        missing = sorted(set(changes) - found)
+        if missing:
+            raise KeyError(missing)
+        
+        now = datetime.utcnow()
+        rows = [{"id": task_id, **fields, "updated_at": now} for task_id, fields in changes.items() if fields]
+        if rows:
+            db.execute(update(Task), rows)
+        db.commit()
+        return list(changes)
+    
+    @staticmethod
+    def get_board(db: Session, project_id: int) -> Dict[str, List[Task]]:
+        """Задачи проекта, сгруппированные по статусу (один запрос)"""
+        priority_order = case(
+            (Task.priority == "high", 0), (Task.priority == "medium", 1), (Task.priority == "low", 2),
+            else_=3
+        )
+        columns: Dict[str, List[Task]] = {status.value: [] for status in TaskStatusEnum}
+        tasks = db.query(Task).filter(Task.project_id == project_id).order_by(priority_order, Task.id)
+        for task in tasks:
+            columns.setdefault(task.status or TaskStatusEnum.TODO.value, []).append(task)
+        return columns
@@ -5,166 +5,439 @@
 
 import os
 import json
+import threading
+from collections import Counter
+from datetime import datetime
 from pathlib import Path
-from typing import Optional
-from sqlalchemy import inspect
+from typing import Callable, Dict, List, NamedTuple, Optional
+from sqlalchemy import delete, func, insert, update
 from sqlalchemy.orm import Session
 
-from app.db.models import Prompt, Tag, Base
-from app.db.database import engine
-from app.services.references_importer import ReferencesImporter
+from app.db.models import Prompt, Tag, prompt_tags
+from app.services.references_importer import ReferencesScan
+from app.services.startup_status import (
+    StartupStatus, PHASE_MIGRATING, PHASE_IMPORTING
+)
+
+# Размер пачки путей в IN (...) при обновлении манифеста
+MANIFEST_CHUNK = 500
+# Промптов на одну транзакцию bulk-импорта
+BULK_CHUNK = 5000
+
+
+class ImportResult(NamedTuple):
+    """Итог импорта промптов references"""
+    imported: Dict[str, int]  # source_path -> id промпта (для манифеста)
+    added: int = 0
+    updated: int = 0
+    skipped: int = 0
+    deleted: int = 0
+
+
+class ReferencesSync(NamedTuple):
+    """Итог синхронизации references: скан и импорт"""
+    scan: ReferencesScan
+    result: ImportResult
 
 
 class DatabaseInitializer:
     """Инициализирует БД и импортирует все промпты"""
     
+    # Стартовая синхронизация, watcher и фоновые задачи не пишут references одновременно
+    _sync_lock = threading.Lock()
+    
     @staticmethod
     def init_db():
         """Инициализирует БД и создает таблицы если их нет"""
         print("[DB] Initializing database...")
+        StartupStatus.set_phase(PHASE_MIGRATING)
+        
+        # Создаём таблицы и применяем недостающие миграции (на актуальной
+        # схеме это один запрос к schema_version)
+        from app.db import engine
+        from app.db.migrations import run_migrations
+        run_migrations(engine)
+        
+        # Схема готова: API может работать, пока идёт импорт
+        StartupStatus.mark_schema_ready()
+        
+        # Проверяем, пустая ли БД
+        from app.db import SessionLocal
+        from app.services.counter_service import CounterService
+        db = SessionLocal()
+        try:
+            prompt_count = CounterService.get_total(db, 'prompts')
+        finally:
+            db.close()
         
-        # Создаем таблицы если их нет (БД ПЕРВЫЙ РАЗ)
-        Base.metadata.create_all(bind=engine)
+        if prompt_count > 0:
+            print(f"[DB] Database already initialized ({prompt_count} prompts), checking references...")
+        else:
+            # Попытка скопировать предсозданную базу данных, если она присутствует
+            try:
+                from app.db.database import _attempt_copy_prebuilt_db, db_path as target_db
+                if target_db is not None and not target_db.exists():
+                    copied = False
+                    try:
+                        copied = _attempt_copy_prebuilt_db(target_db)
+                    except Exception as e:
+                        print(f"[DB] Error during prebuilt DB copy attempt: {e}")
+
+                    if copied:
+                        print("[DB] Prebuilt database copied, skipping import.")
+                        return
+            except Exception:
+                # Если импорт не удался или функции нет, продолжаем как обычно
+                pass
+
+            print("[DB] Starting import from references...")
         
-        # ПОТОМ выполняем миграции для существующих БД (добавляем новые колонки)
+        StartupStatus.set_phase(PHASE_IMPORTING)
         try:
-            from app.db.migrations import migrate_database
-            migrate_database()
+            DatabaseInitializer.sync_references()
         except Exception as e:
-            print(f"[DB] Migration warning: {e}")
+            # Схема готова и API работает; файлы не попали в манифест и будут
+            # перечитаны следующей синхронизацией
+            print(f"[DB ERROR] References sync failed: {e}")
+    
+    @staticmethod
+    def start_background() -> threading.Thread:
+        """Запустить init_db в фоновом потоке, не блокируя event loop"""
+        def run():
+            try:
+                DatabaseInitializer.init_db()
+                StartupStatus.mark_ready()
+            except Exception as e:
+                print(f"[DB ERROR] Initialization failed: {e}")
+                StartupStatus.mark_failed(str(e))
         
-        # Проверяем, пустая ли БД
-        inspector = inspect(engine)
-        tables = inspector.get_table_names()
+        thread = threading.Thread(target=run, name="pandora-db-init", daemon=True)
+        thread.start()
+        return thread
+    
+    @staticmethod
+    def sync_references(
+        scan_progress: Optional[Callable[[int, Optional[int]], None]] = None,
+        import_progress: Optional[Callable[[int, Optional[int]], None]] = None,
+        cancelled: Optional[Callable[[], bool]] = None,
+        paths: Optional[List[Path]] = None
+    ):
+        """
+        Инкрементально синхронизировать references с БД.
         
-        if 'prompts' in tables:
-            from app.db.database import SessionLocal
-            db = SessionLocal()
-            prompt_count = db.query(Prompt).count()
+        Манифест reference_files (path, size, mtime, hash) позволяет читать
+        только новые и изменённые файлы; изменённый файл обновляет свои
+        промпты (Prompt.source_path), промпты удалённых файлов удаляются.
+        
+        По умолчанию прогресс идёт в StartupStatus; фоновые задачи импорта
+        передают свои callbacks. С paths (события watcher) обходятся и
+        сверяются с манифестом только эти файлы/папки. Синхронизации идут
+        по одной (_sync_lock). Returns: ReferencesSync
+        """
+        with DatabaseInitializer._sync_lock:
+            return DatabaseInitializer._sync_references(scan_progress, import_progress, cancelled, paths)
+    
+    @staticmethod
+    def _sync_references(scan_progress, import_progress, cancelled, paths):
+        from sqlalchemy import or_
+        from app.db import SessionLocal
+        from app.db.models import ReferenceFile
+        from app.services.references_importer import ReferencesImporter
+        
+        db = SessionLocal()
+        try:
+            manifest = {}
+            prompt_ids = {}
+            # id только живых промптов: манифест старой БД мог ссылаться на удалённые
+            rows = db.query(
+                ReferenceFile.path, ReferenceFile.size, ReferenceFile.mtime,
+                ReferenceFile.content_hash, Prompt.id
+            ).outerjoin(Prompt, Prompt.id == ReferenceFile.prompt_id)
+            if paths is not None:
+                references_dir = ReferencesImporter.find_references_dir()
+                rel_paths = []
+                for path in paths:
+                    try:
+                        rel_paths.append(path.relative_to(references_dir).as_posix())
+                    except (TypeError, ValueError):
+                        continue
+                if not rel_paths:
+                    return ReferencesSync(ReferencesImporter.scan_paths([], {}), ImportResult({}))
+                rows = rows.filter(or_(
+                    ReferenceFile.path.in_(rel_paths),
+                    *[ReferenceFile.path.startswith(rel + '/', autoescape=True) for rel in rel_paths]
+                ))
+            for path, size, mtime, content_hash, prompt_id in rows:
+                manifest[path] = (size, mtime, content_hash)
+                prompt_ids[path] = prompt_id
+        finally:
             db.close()
-            
-            if prompt_count > 0:
-                print(f"[DB] Database already initialized ({prompt_count} prompts)")
-                return
-
-        # Попытка скопировать предсозданную базу данных, если она присутствует
+        
+        if paths is not None:
+            scan = ReferencesImporter.scan_paths(paths, manifest, progress=scan_progress)
+        else:
+            scan = ReferencesImporter.scan_references(
+                manifest, progress=scan_progress or StartupStatus.set_progress
+            )
+        if not scan.files and not scan.removed:
+            print(f"[DB] References are up to date ({scan.unchanged} files)")
+            return ReferencesSync(scan, ImportResult({}))
+        
+        # Промпты изменённых и удалённых файлов сверяются по source_path
+        replace_paths = [record['path'] for record in scan.files if record['content_changed']] + scan.removed
+        result = ImportResult({})
+        if scan.prompts or replace_paths:
+            result = DatabaseInitializer.import_references_prompts(
+                scan.prompts, progress=import_progress, cancelled=cancelled, replace_paths=replace_paths
+            )
+        # Прерванный импорт манифест не трогает: следующая синхронизация
+        # перечитает эти файлы, а уже записанные промпты найдёт по source_path
+        if cancelled and cancelled():
+            print("[DB] References sync cancelled, manifest not updated")
+            return ReferencesSync(scan, result)
+        DatabaseInitializer._save_manifest(scan, result.imported, prompt_ids)
+        return ReferencesSync(scan, result)
+    
+    @staticmethod
+    def _save_manifest(scan, imported: Dict[str, int], prompt_ids: Dict[str, Optional[int]]):
+        """Записать манифест для новых/изменённых файлов и убрать удалённые"""
+        from app.db import SessionLocal
+        from app.db.models import ReferenceFile
+        
+        now = datetime.utcnow()
+        rows = [
+            {
+                'path': record['path'],
+                'size': record['size'],
+                'mtime': record['mtime'],
+                'content_hash': record['content_hash'],
+                'is_prompt': record['is_prompt'],
+                'prompt_id': imported.get(record['path']) if record['content_changed'] else prompt_ids.get(record['path']),
+                'imported_at': now,
+            }
+            for record in scan.files
+        ]
+        stale = [record['path'] for record in scan.files if record['path'] in prompt_ids] + scan.removed
+        
+        db = SessionLocal()
         try:
-            from app.db.database import _attempt_copy_prebuilt_db, DATA_DIR
-            target_db = DATA_DIR / 'pandora.db'
-            if not target_db.exists():
-                copied = False
-                try:
-                    copied = _attempt_copy_prebuilt_db(target_db)
-                except Exception as e:
-                    print(f"[DB] Error during prebuilt DB copy attempt: {e}")
-
-                if copied:
-                    print("[DB] Prebuilt database copied, skipping import.")
-                    return
-        except Exception:
-            # Если импорт не удался или функции нет, продолжаем как обычно
-            pass
-
-        print("[DB] Starting import from references...")
-        DatabaseInitializer.import_references_prompts()
+            for start in range(0, len(stale), MANIFEST_CHUNK):
+                chunk = stale[start:start + MANIFEST_CHUNK]
+                db.query(ReferenceFile).filter(ReferenceFile.path.in_(chunk)).delete(synchronize_session=False)
+            if rows:
+                db.execute(ReferenceFile.__table__.insert(), rows)
+            db.commit()
+            print(f"[DB] Manifest updated: {len(rows)} files, {len(scan.removed)} removed")
+        except Exception as e:
+            db.rollback()
+            print(f"[DB ERROR] Manifest update failed: {e}")
+            raise
+        finally:
+            db.close()
     
     @staticmethod
-    def import_references_prompts():
-        """Импортирует все промпты из references в БД"""
-        from app.db.database import SessionLocal
+    def import_references_prompts(
+        prompts_data: Optional[List[Dict]] = None,
+        progress: Optional[Callable[[int, Optional[int]], None]] = None,
+        cancelled: Optional[Callable[[], bool]] = None,
+        replace_paths: Optional[List[str]] = None
+    ) -> ImportResult:
+        """
+        Импортирует промпты из references в БД.
+        
+        Промпт привязан к своему файлу (source_path): повторный импорт файла
+        обновляет его промпты. Промпты файлов из replace_paths (изменённых
+        и удалённых), которых нет в prompts_data, удаляются.
+        
+        Returns:
+            ImportResult: source_path -> id промпта (для манифеста) и счётчики
         
-        # Получаем все промпты из references
-        prompts_data, stats = ReferencesImporter.import_all_references()
+        Ошибка откатывает текущую пачку и пробрасывается дальше.
+        """
+        from app.db import SessionLocal
         
-        if not prompts_data:
+        if prompts_data is None:
+            # Полный импорт без манифеста
+            from app.services.references_importer import ReferencesImporter
+            prompts_data, stats = ReferencesImporter.import_all_references()
+        
+        replace_paths = list(replace_paths or [])
+        if not prompts_data and not replace_paths:
             print("[DB] Failed to import prompts")
-            return
+            return ImportResult({})
         
-        # Сохраняем в БД
+        # Сохраняем в БД: существующие ключи и теги читаются одним запросом
+        # каждый, строки вставляются executemany пачками по BULK_CHUNK
         db = SessionLocal()
+        imported = {}
         try:
+            # Промпты импортируемых файлов: source_path -> {title: id}
+            sources = sorted(set(replace_paths) | {p['source_path'] for p in prompts_data if p.get('source_path')})
+            by_file = {}
+            stale_ids = []
+            for path_start in range(0, len(sources), MANIFEST_CHUNK):
+                rows = db.query(Prompt.id, Prompt.source_path, Prompt.title).filter(
+                    Prompt.source_path.in_(sources[path_start:path_start + MANIFEST_CHUNK])
+                )
+                for prompt_id, source_path, title in rows:
+                    titles = by_file.setdefault(source_path, {})
+                    if title in titles:
+                        stale_ids.append(prompt_id)
+                    else:
+                        titles[title] = prompt_id
+            per_file = Counter(p.get('source_path') for p in prompts_data)
+            
+            existing_keys = {
+                (title, imported_from): (prompt_id, source_path)
+                for prompt_id, title, imported_from, source_path
+                in db.query(Prompt.id, Prompt.title, Prompt.imported_from, Prompt.source_path)
+            }
+            tag_ids = {name: tag_id for tag_id, name in db.query(Tag.id, Tag.name)}
+            
             added = 0
+            updated = 0
             skipped = 0
+            deleted = 0
+            progress = progress or StartupStatus.set_progress
+            progress(0, len(prompts_data))
             
-            for prompt_data in prompts_data:
-                # Проверяем, есть ли уже такой промпт
-                existing = db.query(Prompt).filter(
-                    Prompt.title == prompt_data['title'],
-                    Prompt.imported_from == prompt_data.get('imported_from', '')
-                ).first()
-                
-                if existing:
-                    skipped += 1
-                    continue
+            for start in range(0, len(prompts_data), BULK_CHUNK):
+                if cancelled and cancelled():
+                    print(f"[DB] Import cancelled after {start} prompts")
+                    break
+                chunk = prompts_data[start:start + BULK_CHUNK]
+                new_rows = []
+                new_tags = []
+                new_paths = []
+                updates = []
                 
-                # Создаем теги если их нет
-                tags = []
-                for tag_name in prompt_data.get('tags', []):
-                    if tag_name:
-                        tag = db.query(Tag).filter(Tag.name == tag_name).first()
-                        if not tag:
-                            tag = Tag(name=tag_name)
-                            db.add(tag)
-                            db.flush()
-                        tags.append(tag)
+                for prompt_data in chunk:
+                    source_path = prompt_data.get('source_path')
+                    row = {
+                        'title': prompt_data['title'][:255],
+                        'content': prompt_data['content'],
+                        'description': prompt_data.get('description', '')[:500],
+                        'category': prompt_data.get('category', 'development'),
+                        'imported_from': prompt_data.get('imported_from', 'references'),
+                        'source_path': source_path,
+                    }
+                    key = (prompt_data['title'], row['imported_from'])
+                    
+                    # Промпт этого файла: тот же заголовок или единственный промпт файла
+                    titles = by_file.get(source_path, {})
+                    prompt_id = titles.pop(row['title'], None)
+                    if prompt_id is None and per_file[source_path] == 1 and len(titles) == 1:
+                        prompt_id = titles.popitem()[1]
+                    
+                    # Промпт, импортированный до привязки к файлам, принимаем по ключу
+                    known_id, known_path = existing_keys.get(key, (None, None))
+                    if prompt_id is None and source_path and known_id and known_path is None:
+                        prompt_id = known_id
+                        existing_keys[key] = (prompt_id, source_path)
+                    
+                    if prompt_id is not None:
+                        updates.append({'id': prompt_id, **row})
+                        imported[source_path] = prompt_id
+                        continue
+                    
+                    # Без файла дубль по ключу пропускаем (в БД или выше в этом импорте)
+                    if not source_path and key in existing_keys:
+                        skipped += 1
+                        continue
+                    existing_keys.setdefault(key, (None, source_path))
+                    
+                    new_rows.append(row)
+                    new_paths.append((key, source_path))
+                    new_tags.append([name for name in dict.fromkeys(prompt_data.get('tags', [])) if name])
                 
-                # Создаем промпт
-                prompt = Prompt(
-                    title=prompt_data['title'][:255],
-                    content=prompt_data['content'],
-                    description=prompt_data.get('description', '')[:500],
-                    category=prompt_data.get('category', 'development'),
-                    imported_from=prompt_data.get('imported_from', 'references'),
-                    tags=tags
-                )
+                if updates:
+                    db.execute(update(Prompt), updates)
+                    updated += len(updates)
                 
-                db.add(prompt)
-                added += 1
+                if new_rows:
+                    # Недостающие теги одним executemany
+                    missing = sorted({name for names in new_tags for name in names} - tag_ids.keys())
+                    if missing:
+                        created = db.execute(
+                            insert(Tag).returning(Tag.id, Tag.name, sort_by_parameter_order=True),
+                            [{'name': name} for name in missing]
+                        )
+                        tag_ids.update({name: tag_id for tag_id, name in created})
+                    
+                    prompt_ids = db.scalars(
+                        insert(Prompt).returning(Prompt.id, sort_by_parameter_order=True),
+                        new_rows
+                    ).all()
+                    
+                    links = [
+                        {'prompt_id': prompt_id, 'tag_id': tag_ids[name]}
+                        for prompt_id, names in zip(prompt_ids, new_tags)
+                        for name in names
+                    ]
+                    if links:
+                        db.execute(prompt_tags.insert(), links)
+                    
+                    for prompt_id, (key, source_path) in zip(prompt_ids, new_paths):
+                        if existing_keys[key][0] is None:
+                            existing_keys[key] = (prompt_id, source_path)
+                        if source_path:
+                            imported[source_path] = prompt_id
+                    added += len(new_rows)
                 
-                # Коммитим батчами для производительности
-                if added % 50 == 0:
-                    db.commit()
-                    print(f"  [DB] Added {added} prompts...")
-            
-            # Финальный коммит
-            db.commit()
+                db.commit()
+                progress(start + len(chunk))
+                if len(prompts_data) > BULK_CHUNK:
+                    print(f"  [DB] Processed {start + len(chunk)}/{len(prompts_data)} prompts...")
+            else:
+                # Промпты, которых больше нет в своих файлах (или файл удалён)
+                stale_ids += [prompt_id for titles in by_file.values() for prompt_id in titles.values()]
+                for id_start in range(0, len(stale_ids), MANIFEST_CHUNK):
+                    ids = stale_ids[id_start:id_start + MANIFEST_CHUNK]
+                    db.execute(delete(prompt_tags).where(prompt_tags.c.prompt_id.in_(ids)))
+                    db.execute(delete(Prompt).where(Prompt.id.in_(ids)))
+                deleted = len(stale_ids)
+                db.commit()
             
             print(f"\n[DB] Import completed!")
             print(f"   Added: {added}")
+            print(f"   Updated: {updated}")
             print(f"   Skipped: {skipped}")
+            print(f"   Deleted: {deleted}")
             
             # Выводим статистику по категориям
-            category_stats = {}
-            prompts = db.query(Prompt).all()
-            for prompt in prompts:
-                category_stats[prompt.category] = category_stats.get(prompt.category, 0) + 1
+            category_stats = db.query(Prompt.category, func.count(Prompt.id)).group_by(Prompt.category).all()
             
             print(f"\n[DB] Statistics by category:")
-            for category in sorted(category_stats.keys()):
-                count = category_stats[category]
-                print(f"   {category:20} {count:4} prompts")
+            for category, count in sorted(category_stats, key=lambda item: item[0] or ''):
+                print(f"   {category or '-':20} {count:4} prompts")
         
         except Exception as e:
+            # Манифест не пишется: файлы этой синхронизации будут прочитаны снова
             db.rollback()
             print(f"[DB ERROR] Import failed: {e}")
+            raise
         finally:
             db.close()
+        
+        return ImportResult(imported, added, updated, skipped, deleted)
     
     @staticmethod
     def clear_and_reimport():
         """Очищает БД и заново импортирует промпты"""
-        from app.db.database import SessionLocal
+        from app.db import SessionLocal
         
         print("[DB] Clearing database...")
         db = SessionLocal()
         
         try:
+            from app.db.models import ReferenceFile
+            db.query(ReferenceFile).delete()
             db.query(Prompt).delete()
             db.query(Tag).delete()
             db.commit()
             print("[DB] Database cleared")
             
-            DatabaseInitializer.import_references_prompts()
+            DatabaseInitializer.sync_references()
         except Exception as e:
             db.rollback()
             print(f"[DB ERROR] Clear failed: {e}")
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+Потоковый экспорт библиотеки промптов.
+
+Строки читаются с сервера пачками (yield_per), теги пачки - одним запросом,
+результат отдаётся генератором для StreamingResponse. Первые байты уходят
+сразу; для NDJSON память не зависит от размера библиотеки.
+
+Форматы:
+    ndjson - по JSON-объекту на строку (читается обратно /api/import/json)
+    zip    - архив с файлом на промпт (<category>/<id>_<title>.txt|.json);
+             zipfile держит до конца записи каталог архива (~0.4 КБ на файл)
+"""
+
+import io
+import json
+import zipfile
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import select
+
+from app.db.models import Prompt, Tag, prompt_tags
+from app.services.database import PromptService
+from app.services.file_service import FileService
+
+
+# Строк на одну пачку чтения из БД
+EXPORT_CHUNK = 1000
+
+EXPORT_COLUMNS = (
+    Prompt.id, Prompt.title, Prompt.content, Prompt.description, Prompt.category,
+    Prompt.subcategory, Prompt.version, Prompt.difficulty, Prompt.author,
+    Prompt.imported_from, Prompt.usage_count, Prompt.rating,
+    Prompt.created_at, Prompt.updated_at,
+)
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "zip": "application/zip",
+}
+
+
+class _StreamBuffer(io.RawIOBase):
+    """Несикабельный буфер для zipfile: записанное забирается через pop()"""
+
+    def __init__(self):
+        self._data = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._data += data
+        return len(data)
+
+    def pop(self) -> bytes:
+        data = bytes(self._data)
+        self._data.clear()
+        return data
+
+
+class ExportService:
+    """Экспорт промптов в NDJSON/ZIP"""
+
+    @staticmethod
+    def iter_rows(db, query: Optional[str] = None, category: Optional[str] = None,
+                  tags: Optional[List[str]] = None) -> Iterator[List[Dict]]:
+        """Пачки промптов (словари с тегами) в порядке id"""
+        q = db.query(*EXPORT_COLUMNS)
+        q = PromptService.apply_filters(q, query, category, tags)
+        q = q.order_by(Prompt.id).yield_per(EXPORT_CHUNK)
+
+        chunk = []
+        for row in q:
+            chunk.append(row._asdict())
+            if len(chunk) >= EXPORT_CHUNK:
+                yield ExportService.attach_tags(db, chunk)
+                chunk = []
+        if chunk:
+            yield ExportService.attach_tags(db, chunk)
+
+    @staticmethod
+    def attach_tags(db, chunk: List[Dict]) -> List[Dict]:
+        """Добавить к строкам пачки список имён тегов (один запрос)"""
+        by_id = {row["id"]: row for row in chunk}
+        for row in chunk:
+            row["tags"] = []
+        tag_rows = db.execute(
+            select(prompt_tags.c.prompt_id, Tag.name)
+            .join(Tag, Tag.id == prompt_tags.c.tag_id)
+            .where(prompt_tags.c.prompt_id.in_(by_id))
+            .order_by(Tag.name)
+        )
+        for prompt_id, name in tag_rows:
+            by_id[prompt_id]["tags"].append(name)
+        return chunk
+
+    @staticmethod
+    def _json_row(row: Dict) -> Dict:
+        return {
+            key: value.isoformat() if isinstance(value, datetime) else value
+            for key, value in row.items()
+        }
+
+    @staticmethod
+    def stream(session_factory: Callable, fmt: str = "ndjson", files: str = "txt",
+               query: Optional[str] = None, category: Optional[str] = None,
+               tags: Optional[List[str]] = None) -> Iterator[bytes]:
+        """
+        Генератор байт экспорта. Сессия открывается внутри генератора:
+        ответ стримится уже после выхода из обработчика запроса.
+        """
+        db = session_factory()
+        try:
+            chunks = ExportService.iter_rows(db, query, category, tags)
+            if fmt == "zip":
+                yield from ExportService._zip(chunks, files)
+            else:
+                for chunk in chunks:
+                    yield "".join(
+                        json.dumps(ExportService._json_row(row), ensure_ascii=False) + "\n"
+                        for row in chunk
+                    ).encode("utf-8")
+        finally:
+            db.close()
+
+    @staticmethod
+    def _zip(chunks: Iterator[List[Dict]], files: str) -> Iterator[bytes]:
+        buffer = _StreamBuffer()
+        with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for chunk in chunks:
+                for row in chunk:
+                    category = row["category"] or "uncategorized"
+                    name = f"{FileService.safe_filename(category)}/" \
+                           f"{FileService.prompt_filename(row['id'], row['title'], files)}"
+                    saved_at = row["updated_at"] or row["created_at"]
+                    if files == "json":
+                        data = FileService.prompt_json_data(
+                            row["id"], row["title"], row["content"], category, row["tags"],
+                            row["version"] or "1.0", row["description"] or "", saved_at
+                        )
+                        text = json.dumps(data, ensure_ascii=False, indent=2)
+                    else:
+                        text = FileService.format_prompt_txt(
+                            row["title"], row["content"], category, row["tags"], saved_at
+                        )
+                    info = zipfile.ZipInfo(name, date_time=(saved_at or datetime.now()).timetuple()[:6])
+                    info.compress_type = zipfile.ZIP_DEFLATED
+                    archive.writestr(info, text.encode("utf-8"))
+                # Отдаём накопленное после каждой пачки
+                yield buffer.pop()
+        yield buffer.pop()
+
+    @staticmethod
+    def filename(fmt: str) -> str:
+        """Имя файла для Content-Disposition"""
+        return f"pandora-export-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{fmt}"
@@ -1,19 +1,54 @@
 """
 File management service for saving prompts and project files
 """
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 import json
+import re
+import struct
 from datetime import datetime
 import sys
 import os
+import threading
+
+
+# How many tasks.txt/process.txt contents to keep in memory
+PROJECT_FILE_CACHE_SIZE = 64
+
+PROJECT_FILES = {
+    "tasks": ("tasks", "tasks.txt"),
+    "process": ("process", "process.txt"),
+}
+
+# process.txt offset index: one (entry id, byte offset) record per entry
+PROCESS_INDEX_NAME = "process.idx"
+# Id of the last entry appended to process.txt, kept apart from the file content
+PROCESS_LAST_ID_NAME = "process.last"
+PROCESS_INDEX_RECORD = struct.Struct("<QQ")
+PROCESS_ENTRY_HEADER = re.compile(rb"^\[\d{4}-\d\d-\d\d \d\d:\d\d:\d\d\] #(\d+)\r?\n$")
 
 
 class FileService:
-    """Service for managing file storage of prompts and projects"""
+    """
+    Service for managing file storage of prompts and projects.
+    
+    Directories are resolved and created once per instance, project folders
+    are remembered by project id, and recently read project files are served
+    from an LRU cache validated by (mtime, size). Use the shared
+    ``file_service`` instance; pure helpers stay static.
+    """
+    
+    def __init__(self, data_dir: Optional[Path] = None):
+        self._data_dir = data_dir
+        self._created: set = set()
+        self._project_dirs: Dict[int, Tuple[str, Path]] = {}
+        self._file_cache: "OrderedDict[Path, Tuple[int, int, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._append_lock = threading.Lock()
     
     @staticmethod
-    def get_data_dir() -> Path:
+    def resolve_data_dir() -> Path:
         """
         Get the data directory path (next to executable)
         
@@ -27,27 +62,64 @@ class FileService:
             # Running as script
             base_dir = Path(__file__).parent.parent.parent.parent
         
-        data_dir = base_dir / "data"
-        data_dir.mkdir(exist_ok=True)
-        
-        return data_dir
+        return base_dir / "data"
     
-    @staticmethod
-    def get_prompts_dir() -> Path:
+    def _ensure_dir(self, directory: Path) -> Path:
+        """Create a directory the first time it is used by this instance"""
+        if directory not in self._created:
+            directory.mkdir(parents=True, exist_ok=True)
+            self._created.add(directory)
+        return directory
+    
+    def get_data_dir(self) -> Path:
+        """Get or create the data directory"""
+        if self._data_dir is None:
+            self._data_dir = self.resolve_data_dir()
+        return self._ensure_dir(self._data_dir)
+    
+    def get_prompts_dir(self) -> Path:
         """Get or create prompts directory"""
-        prompts_dir = FileService.get_data_dir() / "prompts"
-        prompts_dir.mkdir(exist_ok=True)
-        return prompts_dir
+        return self._ensure_dir(self.get_data_dir() / "prompts")
     
-    @staticmethod
-    def get_projects_dir() -> Path:
+    def get_projects_dir(self) -> Path:
         """Get or create projects directory"""
-        projects_dir = FileService.get_data_dir() / "projects"
-        projects_dir.mkdir(exist_ok=True)
-        return projects_dir
+        return self._ensure_dir(self.get_data_dir() / "projects")
     
-    @staticmethod
-    def save_prompt_as_txt(prompt_id: int, title: str, content: str, 
+    def project_dir(self, project_id: int, project_name: str) -> Path:
+        """
+        Project folder <id>_<safe name> (not created here).
+        Cached by project id; a renamed project resolves again.
+        """
+        cached = self._project_dirs.get(project_id)
+        if cached is not None and cached[0] == project_name:
+            return cached[1]
+        project_dir = self.get_projects_dir() / f"{project_id}_{self.safe_filename(project_name, 40)}"
+        self._project_dirs[project_id] = (project_name, project_dir)
+        return project_dir
+    
+    def project_file_path(self, project_id: int, project_name: str, file_type: str) -> Path:
+        """Path of tasks.txt or process.txt; ValueError for other types"""
+        if file_type not in PROJECT_FILES:
+            raise ValueError(f"Unknown file type: {file_type}")
+        folder, name = PROJECT_FILES[file_type]
+        return self.project_dir(project_id, project_name) / folder / name
+    
+    def forget_project(self, project_id: int) -> None:
+        """Drop cached paths and contents of a project (e.g. after deletion)"""
+        with self._lock:
+            cached = self._project_dirs.pop(project_id, None)
+            if cached is not None:
+                for path in [p for p in self._file_cache if cached[1] in p.parents]:
+                    del self._file_cache[path]
+    
+    def _cache_put(self, file_path: Path, stat: os.stat_result, content: str) -> None:
+        with self._lock:
+            self._file_cache[file_path] = (stat.st_mtime_ns, stat.st_size, content)
+            self._file_cache.move_to_end(file_path)
+            while len(self._file_cache) > PROJECT_FILE_CACHE_SIZE:
+                self._file_cache.popitem(last=False)
+    
+    def save_prompt_as_txt(self, prompt_id: int, title: str, content: str, 
                            category: str = "general", tags: list = None) -> str:
         """
         Save prompt as TXT file
@@ -62,20 +134,50 @@ class FileService:
         Returns:
             Path to saved file
         """
-        prompts_dir = FileService.get_prompts_dir()
-        
         # Create category subdirectory
-        category_dir = prompts_dir / category
-        category_dir.mkdir(exist_ok=True)
-        
-        # Create safe filename from title
-        safe_filename = "".join(c for c in title if c.isalnum() or c in ' -_').rstrip()
-        safe_filename = safe_filename.replace(' ', '_')[:50]  # Limit length
+        category_dir = self._ensure_dir(self.get_prompts_dir() / category)
         
-        file_path = category_dir / f"{prompt_id}_{safe_filename}.txt"
+        file_path = category_dir / FileService.prompt_filename(prompt_id, title, "txt")
+        self._write_text(file_path, FileService.format_prompt_txt(title, content, category, tags))
+        return str(file_path)
+    
+    @staticmethod
+    def write_atomic(file_path: Path, text: str) -> None:
+        """
+        Write text via a temp file in the same directory and os.replace,
+        so readers never see a partially written file
+        """
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = file_path.with_name(f".{file_path.name}.tmp")
+        try:
+            tmp_path.write_text(text, encoding='utf-8')
+            os.replace(tmp_path, file_path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+    
+    @staticmethod
+    def safe_filename(title: str, limit: int = 50) -> str:
+        """Filesystem-safe name from a prompt title"""
+        safe = "".join(c for c in title if c.isalnum() or c in ' -_').rstrip()
+        return safe.replace(' ', '_')[:limit]
+    
+    @staticmethod
+    def prompt_filename(prompt_id: int, title: str, extension: str) -> str:
+        """File name used for exported prompts: <id>_<title>.<ext>"""
+        return f"{prompt_id}_{FileService.safe_filename(title)}.{extension}"
+    
+    @staticmethod
+    def format_prompt_txt(title: str, content: str, category: str = "general",
+                          tags: list = None, saved_at: Optional[datetime] = None) -> str:
+        """
+        Render prompt as TXT with a metadata header
         
-        # Create file content with metadata
-        file_content = f"""╔════════════════════════════════════════════════════════╗
+        Args:
+            saved_at: Timestamp shown in the header (defaults to now)
+        """
+        saved_at = saved_at or datetime.now()
+        return f"""╔════════════════════════════════════════════════════════╗
 ║           PANDORA PROMPT EXPORT - v1.0               ║
 ╚════════════════════════════════════════════════════════╝
 
@@ -89,7 +191,7 @@ class FileService:
 {', '.join(tags) if tags else 'No tags assigned'}
 
 📅 SAVED:
-{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+{saved_at.strftime('%Y-%m-%d %H:%M:%S')}
 
 {'='*56}
 📝 CONTENT:
@@ -99,12 +201,26 @@ class FileService:
 
 {'='*56}
 """
-        
-        file_path.write_text(file_content, encoding='utf-8')
-        return str(file_path)
     
     @staticmethod
-    def save_prompt_json(prompt_id: int, title: str, content: str, 
+    def prompt_json_data(prompt_id: int, title: str, content: str,
+                         category: str = "general", tags: list = None,
+                         version: str = "1.0", description: str = "",
+                         saved_at: Optional[datetime] = None) -> dict:
+        """Prompt as a JSON-serializable dict (export format 1.0)"""
+        return {
+            "id": prompt_id,
+            "title": title,
+            "content": content,
+            "category": category,
+            "tags": tags or [],
+            "version": version,
+            "description": description,
+            "saved_at": (saved_at or datetime.now()).isoformat(),
+            "export_version": "1.0"
+        }
+    
+    def save_prompt_json(self, prompt_id: int, title: str, content: str, 
                         category: str = "general", tags: list = None,
                         version: str = "1.0", description: str = "") -> str:
         """
@@ -122,30 +238,16 @@ class FileService:
         Returns:
             Path to saved file
         """
-        prompts_dir = FileService.get_prompts_dir()
+        file_path = self.get_prompts_dir() / FileService.prompt_filename(prompt_id, title, "json")
         
-        safe_filename = "".join(c for c in title if c.isalnum() or c in ' -_').rstrip()
-        safe_filename = safe_filename.replace(' ', '_')[:50]
-        
-        file_path = prompts_dir / f"{prompt_id}_{safe_filename}.json"
-        
-        data = {
-            "id": prompt_id,
-            "title": title,
-            "content": content,
-            "category": category,
-            "tags": tags or [],
-            "version": version,
-            "description": description,
-            "saved_at": datetime.now().isoformat(),
-            "export_version": "1.0"
-        }
+        data = FileService.prompt_json_data(
+            prompt_id, title, content, category, tags, version, description
+        )
         
-        file_path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding='utf-8')
+        self._write_text(file_path, json.dumps(data, ensure_ascii=False, indent=2))
         return str(file_path)
     
-    @staticmethod
-    def create_project_structure(project_id: int, project_name: str) -> dict:
+    def create_project_structure(self, project_id: int, project_name: str) -> dict:
         """
         Create directory structure for a project
         
@@ -156,27 +258,16 @@ class FileService:
         Returns:
             Dictionary with paths to project subdirectories
         """
-        projects_dir = FileService.get_projects_dir()
-        
-        # Create safe project folder name
-        safe_name = "".join(c for c in project_name if c.isalnum() or c in ' -_').rstrip()
-        safe_name = safe_name.replace(' ', '_')[:40]
-        
-        project_dir = projects_dir / f"{project_id}_{safe_name}"
-        project_dir.mkdir(exist_ok=True)
+        project_dir = self._ensure_dir(self.project_dir(project_id, project_name))
         
         # Create subdirectories
-        tasks_dir = project_dir / "tasks"
-        process_dir = project_dir / "process"
-        files_dir = project_dir / "files"
-        
-        tasks_dir.mkdir(exist_ok=True)
-        process_dir.mkdir(exist_ok=True)
-        files_dir.mkdir(exist_ok=True)
+        tasks_dir = self._ensure_dir(project_dir / "tasks")
+        process_dir = self._ensure_dir(project_dir / "process")
+        files_dir = self._ensure_dir(project_dir / "files")
         
         # Create initial files
-        (tasks_dir / "tasks.txt").write_text("# Project Tasks\n\n", encoding='utf-8')
-        (process_dir / "process.txt").write_text("# Project Process\n\n", encoding='utf-8')
+        self._write_project_file(tasks_dir / "tasks.txt", "# Project Tasks\n\n")
+        self._write_project_file(process_dir / "process.txt", "# Project Process\n\n")
         (project_dir / "README.txt").write_text(
             f"Project: {project_name}\nID: {project_id}\nCreated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n",
             encoding='utf-8'
@@ -189,9 +280,23 @@ class FileService:
             "files_dir": str(files_dir)
         }
     
-    @staticmethod
-    def update_project_file(project_id: int, project_name: str, 
-                          file_type: str, content: str) -> str:
+    def _write_text(self, file_path: Path, content: str) -> None:
+        """Write a file into a cached directory, recreating it if it was removed"""
+        try:
+            file_path.write_text(content, encoding='utf-8')
+        except FileNotFoundError:
+            # Folder removed outside the app (or by the mirror): create it again
+            self._created.difference_update(file_path.parents)
+            self._ensure_dir(file_path.parent)
+            file_path.write_text(content, encoding='utf-8')
+    
+    def _write_project_file(self, file_path: Path, content: str) -> None:
+        """Write a project file and keep the cached copy in sync"""
+        self._write_text(file_path, content)
+        self._cache_put(file_path, file_path.stat(), content)
+    
+    def update_project_file(self, project_id: int, project_name: str,
+                            file_type: str, content: str) -> str:
         """
         Update project file (tasks.txt or process.txt)
         
@@ -204,30 +309,20 @@ class FileService:
         Returns:
             Path to updated file
         """
-        projects_dir = FileService.get_projects_dir()
-        
-        safe_name = "".join(c for c in project_name if c.isalnum() or c in ' -_').rstrip()
-        safe_name = safe_name.replace(' ', '_')[:40]
-        
-        project_dir = projects_dir / f"{project_id}_{safe_name}"
-        project_dir.mkdir(exist_ok=True)
-        
-        if file_type == 'tasks':
-            file_path = project_dir / "tasks" / "tasks.txt"
-        elif file_type == 'process':
-            file_path = project_dir / "process" / "process.txt"
-        else:
-            raise ValueError(f"Unknown file type: {file_type}")
-        
-        file_path.parent.mkdir(parents=True, exist_ok=True)
-        file_path.write_text(content, encoding='utf-8')
+        file_path = self.project_file_path(project_id, project_name, file_type)
+        self._ensure_dir(file_path.parent)
+        with self._append_lock:
+            self._write_project_file(file_path, content)
+            if file_type == 'process':
+                # Offsets no longer match: rebuilt on the next tail read
+                (file_path.parent / PROCESS_INDEX_NAME).unlink(missing_ok=True)
         
         return str(file_path)
     
-    @staticmethod
-    def read_project_file(project_id: int, project_name: str, file_type: str) -> Optional[str]:
+    def read_project_file(self, project_id: int, project_name: str, file_type: str) -> Optional[str]:
         """
-        Read project file content
+        Read project file content. A cached copy is returned while the
+        file's mtime and size are unchanged (one stat call per read).
         
         Args:
             project_id: Project ID
@@ -237,27 +332,192 @@ class FileService:
         Returns:
             File content or None if not found
         """
-        projects_dir = FileService.get_projects_dir()
-        
-        safe_name = "".join(c for c in project_name if c.isalnum() or c in ' -_').rstrip()
-        safe_name = safe_name.replace(' ', '_')[:40]
+        if file_type not in PROJECT_FILES:
+            return None
+        file_path = self.project_file_path(project_id, project_name, file_type)
         
-        if file_type == 'tasks':
-            file_path = projects_dir / f"{project_id}_{safe_name}" / "tasks" / "tasks.txt"
-        elif file_type == 'process':
-            file_path = projects_dir / f"{project_id}_{safe_name}" / "process" / "process.txt"
-        else:
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            with self._lock:
+                self._file_cache.pop(file_path, None)
             return None
         
-        if file_path.exists():
-            return file_path.read_text(encoding='utf-8')
+        with self._lock:
+            cached = self._file_cache.get(file_path)
+            if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+                self._file_cache.move_to_end(file_path)
+                return cached[2]
         
-        return None
+        content = file_path.read_text(encoding='utf-8')
+        self._cache_put(file_path, stat, content)
+        return content
+    
+    # ------------------------------------------------------------ process log
     
     @staticmethod
-    def list_prompts() -> list:
+    def format_process_entry(entry_id: int, entry: str, created_at: datetime) -> str:
+        """Process log block: header line "[date] #id", text, blank line"""
+        return f"[{created_at.strftime('%Y-%m-%d %H:%M:%S')}] #{entry_id}\n{entry.rstrip()}\n\n"
+    
+    def append_process_entries(self, project_id: int, project_name: str,
+                               entries: Iterable[Tuple[int, str, datetime]]) -> int:
+        """
+        Append entries (id, text, created_at) to process.txt with O_APPEND
+        and record their offsets in process.idx. Entries already in the log
+        (id not above the last appended one) are skipped.
+        
+        Returns:
+            Size of process.txt before the append (truncate to it to undo)
+        """
+        file_path = self.project_file_path(project_id, project_name, "process")
+        self._ensure_dir(file_path.parent)
+        with self._append_lock:
+            last_id = self._last_appended_id(file_path)
+            
+            fd = os.open(file_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                start = offset = os.fstat(fd).st_size
+                records = []
+                for entry_id, entry, created_at in sorted(entries):
+                    if entry_id <= last_id:
+                        continue
+                    data = self.format_process_entry(entry_id, entry, created_at).encode('utf-8')
+                    os.write(fd, data)
+                    records.append(PROCESS_INDEX_RECORD.pack(entry_id, offset))
+                    offset += len(data)
+                    last_id = entry_id
+            finally:
+                os.close(fd)
+            
+            if records:
+                index_fd = os.open(file_path.parent / PROCESS_INDEX_NAME,
+                                   os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    os.write(index_fd, b"".join(records))
+                finally:
+                    os.close(index_fd)
+                (file_path.parent / PROCESS_LAST_ID_NAME).write_text(str(last_id), encoding='utf-8')
+            return start
+    
+    def last_process_entry_id(self, project_id: int, project_name: str) -> int:
+        """Id of the last entry appended to process.txt (0 if none)"""
+        file_path = self.project_file_path(project_id, project_name, "process")
+        with self._append_lock:
+            return self._last_appended_id(file_path)
+    
+    def truncate_process_log(self, project_id: int, project_name: str, size: int,
+                             last_id: Optional[int] = None) -> None:
+        """
+        Roll process.txt back to size (the entries were not saved in the DB);
+        last_id is the last appended id to restore (as before the append)
+        """
+        file_path = self.project_file_path(project_id, project_name, "process")
+        with self._append_lock:
+            os.truncate(file_path, size)
+            (file_path.parent / PROCESS_INDEX_NAME).unlink(missing_ok=True)
+            last_id_path = file_path.parent / PROCESS_LAST_ID_NAME
+            if last_id is None:
+                last_id_path.unlink(missing_ok=True)
+            else:
+                last_id_path.write_text(str(last_id), encoding='utf-8')
+    
+    def _last_appended_id(self, file_path: Path) -> int:
+        """
+        Id of the last entry appended to process.txt. Stored apart from the
+        index: a PUT may drop the "[date] #id" headers, but those entries were
+        logged already and must not be appended again.
+        """
+        index = self._process_index(file_path)
+        indexed = index[-1][0] if index else 0
+        try:
+            return max(int((file_path.parent / PROCESS_LAST_ID_NAME).read_text(encoding='utf-8')), indexed)
+        except (OSError, ValueError):
+            return indexed
+    
+    def _process_index(self, file_path: Path) -> List[Tuple[int, int]]:
+        """
+        Read the offset index of process.txt. A missing, empty or stale index
+        (the file was rewritten or shortened) is rebuilt from the entry headers.
+        """
+        index_path = file_path.parent / PROCESS_INDEX_NAME
+        try:
+            size = os.stat(file_path).st_size
+        except FileNotFoundError:
+            # The log is gone: the next append writes the whole history again
+            index_path.unlink(missing_ok=True)
+            (file_path.parent / PROCESS_LAST_ID_NAME).unlink(missing_ok=True)
+            return []
+        
+        try:
+            data = index_path.read_bytes()
+            index = [PROCESS_INDEX_RECORD.unpack_from(data, pos)
+                     for pos in range(0, len(data) - len(data) % PROCESS_INDEX_RECORD.size,
+                                      PROCESS_INDEX_RECORD.size)]
+            # An empty index is trusted only for an empty file: entries past
+            # the header may have been appended without reaching the index
+            if (index and index[-1][1] < size) or (not index and size == 0):
+                return index
+        except FileNotFoundError:
+            pass
+        
+        index = []
+        offset = 0
+        with open(file_path, 'rb') as f:
+            for line in f:
+                match = PROCESS_ENTRY_HEADER.match(line)
+                if match:
+                    index.append((int(match.group(1)), offset))
+                offset += len(line)
+        index_path.write_bytes(b"".join(PROCESS_INDEX_RECORD.pack(*record) for record in index))
+        return index
+    
+    def read_process_log(self, project_id: int, project_name: str,
+                         tail_entries: Optional[int] = None, tail_bytes: Optional[int] = None,
+                         offset: Optional[int] = None) -> Optional[dict]:
+        """
+        Read part of process.txt without loading the whole file
+        
+        Args:
+            tail_entries: Last N entries (located via the offset index)
+            tail_bytes: Last N bytes
+            offset: Everything from this byte offset (e.g. the size seen last time)
+        
+        Returns:
+            {"content", "offset", "size"} or None if the file does not exist
+        """
+        file_path = self.project_file_path(project_id, project_name, "process")
+        with self._append_lock:
+            try:
+                size = os.stat(file_path).st_size
+            except FileNotFoundError:
+                return None
+            
+            start = 0
+            if tail_entries is not None:
+                index = self._process_index(file_path)
+                if tail_entries <= 0:
+                    start = size
+                elif tail_entries < len(index):
+                    start = index[-tail_entries][1]
+            elif tail_bytes is not None:
+                start = max(0, size - tail_bytes)
+            elif offset is not None:
+                start = min(max(0, offset), size)
+            
+            with open(file_path, 'rb') as f:
+                f.seek(start)
+                data = f.read(size - start)
+        
+        return {
+            "content": data.decode('utf-8', errors='ignore'),
+            "offset": start,
+            "size": size
+        }
+    
+    def list_prompts(self) -> list:
         """List all saved prompts"""
-        prompts_dir = FileService.get_prompts_dir()
+        prompts_dir = self.get_prompts_dir()
         prompts = []
         
         for file in prompts_dir.rglob("*.txt"):
@@ -269,18 +529,20 @@ class FileService:
         
         return prompts
     
-    @staticmethod
-    def list_projects() -> list:
+    def list_projects(self) -> list:
         """List all project directories"""
-        projects_dir = FileService.get_projects_dir()
+        projects_dir = self.get_projects_dir()
         projects = []
         
-        if projects_dir.exists():
-            for folder in projects_dir.iterdir():
-                if folder.is_dir():
-                    projects.append({
-                        "path": str(folder),
-                        "name": folder.name
-                    })
+        for folder in projects_dir.iterdir():
+            if folder.is_dir():
+                projects.append({
+                    "path": str(folder),
+                    "name": folder.name
+                })
         
         return projects
+
+
+# Shared instance used by the API and background services
+file_service = FileService()
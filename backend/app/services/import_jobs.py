@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+"""
+Фоновые задачи импорта.
+
+Загрузка JSON/NDJSON и синхронизация references выполняются в отдельном
+потоке: запрос сразу получает id задачи, прогресс отдаётся через
+Server-Sent Events (/api/import/jobs/{id}/events), задачу можно отменить.
+Задачи выполняются по одной - SQLite всё равно пишет в один поток.
+Стартовая синхронизация и watcher работают в своих потоках, мимо этой
+очереди; с задачами их сериализует блокировка sync_references.
+"""
+
+import asyncio
+import json
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, BinaryIO, Callable, Dict, List, Optional
+
+from app.config import settings
+
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+FINISHED_STATUSES = (JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED)
+
+# Сколько завершённых задач держать в памяти
+MAX_FINISHED_JOBS = 50
+# Как часто SSE-поток проверяет изменения и шлёт keep-alive
+SSE_POLL_INTERVAL = 0.5
+SSE_HEARTBEAT_SECONDS = 15.0
+
+
+class ImportJob:
+    """Задача импорта и её прогресс"""
+
+    def __init__(self, kind: str, source_name: Optional[str] = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.source_name = source_name
+        self.status = JOB_QUEUED
+        self.phase: Optional[str] = None
+        self.progress: Dict[str, int] = {
+            "scanned": 0,     # JSON: разобрано элементов; references: файлов
+            "total": 0,       # JSON: размер файла в байтах; references: файлов к чтению
+            "done": 0,        # JSON: прочитано байт; references: прочитано/обработано
+            "inserted": 0,
+            "skipped": 0,
+            "errors": 0,
+        }
+        self.message: Optional[str] = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.version = 0
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    def update(self, **fields):
+        """Обновить поля задачи; ключи прогресса - в progress"""
+        with self._lock:
+            for name, value in fields.items():
+                if name in self.progress:
+                    self.progress[name] = value
+                else:
+                    setattr(self, name, value)
+            self.version += 1
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            total = self.progress["total"]
+            return {
+                "id": self.id,
+                "kind": self.kind,
+                "source_name": self.source_name,
+                "status": self.status,
+                "phase": self.phase,
+                "progress": {
+                    **self.progress,
+                    "percent": round(100.0 * self.progress["done"] / total, 1) if total else None,
+                },
+                "message": self.message,
+                "error": self.error,
+                "cancel_requested": self._cancel.is_set(),
+                "created_at": self.created_at.isoformat(),
+                "started_at": self.started_at.isoformat() if self.started_at else None,
+                "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+                "version": self.version,
+            }
+
+
+class ImportJobService:
+    """Реестр и исполнитель задач импорта"""
+
+    _lock = threading.Lock()
+    _jobs: "OrderedDict[str, ImportJob]" = OrderedDict()
+    _executor: Optional[ThreadPoolExecutor] = None
+
+    @classmethod
+    def _submit(cls, job: ImportJob, target: Callable, *args) -> ImportJob:
+        with cls._lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pandora-import")
+            cls._jobs[job.id] = job
+            cls._trim()
+            cls._executor.submit(cls._run, job, target, *args)
+        return job
+
+    @classmethod
+    def _trim(cls):
+        finished = [job_id for job_id, job in cls._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del cls._jobs[job_id]
+
+    @staticmethod
+    def _run(job: ImportJob, target: Callable, *args):
+        if job.cancel_requested:
+            job.update(status=JOB_CANCELLED, finished_at=datetime.now(), message="Cancelled before start")
+            return
+        job.update(status=JOB_RUNNING, started_at=datetime.now())
+        try:
+            target(job, *args)
+            status = JOB_CANCELLED if job.cancel_requested else JOB_COMPLETED
+            job.update(status=status, finished_at=datetime.now())
+        except Exception as e:
+            print(f"[IMPORT] Job {job.id} failed: {e}")
+            job.update(
+                status=JOB_FAILED, error=str(e), errors=job.progress["errors"] + 1,
+                finished_at=datetime.now()
+            )
+
+    # ---------------------------------------------------------------- submit
+
+    @classmethod
+    def submit_json(cls, upload: BinaryIO, source_name: str, session_factory: Callable) -> ImportJob:
+        """
+        Поставить в очередь импорт JSON/NDJSON. Загрузка копируется в
+        IMPORTS_DIR (запрос завершится раньше задачи) и удаляется после неё.
+        """
+        job = ImportJob("json", source_name)
+        settings.IMPORTS_DIR.mkdir(parents=True, exist_ok=True)
+        path = settings.IMPORTS_DIR / f"job_{job.id}.upload"
+        with open(path, "wb") as f:
+            shutil.copyfileobj(upload, f, 1024 * 1024)
+        job.update(total=path.stat().st_size)
+        return cls._submit(job, _run_json_import, path, session_factory)
+
+    @classmethod
+    def submit_references(cls) -> ImportJob:
+        """Поставить в очередь синхронизацию references"""
+        return cls._submit(ImportJob("references", "references"), _run_references_sync)
+
+    # ----------------------------------------------------------------- query
+
+    @classmethod
+    def get(cls, job_id: str) -> Optional[ImportJob]:
+        with cls._lock:
+            return cls._jobs.get(job_id)
+
+    @classmethod
+    def list_jobs(cls) -> List[Dict]:
+        with cls._lock:
+            jobs = list(cls._jobs.values())
+        return [job.to_dict() for job in reversed(jobs)]
+
+    @classmethod
+    def cancel(cls, job_id: str) -> Optional[ImportJob]:
+        """Запросить отмену; задача останавливается после текущей пачки"""
+        job = cls.get(job_id)
+        if job is not None and not job.finished:
+            job._cancel.set()
+            job.update(message="Cancellation requested")
+        return job
+
+    @classmethod
+    def shutdown(cls):
+        """Отменить незавершённые задачи (остановка приложения)"""
+        with cls._lock:
+            for job in cls._jobs.values():
+                if not job.finished:
+                    job._cancel.set()
+            executor, cls._executor = cls._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    @classmethod
+    async def stream_events(
+        cls, job_id: str, is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None
+    ) -> AsyncIterator[str]:
+        """
+        SSE-поток задачи: событие progress на каждое изменение, в конце -
+        событие со статусом задачи (completed/failed/cancelled).
+        """
+        version = -1
+        last_sent = time.monotonic()
+        while True:
+            job = cls.get(job_id)
+            if job is None:
+                return
+            if job.version != version:
+                data = job.to_dict()
+                version = data["version"]
+                event = data["status"] if data["status"] in FINISHED_STATUSES else "progress"
+                yield f"id: {version}\nevent: {event}\ndata: {json.dumps(data)}\n\n"
+                last_sent = time.monotonic()
+                if event != "progress":
+                    return
+            elif time.monotonic() - last_sent > SSE_HEARTBEAT_SECONDS:
+                yield ": keep-alive\n\n"
+                last_sent = time.monotonic()
+
+            if is_disconnected is not None and await is_disconnected():
+                return
+            await asyncio.sleep(SSE_POLL_INTERVAL)
+
+
+# ------------------------------------------------------------------ runners
+
+def _run_json_import(job: ImportJob, path: Path, session_factory: Callable):
+    """Потоковый импорт файла пачками; отмена проверяется после каждой пачки"""
+    from app.services.database import PromptService
+    from app.utils.importer import PromptImporter
+
+    job.update(phase="importing")
+    db = session_factory()
+    try:
+        with open(path, "rb") as f:
+            def parsed():
+                for prompt in PromptImporter.iter_json_stream(f, job.source_name):
+                    job.progress["scanned"] += 1
+                    yield prompt
+
+            def on_batch(counts: Dict[str, int]) -> bool:
+                job.update(done=f.tell(), inserted=counts["imported"], skipped=counts["skipped"])
+                return not job.cancel_requested
+
+            counts = PromptService.import_prompts_stream(
+                db, parsed(), imported_from=job.source_name, on_batch=on_batch
+            )
+            job.update(
+                done=f.tell(), inserted=counts["imported"], skipped=counts["skipped"],
+                message=f"Imported {counts['imported']} prompts, skipped {counts['skipped']}"
+            )
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+        path.unlink(missing_ok=True)
+
+
+def _run_references_sync(job: ImportJob):
+    """Инкрементальная синхронизация references с прогрессом в задаче"""
+    from app.services.db_initializer import DatabaseInitializer
+
+    def scan_progress(done: int, total: Optional[int] = None):
+        job.update(phase="scanning", done=done, **({"total": total} if total is not None else {}))
+
+    def import_progress(done: int, total: Optional[int] = None):
+        job.update(phase="importing", done=done, **({"total": total} if total is not None else {}))
+
+    job.update(phase="scanning")
+    scan, result = DatabaseInitializer.sync_references(
+        scan_progress=scan_progress,
+        import_progress=import_progress,
+        cancelled=lambda: job.cancel_requested,
+    )
+    job.update(
+        scanned=scan.unchanged + len(scan.files),
+        inserted=result.added,
+        skipped=result.skipped,
+        errors=scan.errors,
+        message=(
+            f"{len(scan.files)} changed files, {scan.unchanged} unchanged, "
+            f"{len(scan.removed)} removed, {len(scan.prompts)} prompts: "
+            f"{result.added} added, {result.updated} updated, {result.deleted} deleted"
+        ),
+    )
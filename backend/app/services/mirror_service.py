@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+Инкрементальное зеркало библиотеки на диске.
+
+Каждый промпт лежит в data/mirror/<category>/<id>_<title>.txt (формат
+/export-txt). Папка отдельная от data/prompts/, куда пишет FileService:
+зеркало удаляет опустевшие папки категорий только внутри своей папки. Синхронизация читает журнал prompt_changes, перезаписывает
+только изменившиеся промпты (запись через временный файл и os.replace),
+удаляет файлы удалённых промптов и переносит файл при смене категории или
+названия. Где лежит файл каждого промпта, хранится в mirror_files.
+"""
+
+import hashlib
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db.models import MirrorFile, Prompt, PromptChange
+from app.services.file_service import FileService
+
+
+# Записей журнала на одну транзакцию синхронизации
+MIRROR_CHUNK = 2000
+# Как часто фоновый поток проверяет журнал
+MIRROR_INTERVAL_SECONDS = 2.0
+
+MIRROR_COLUMNS = (
+    Prompt.id, Prompt.title, Prompt.content, Prompt.category,
+    Prompt.created_at, Prompt.updated_at,
+)
+
+
+class MirrorService:
+    """Синхронизация зеркала промптов по журналу изменений"""
+
+    _lock = threading.Lock()
+    _wake = threading.Event()
+    _stop = threading.Event()
+    _thread: Optional[threading.Thread] = None
+    last_result: Optional[Dict] = None
+
+    @staticmethod
+    def pending(db: Session) -> int:
+        """Записей в журнале, ещё не перенесённых в зеркало"""
+        return db.query(func.count(PromptChange.id)).scalar() or 0
+
+    @staticmethod
+    def relative_path(prompt_id: int, title: str, category: Optional[str]) -> str:
+        """Путь файла промпта относительно папки зеркала"""
+        folder = FileService.safe_filename(category or "uncategorized") or "uncategorized"
+        return f"{folder}/{FileService.prompt_filename(prompt_id, title, 'txt')}"
+
+    @classmethod
+    def sync(cls, db: Session, root: Optional[Path] = None) -> Dict:
+        """
+        Перенести в зеркало все изменения из журнала.
+        Параллельные вызовы выполняются по очереди.
+        """
+        with cls._lock:
+            root = root or settings.MIRROR_DIR
+            stats = {"written": 0, "moved": 0, "deleted": 0, "unchanged": 0}
+            while True:
+                changes = db.execute(
+                    select(PromptChange.id, PromptChange.prompt_id)
+                    .order_by(PromptChange.id).limit(MIRROR_CHUNK)
+                ).all()
+                if not changes:
+                    break
+                cls._apply(db, root, {prompt_id for _, prompt_id in changes}, stats)
+                db.query(PromptChange).filter(PromptChange.id <= changes[-1][0]).delete(
+                    synchronize_session=False
+                )
+                db.commit()
+
+            result = {**stats, "finished_at": datetime.now().isoformat()}
+            cls.last_result = result
+            if stats["written"] or stats["deleted"]:
+                print(f"[MIRROR] Written {stats['written']} (moved {stats['moved']}), "
+                      f"deleted {stats['deleted']}")
+            return result
+
+    @staticmethod
+    def _apply(db: Session, root: Path, prompt_ids: set, stats: Dict):
+        from app.services.export_service import ExportService
+
+        rows = [row._asdict() for row in db.query(*MIRROR_COLUMNS).filter(Prompt.id.in_(prompt_ids))]
+        prompts = {row["id"]: row for row in ExportService.attach_tags(db, rows)} if rows else {}
+        mirrored = {
+            item.prompt_id: item
+            for item in db.query(MirrorFile).filter(MirrorFile.prompt_id.in_(prompt_ids))
+        }
+
+        now = datetime.utcnow()
+        for prompt_id in prompt_ids:
+            current = mirrored.get(prompt_id)
+            prompt = prompts.get(prompt_id)
+
+            if prompt is None:
+                # Промпт удалён
+                if current is not None:
+                    MirrorService._remove(root, root / current.path)
+                    db.delete(current)
+                    stats["deleted"] += 1
+                continue
+
+            path = MirrorService.relative_path(prompt_id, prompt["title"], prompt["category"])
+            text = FileService.format_prompt_txt(
+                prompt["title"], prompt["content"], prompt["category"], prompt["tags"],
+                prompt["updated_at"] or prompt["created_at"]
+            )
+            content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+            if (current is not None and current.path == path
+                    and current.content_hash == content_hash and (root / path).exists()):
+                stats["unchanged"] += 1
+                continue
+
+            FileService.write_atomic(root / path, text)
+            stats["written"] += 1
+            if current is None:
+                db.add(MirrorFile(prompt_id=prompt_id, path=path, content_hash=content_hash, synced_at=now))
+                continue
+            if current.path != path:
+                MirrorService._remove(root, root / current.path)
+                stats["moved"] += 1
+            current.path = path
+            current.content_hash = content_hash
+            current.synced_at = now
+
+    @staticmethod
+    def _remove(root: Path, file_path: Path):
+        """Удалить файл и опустевшую папку категории (только внутри root)"""
+        file_path.unlink(missing_ok=True)
+        if file_path.parent == root or root not in file_path.parent.parents:
+            return
+        try:
+            file_path.parent.rmdir()
+        except OSError:
+            pass
+
+    # ------------------------------------------------------------ background
+
+    @classmethod
+    def notify(cls):
+        """Разбудить фоновый поток (синхронизировать, не дожидаясь интервала)"""
+        cls._wake.set()
+
+    @classmethod
+    def start_background(cls, session_factory: Callable,
+                         interval: float = MIRROR_INTERVAL_SECONDS) -> threading.Thread:
+        """
+        Фоновая синхронизация: после завершения инициализации БД поток раз в
+        interval проверяет журнал (один запрос) и переносит изменения.
+        """
+        from app.services.startup_status import StartupStatus
+
+        def run():
+            StartupStatus.ready.wait()
+            while not cls._stop.is_set():
+                db = session_factory()
+                try:
+                    if db.query(PromptChange.id).first() is not None:
+                        cls.sync(db)
+                except Exception as e:
+                    db.rollback()
+                    print(f"[MIRROR ERROR] Sync failed: {e}")
+                finally:
+                    db.close()
+                cls._wake.wait(interval)
+                cls._wake.clear()
+
+        cls._stop.clear()
+        cls._thread = threading.Thread(target=run, name="pandora-mirror", daemon=True)
+        cls._thread.start()
+        return cls._thread
+
+    @classmethod
+    def stop_background(cls):
+        cls._stop.set()
+        cls._wake.set()
@@ -5,12 +5,29 @@
 Рекурсивно собирает ВСЕ .md файлы из всех подпапок.
 """
 
+import hashlib
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import Callable, List, Dict, NamedTuple, Optional, Tuple
 from datetime import datetime
 
+# Чтение файлов - в основном I/O, поэтому потоков больше, чем ядер
+READ_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+PROGRESS_EVERY = 100
+
+
+class ReferencesScan(NamedTuple):
+    """Результат сканирования references относительно манифеста"""
+    prompts: List[Dict]      # Промпты из новых/изменённых файлов (с source_path)
+    files: List[Dict]        # Записи манифеста для новых/изменённых файлов
+    unchanged: int           # Файлов пропущено по size+mtime
+    removed: List[str]       # Пути из манифеста, которых больше нет
+    stats: Dict[str, int]    # Промптов по источникам
+    errors: int = 0          # Файлов, которые не удалось прочитать
+
+
 class ReferencesImporter:
     """Импортер промптов из папок references"""
     
@@ -223,135 +240,319 @@ class ReferencesImporter:
         # По умолчанию включаем, если это не явная документация
         return not (file_name_lower in excluded_names)
     
+    @staticmethod
+    def scan_md_files(root_dir: Path) -> List[Tuple[Path, int, float]]:
+        """
+        Рекурсивно находит все .md файлы через os.scandir.
+        
+        Returns:
+            Список (путь, размер, mtime) - stat берётся из DirEntry без лишних вызовов
+        """
+        files = []
+        stack = [str(root_dir)]
+        
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                            elif entry.name.endswith('.md') and entry.is_file():
+                                stat = entry.stat()
+                                files.append((Path(entry.path), stat.st_size, stat.st_mtime))
+                        except OSError:
+                            continue
+            except OSError as e:
+                print(f"[IMPORT ERROR] Error scanning {current}: {e}")
+        
+        return files
+    
+    @staticmethod
+    def read_md_file(file_path: Path, root_dir: Path, source_name: str) -> Tuple[str, Optional[Dict]]:
+        """
+        Прочитать файл, посчитать хэш и, если это промпт, собрать его данные.
+        
+        Returns:
+            (sha256 содержимого, данные промпта или None)
+        """
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+        content_hash = hashlib.sha256(raw).hexdigest()
+        content = raw.decode('utf-8', errors='ignore')
+        
+        if not content.strip():
+            return content_hash, None
+        
+        # Фильтруем по признакам промпта
+        if not ReferencesImporter.is_likely_prompt(file_path, content):
+            return content_hash, None
+        
+        return content_hash, {
+            'title': ReferencesImporter.extract_title_from_content(content, file_path)[:255],
+            'content': content,
+            'description': f"From {source_name}",
+            'category': ReferencesImporter.categorize_by_path(file_path, source_name),
+            'tags': [],
+            'imported_from': source_name,
+            # Относительный путь для source_id
+            'source_id': str(file_path.relative_to(root_dir.parent)),
+        }
+    
     @staticmethod
     def collect_all_md_files(root_dir: Path, source_name: str) -> List[Dict]:
         """Рекурсивно собирает ВСЕ .md файлы из папки и подпапок"""
-        prompts = []
-        
         if not root_dir.exists():
-            return prompts
+            return []
+        
+        files = ReferencesImporter.scan_md_files(root_dir)
+        records = ReferencesImporter._read_files(
+            [(file_path, root_dir, source_name) for file_path, _, _ in files]
+        )
+        prompts = [prompt for _, _, prompt in records if prompt]
+        
+        filtered_count = len(files) - len(prompts)
+        if filtered_count > 0:
+            print(f"[IMPORT] Found {len(files)} .md files in {root_dir.name} (filtered {filtered_count} non-prompts, kept {len(prompts)})")
+        else:
+            print(f"[IMPORT] Found {len(prompts)} .md files in {root_dir.name}")
         
+        return prompts
+    
+    @staticmethod
+    def _read_files(jobs: List[Tuple[Path, Path, str]], progress: Optional[Callable] = None,
+                    workers: Optional[int] = None) -> List[Tuple[Path, Optional[str], Optional[Dict]]]:
+        """
+        Прочитать файлы параллельно в пуле потоков.
+        
+        Returns:
+            (путь, хэш, промпт) в порядке jobs; хэш None - файл прочитать не удалось
+        """
+        def read(job):
+            file_path, root_dir, source_name = job
+            try:
+                content_hash, prompt = ReferencesImporter.read_md_file(file_path, root_dir, source_name)
+                return file_path, content_hash, prompt
+            except Exception as e:
+                print(f"[IMPORT ERROR] Failed to read {file_path}: {e}")
+                return file_path, None, None
+        
+        if not jobs:
+            return []
+        
+        results = []
+        with ThreadPoolExecutor(max_workers=workers or READ_WORKERS) as pool:
+            for done, result in enumerate(pool.map(read, jobs), 1):
+                results.append(result)
+                if progress and (done % PROGRESS_EVERY == 0 or done == len(jobs)):
+                    progress(done, len(jobs))
+        return results
+    
+    @staticmethod
+    def _source_roots(references_dir: Path) -> List[Tuple[str, Path]]:
+        """Источники в references и корень поиска для каждого"""
+        roots = []
+        for item in sorted(references_dir.iterdir()):
+            if not item.is_dir():
+                continue
+            
+            # Проверяем разные структуры (с -main суффиксом или без)
+            search_paths = [
+                item / item.name,  # Папка -main/-main структура
+                item / f"{item.name[:-5]}" if item.name.endswith('-main') else None,  # Без -main
+                item,  # Сама папка
+            ]
+            for search_path in search_paths:
+                if search_path is not None and search_path.is_dir():
+                    roots.append((item.name, search_path))
+                    break
+        return roots
+    
+    @staticmethod
+    def _parse_agents_json(agents_json: Path, source_name: str) -> List[Dict]:
+        """Промпты agent-prompt-library из agents.json"""
+        prompts = []
         try:
-            # Собираем ВСЕ .md файлы рекурсивно
-            md_files = list(root_dir.glob('**/*.md'))
-            filtered_count = 0
+            with open(agents_json, 'r', encoding='utf-8') as f:
+                data = json.load(f)
             
-            for file_path in md_files:
-                try:
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            for agent in data.get('agents', []):
+                prompt_path = agents_json.parent / agent.get('path', '')
+                if prompt_path.exists():
+                    with open(prompt_path, 'r', encoding='utf-8', errors='ignore') as f:
                         content = f.read()
                     
-                    if not content.strip():
-                        continue
-                    
-                    # Фильтруем по признакам промпта
-                    if not ReferencesImporter.is_likely_prompt(file_path, content):
-                        filtered_count += 1
-                        continue
-                    
-                    title = ReferencesImporter.extract_title_from_content(content, file_path)
-                    category = ReferencesImporter.categorize_by_path(file_path, source_name)
-                    
-                    # Определяем относительный путь для source_id
-                    rel_path = file_path.relative_to(root_dir.parent)
-                    
                     prompts.append({
-                        'title': title[:255],
+                        'title': agent.get('name', agent.get('id', 'Unknown'))[:255],
                         'content': content,
-                        'description': f"From {source_name}",
-                        'category': category,
-                        'tags': [],
+                        'description': agent.get('description', ''),
+                        'category': ReferencesImporter.FOLDER_TO_CATEGORY.get(
+                            agent.get('category', 'development'), 'development'
+                        ),
+                        'tags': agent.get('tags', []),
                         'imported_from': source_name,
-                        'source_id': str(rel_path),
+                        'source_id': agent.get('id', ''),
                     })
-                except Exception as e:
-                    print(f"[IMPORT ERROR] Failed to read {file_path}: {e}")
-                    continue
-            
-            total_files = len(md_files)
-            if filtered_count > 0:
-                print(f"[IMPORT] Found {total_files} .md files in {root_dir.name} (filtered {filtered_count} non-prompts, kept {len(prompts)})")
-            else:
-                print(f"[IMPORT] Found {len(prompts)} .md files in {root_dir.name}")
-        
         except Exception as e:
-            print(f"[IMPORT ERROR] Error scanning {root_dir}: {e}")
-        
+            print(f"[IMPORT ERROR] Failed to parse agents.json: {e}")
         return prompts
     
     @staticmethod
-    def import_all_references() -> Tuple[List[Dict], Dict[str, int]]:
-        """Импортирует ВСЕ промпты из папки references"""
-        references_dir = ReferencesImporter.find_references_dir()
+    def scan_references(manifest: Optional[Dict[str, Tuple[int, float, str]]] = None,
+                        progress: Optional[Callable] = None) -> ReferencesScan:
+        """
+        Просканировать references с учётом манифеста.
+        
+        Файлы, у которых size и mtime совпадают с манифестом, не читаются.
+        Изменившиеся по stat файлы читаются и хэшируются; если хэш тот же,
+        обновляется только запись манифеста.
         
+        Args:
+            manifest: path -> (size, mtime, content_hash) из таблицы reference_files
+            progress: callback(done, total) для чтения файлов
+        """
+        manifest = manifest or {}
+        
+        references_dir = ReferencesImporter.find_references_dir()
         if not references_dir:
             print("[IMPORT] References directory not found!")
-            return [], {}
+            return ReferencesScan([], [], 0, [], {})
         
-        all_prompts = []
-        stats = {}
+        print(f"[IMPORT] Scanning {references_dir} ({len(manifest)} files in manifest)...")
         
-        print(f"[IMPORT] Starting import from {references_dir}")
-        print(f"[IMPORT] Scanning for ALL .md files recursively...")
-        
-        # Итерируем по всем папкам в references
+        candidates = []
         try:
-            for item in references_dir.iterdir():
-                if not item.is_dir():
-                    continue
-                
-                source_name = item.name
-                print(f"\n[IMPORT] Processing {source_name}...")
-                
-                # Проверяем разные структуры (с -main суффиксом или без)
-                search_paths = [
-                    item / item.name,  # Папка -main/-main структура
-                    item / f"{item.name[:-5]}" if item.name.endswith('-main') else None,  # Без -main
-                    item,  # Сама папка
-                ]
-                
-                for search_path in search_paths:
-                    if search_path is None or not search_path.exists():
-                        continue
-                    
-                    # Для agent-prompt-library используем специальную обработку agents.json
-                    if 'agent-prompt-library' in source_name.lower():
-                        agents_json = search_path / "agents.json"
-                        if agents_json.exists():
-                            try:
-                                with open(agents_json, 'r', encoding='utf-8') as f:
-                                    data = json.load(f)
-                                
-                                for agent in data.get('agents', []):
-                                    prompt_path = search_path / agent.get('path', '')
-                                    if prompt_path.exists():
-                                        with open(prompt_path, 'r', encoding='utf-8', errors='ignore') as f:
-                                            content = f.read()
-                                        
-                                        all_prompts.append({
-                                            'title': agent.get('name', agent.get('id', 'Unknown'))[:255],
-                                            'content': content,
-                                            'description': agent.get('description', ''),
-                                            'category': ReferencesImporter.FOLDER_TO_CATEGORY.get(
-                                                agent.get('category', 'development'), 'development'
-                                            ),
-                                            'tags': agent.get('tags', []),
-                                            'imported_from': source_name,
-                                            'source_id': agent.get('id', ''),
-                                        })
-                            except Exception as e:
-                                print(f"[IMPORT ERROR] Failed to parse agents.json: {e}")
-                    
-                    # Собираем все .md файлы
-                    prompts = ReferencesImporter.collect_all_md_files(search_path, source_name)
-                    if prompts:
-                        all_prompts.extend(prompts)
-                        stats[source_name] = len(prompts)
-                        print(f"[IMPORT] {source_name}: {len(prompts)} prompts collected")
-                        break
-        
+            for source_name, search_path in ReferencesImporter._source_roots(references_dir):
+                for file_path, size, mtime in ReferencesImporter._source_files(source_name, search_path):
+                    candidates.append((file_path, size, mtime, search_path, source_name))
         except Exception as e:
             print(f"[IMPORT ERROR] Error scanning references: {e}")
         
-        print(f"\n[IMPORT] Total imported: {len(all_prompts)} prompts")
-        return all_prompts, stats
+        seen = {file_path.relative_to(references_dir).as_posix() for file_path, *_ in candidates}
+        removed = [path for path in manifest if path not in seen]
+        return ReferencesImporter._build_scan(references_dir, candidates, manifest, removed, progress)
+    
+    @staticmethod
+    def scan_paths(paths: List[Path], manifest: Optional[Dict[str, Tuple[int, float, str]]] = None,
+                   progress: Optional[Callable] = None) -> ReferencesScan:
+        """
+        Как scan_references, но только для указанных путей (события watcher).
+        
+        Путь может быть файлом (.md или agents.json) или папкой; пропавшие
+        файлы и папки попадают в removed по манифесту.
+        """
+        manifest = manifest or {}
+        references_dir = ReferencesImporter.find_references_dir()
+        if not references_dir:
+            return ReferencesScan([], [], 0, [], {})
+        
+        roots = ReferencesImporter._source_roots(references_dir)
+        candidates = {}
+        removed = set()
+        for path in paths:
+            try:
+                rel_path = path.relative_to(references_dir).as_posix()
+            except ValueError:
+                continue
+            
+            if not path.exists():
+                prefix = rel_path + '/'
+                removed.update(p for p in manifest if p == rel_path or p.startswith(prefix))
+                continue
+            
+            root = next(((name, search_path) for name, search_path in roots
+                         if path == search_path or search_path in path.parents), None)
+            if root is None:
+                continue
+            source_name, search_path = root
+            
+            if path.is_dir():
+                files = ReferencesImporter.scan_md_files(path)
+            elif path.suffix == '.md' or ReferencesImporter._is_agents_json(path, source_name, search_path):
+                stat = path.stat()
+                files = [(path, stat.st_size, stat.st_mtime)]
+            else:
+                continue
+            for file_path, size, mtime in files:
+                candidates[file_path] = (file_path, size, mtime, search_path, source_name)
+        
+        return ReferencesImporter._build_scan(
+            references_dir, list(candidates.values()), manifest, sorted(removed), progress
+        )
+    
+    @staticmethod
+    def _is_agents_json(path: Path, source_name: str, search_path: Path) -> bool:
+        # Для agent-prompt-library используем специальную обработку agents.json
+        return 'agent-prompt-library' in source_name.lower() and path == search_path / "agents.json"
+    
+    @staticmethod
+    def _source_files(source_name: str, search_path: Path) -> List[Tuple[Path, int, float]]:
+        """Файлы источника: все .md и agents.json для agent-prompt-library"""
+        files = ReferencesImporter.scan_md_files(search_path)
+        agents_json = search_path / "agents.json"
+        if ReferencesImporter._is_agents_json(agents_json, source_name, search_path) and agents_json.exists():
+            stat = agents_json.stat()
+            files.append((agents_json, stat.st_size, stat.st_mtime))
+        return files
+    
+    @staticmethod
+    def _build_scan(references_dir: Path, candidates: List[Tuple], manifest: Dict,
+                    removed: List[str], progress: Optional[Callable]) -> ReferencesScan:
+        """
+        Сравнить кандидатов (путь, size, mtime, корень, источник) с манифестом,
+        прочитать изменившиеся и собрать ReferencesScan.
+        """
+        prompts, records, stats = [], [], {}
+        unchanged = errors = 0
+        jobs = []
+        stats_by_path = {}
+        for file_path, size, mtime, search_path, source_name in candidates:
+            rel_path = file_path.relative_to(references_dir).as_posix()
+            known = manifest.get(rel_path)
+            if known and known[0] == size and known[1] == mtime:
+                unchanged += 1
+                continue
+            stats_by_path[file_path] = (rel_path, size, mtime)
+            jobs.append((file_path, search_path, source_name))
+        
+        for file_path, content_hash, prompt in ReferencesImporter._read_files(jobs, progress):
+            if content_hash is None:
+                errors += 1
+                continue
+            rel_path, size, mtime = stats_by_path[file_path]
+            known = manifest.get(rel_path)
+            content_changed = not known or known[2] != content_hash
+            
+            if file_path.name == 'agents.json':
+                source_name = rel_path.split('/')[0]
+                found = ReferencesImporter._parse_agents_json(file_path, source_name) if content_changed else []
+                is_prompt = False
+            else:
+                found = [prompt] if prompt and content_changed else []
+                is_prompt = prompt is not None
+            
+            for data in found:
+                data['source_path'] = rel_path
+                prompts.append(data)
+                stats[data['imported_from']] = stats.get(data['imported_from'], 0) + 1
+            
+            records.append({
+                'path': rel_path,
+                'size': size,
+                'mtime': mtime,
+                'content_hash': content_hash,
+                'is_prompt': is_prompt,
+                'content_changed': content_changed,
+            })
+        
+        print(f"[IMPORT] {len(records)} new/changed files, {unchanged} unchanged, "
+              f"{len(removed)} removed, {len(prompts)} prompts to import")
+        return ReferencesScan(prompts, records, unchanged, removed, stats, errors)
+    
+    @staticmethod
+    def import_all_references() -> Tuple[List[Dict], Dict[str, int]]:
+        """Импортирует ВСЕ промпты из папки references"""
+        scan = ReferencesImporter.scan_references()
+        print(f"\n[IMPORT] Total imported: {len(scan.prompts)} prompts")
+        return scan.prompts, scan.stats
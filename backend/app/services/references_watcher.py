@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""
+Наблюдение за папкой references.
+
+Новые, изменённые и удалённые .md файлы (и agents.json) попадают в БД без
+полного пересканирования: события копятся, пока папка не успокоится
+(debounce), затем DatabaseInitializer.sync_references(paths=...) сверяет
+с манифестом только затронутые пути и импортирует то, что прошло
+is_likely_prompt.
+
+Источник событий - inotify (Linux, через ctypes, без зависимостей); на
+остальных системах - опрос mtime/size через os.scandir.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+# Тишина после последнего события, после которой изменения применяются
+DEBOUNCE_SECONDS = 0.5
+# Не копить изменения дольше этого при непрерывных событиях
+MAX_DELAY_SECONDS = 5.0
+# Интервал опроса для fallback без inotify
+POLL_INTERVAL_SECONDS = 2.0
+# Больше путей за раз - дешевле обычная инкрементальная синхронизация
+FULL_SYNC_THRESHOLD = 200
+
+# inotify(7)
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_CLOSE_WRITE | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF)
+_EVENT_HEADER = struct.Struct("iIII")
+
+# Маркер "нужна полная синхронизация" (переполнение очереди inotify)
+FULL_SYNC = Path("*")
+
+
+def _is_watched_file(name: str) -> bool:
+    return name.endswith(".md") or name == "agents.json"
+
+
+class _Inotify:
+    """Рекурсивное наблюдение через inotify"""
+
+    def __init__(self, root: Path):
+        libc_name = ctypes.util.find_library("c")
+        self._libc = ctypes.CDLL(libc_name or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs: Dict[int, Path] = {}
+        self.add_tree(root)
+
+    def add_tree(self, root: Path):
+        """Поставить наблюдение на папку и все вложенные"""
+        stack = [str(root)]
+        while stack:
+            current = stack.pop()
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(current), WATCH_MASK)
+            if wd < 0:
+                continue
+            self._dirs[wd] = Path(current)
+            try:
+                with os.scandir(current) as entries:
+                    stack.extend(e.path for e in entries if e.is_dir(follow_symlinks=False))
+            except OSError:
+                continue
+
+    def read(self, timeout: float) -> Set[Path]:
+        """Дождаться событий (не дольше timeout) и вернуть затронутые пути"""
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed: Set[Path] = set()
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0").decode("utf-8", "surrogateescape")
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                changed.add(FULL_SYNC)
+                continue
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None or not name:
+                continue
+
+            path = directory / name
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    self.add_tree(path)
+                changed.add(path)
+            elif _is_watched_file(name):
+                changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self._fd)
+
+
+class _Poller:
+    """Fallback: сравнение снимков (size, mtime) через os.scandir"""
+
+    def __init__(self, root: Path, interval: float = POLL_INTERVAL_SECONDS):
+        self._root = root
+        self._interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self) -> Dict[Path, Tuple[int, float]]:
+        snapshot = {}
+        stack = [str(self._root)]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif _is_watched_file(entry.name):
+                            stat = entry.stat()
+                            snapshot[Path(entry.path)] = (stat.st_size, stat.st_mtime)
+            except OSError:
+                continue
+        return snapshot
+
+    def read(self, timeout: float) -> Set[Path]:
+        time.sleep(min(timeout, self._interval))
+        snapshot = self._scan()
+        changed = {
+            path for path, stat in snapshot.items() if self._snapshot.get(path) != stat
+        }
+        changed.update(path for path in self._snapshot if path not in snapshot)
+        self._snapshot = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+
+class ReferencesWatcher:
+    """Фоновый поток: события папки -> debounce -> инкрементальный импорт"""
+
+    _thread: Optional[threading.Thread] = None
+    _stop = threading.Event()
+    backend: Optional[str] = None
+
+    @staticmethod
+    def _create_source(root: Path):
+        if sys.platform.startswith("linux"):
+            try:
+                return _Inotify(root)
+            except (OSError, AttributeError) as e:
+                print(f"[WATCH] inotify unavailable ({e}), falling back to polling")
+        return _Poller(root)
+
+    @staticmethod
+    def apply(paths: Set[Path]):
+        """Синхронизировать изменённые пути (или всё, если путей слишком много)"""
+        from app.services.db_initializer import DatabaseInitializer
+
+        def quiet(done: int, total: Optional[int] = None):
+            # Прогресс стартовой синхронизации (StartupStatus) не трогаем
+            pass
+
+        if FULL_SYNC in paths or len(paths) > FULL_SYNC_THRESHOLD:
+            DatabaseInitializer.sync_references(scan_progress=quiet, import_progress=quiet)
+        else:
+            DatabaseInitializer.sync_references(
+                scan_progress=quiet, import_progress=quiet, paths=sorted(paths)
+            )
+
+    @classmethod
+    def watch(cls, source, stop: threading.Event):
+        """Копить пути из source до затишья (debounce) и отдавать их в apply пачкой"""
+        pending: Set[Path] = set()
+        first_event = last_event = 0.0
+        while not stop.is_set():
+            changed = source.read(DEBOUNCE_SECONDS if pending else 1.0)
+            now = time.monotonic()
+            if changed:
+                if not pending:
+                    first_event = now
+                pending |= changed
+                last_event = now
+
+            settled = now - last_event >= DEBOUNCE_SECONDS
+            overdue = now - first_event >= MAX_DELAY_SECONDS
+            if pending and (settled or overdue):
+                batch, pending = pending, set()
+                print(f"[WATCH] {len(batch)} changed path(s) in references")
+                try:
+                    cls.apply(batch)
+                except Exception as e:
+                    print(f"[WATCH ERROR] Sync failed: {e}")
+
+    @classmethod
+    def start_background(cls) -> Optional[threading.Thread]:
+        """
+        Начать наблюдение после завершения стартовой синхронизации
+        (она уже сверила папку с манифестом целиком).
+        """
+        from app.services.references_importer import ReferencesImporter
+        from app.services.startup_status import StartupStatus
+
+        def run():
+            StartupStatus.ready.wait()
+            root = ReferencesImporter.find_references_dir()
+            if root is None:
+                print("[WATCH] References directory not found, watcher not started")
+                return
+
+            source = cls._create_source(root)
+            cls.backend = type(source).__name__.strip("_").lower()
+            print(f"[WATCH] Watching {root} ({cls.backend})")
+
+            try:
+                cls.watch(source, cls._stop)
+            finally:
+                source.close()
+
+        cls._stop.clear()
+        cls._thread = threading.Thread(target=run, name="pandora-references-watch", daemon=True)
+        cls._thread.start()
+        return cls._thread
+
+    @classmethod
+    def stop_background(cls):
+        cls._stop.set()
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+Состояние фоновой инициализации БД при старте.
+
+Инициализация идёт в отдельном потоке (см. DatabaseInitializer.start_background):
+сначала миграции, затем, для пустой БД, импорт из references. API начинает
+обслуживать запросы сразу после миграций, импорт продолжается в фоне.
+Прогресс отдаётся через /ready.
+
+Лаунчер, запускающий uvicorn в том же процессе, подписывается через
+on_serving() и получает вызов, как только сервер слушает порт и схема
+готова, без опроса /health.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+PHASE_PENDING = "pending"
+PHASE_MIGRATING = "migrating"
+PHASE_IMPORTING = "importing"
+PHASE_READY = "ready"
+PHASE_FAILED = "failed"
+
+
+class StartupStatus:
+    """Потокобезопасное состояние инициализации"""
+
+    _lock = threading.Lock()
+    phase: str = PHASE_PENDING
+    done: int = 0
+    total: int = 0
+    error: Optional[str] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    bound: bool = False
+    # Интервалы фаз по time.monotonic(): phase -> [start, end]
+    _spans: Dict[str, List[Optional[float]]] = {}
+
+    # Схема мигрирована - можно обслуживать API
+    schema_ready = threading.Event()
+    # Инициализация полностью завершена (включая импорт)
+    ready = threading.Event()
+    # Сервер слушает порт и схема готова
+    serving = threading.Event()
+    _serving_callbacks: List[Callable[[], None]] = []
+
+    @classmethod
+    def reset(cls):
+        """Вернуть состояние к исходному (новый запуск)"""
+        with cls._lock:
+            cls.phase = PHASE_PENDING
+            cls.done = cls.total = 0
+            cls.error = None
+            cls.started_at = cls.finished_at = None
+            cls.bound = False
+            cls._spans = {}
+            cls.schema_ready.clear()
+            cls.ready.clear()
+            cls.serving.clear()
+
+    @classmethod
+    def set_phase(cls, phase: str):
+        """Перейти к следующей фазе"""
+        with cls._lock:
+            now = time.monotonic()
+            if cls.started_at is None:
+                cls.started_at = now
+            cls._close_span(now)
+            cls._spans[phase] = [now, None]
+            cls.phase = phase
+            cls.done = cls.total = 0
+
+    @classmethod
+    def set_progress(cls, done: int, total: Optional[int] = None):
+        """Обновить прогресс текущей фазы"""
+        with cls._lock:
+            cls.done = done
+            if total is not None:
+                cls.total = total
+
+    @classmethod
+    def mark_schema_ready(cls):
+        cls.schema_ready.set()
+        cls._check_serving()
+
+    @classmethod
+    def mark_bound(cls):
+        """Сервер привязал сокет (вызывается после uvicorn startup)"""
+        with cls._lock:
+            cls.bound = True
+        cls._check_serving()
+
+    @classmethod
+    def mark_ready(cls):
+        with cls._lock:
+            cls.finished_at = time.monotonic()
+            cls._close_span(cls.finished_at)
+            cls.phase = PHASE_READY
+        cls.schema_ready.set()
+        cls.ready.set()
+        cls._check_serving()
+
+    @classmethod
+    def mark_failed(cls, error: str):
+        # Не держим ожидающих вечно: API отвечает как сможет, /ready сообщает ошибку
+        with cls._lock:
+            cls.finished_at = time.monotonic()
+            cls._close_span(cls.finished_at)
+            cls.phase = PHASE_FAILED
+            cls.error = error
+        cls.schema_ready.set()
+        cls.ready.set()
+        cls._check_serving()
+
+    @classmethod
+    def on_serving(cls, callback: Callable[[], None]):
+        """
+        Вызвать callback один раз, когда сервер слушает порт и схема готова.
+        Если это уже так, вызывается сразу. Подписка переживает reset().
+        """
+        with cls._lock:
+            if not cls.serving.is_set():
+                cls._serving_callbacks.append(callback)
+                return
+        callback()
+
+    @classmethod
+    def _check_serving(cls):
+        with cls._lock:
+            if cls.serving.is_set() or not (cls.bound and cls.schema_ready.is_set()):
+                return
+            cls.serving.set()
+            callbacks, cls._serving_callbacks = cls._serving_callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"[STARTUP] Serving callback failed: {e}")
+
+    @classmethod
+    def _close_span(cls, now: float):
+        span = cls._spans.get(cls.phase)
+        if span is not None and span[1] is None:
+            span[1] = now
+
+    @classmethod
+    def timings(cls) -> Dict[str, Tuple[float, Optional[float]]]:
+        """
+        Интервалы фаз по time.monotonic() (end=None - фаза ещё идёт).
+        'init' - вся инициализация целиком.
+        """
+        with cls._lock:
+            result = {phase: (start, end) for phase, (start, end) in cls._spans.items()}
+            if cls.started_at is not None:
+                result["init"] = (cls.started_at, cls.finished_at)
+            return result
+
+    @classmethod
+    def snapshot(cls) -> Dict:
+        """Состояние для /ready"""
+        with cls._lock:
+            end = cls.finished_at or time.monotonic()
+            elapsed = end - cls.started_at if cls.started_at is not None else 0.0
+            return {
+                "ready": cls.phase == PHASE_READY,
+                "phase": cls.phase,
+                "serving": cls.schema_ready.is_set(),
+                "bound": cls.bound,
+                "progress": {
+                    "done": cls.done,
+                    "total": cls.total,
+                    "percent": round(100.0 * cls.done / cls.total, 1) if cls.total else None,
+                },
+                "error": cls.error,
+                "elapsed_seconds": round(elapsed, 3),
+            }
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Журнал использования промптов с почасовыми и посуточными агрегатами.
+
+Каждое использование пишется одной строкой в usage_events, а агрегаты
+usage_hourly / usage_daily обновляются инкрементально в той же транзакции.
+Аналитика по времени читает только агрегаты (сотни строк), а не сырые события.
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.db.models import UsageEvent, UsageHourly, UsageDaily
+
+
+GRANULARITIES = {
+    "hour": (UsageHourly, timedelta(hours=1)),
+    "day": (UsageDaily, timedelta(days=1)),
+}
+
+
+def floor_to_hour(moment: datetime) -> datetime:
+    """Округлить время вниз до начала часа"""
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def floor_to_day(moment: datetime) -> datetime:
+    """Округлить время вниз до начала суток"""
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class UsageService:
+    """Сервис учёта использования промптов"""
+
+    @staticmethod
+    def _increment_bucket(db: Session, model, bucket: datetime, prompt_id: int):
+        """Увеличить счётчик агрегата (upsert)"""
+        if db.get_bind().dialect.name == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+
+            stmt = insert(model).values(bucket=bucket, prompt_id=prompt_id, count=1)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[model.bucket, model.prompt_id],
+                set_={"count": model.count + 1},
+            )
+            db.execute(stmt)
+            return
+
+        updated = db.query(model).filter(
+            model.bucket == bucket,
+            model.prompt_id == prompt_id
+        ).update({model.count: model.count + 1}, synchronize_session=False)
+        if not updated:
+            db.add(model(bucket=bucket, prompt_id=prompt_id, count=1))
+
+    @staticmethod
+    def record_use(db: Session, prompt_id: int, used_at: Optional[datetime] = None) -> datetime:
+        """Записать событие использования и обновить агрегаты (без commit)"""
+        used_at = used_at or datetime.utcnow()
+
+        db.add(UsageEvent(prompt_id=prompt_id, used_at=used_at))
+        UsageService._increment_bucket(db, UsageHourly, floor_to_hour(used_at), prompt_id)
+        UsageService._increment_bucket(db, UsageDaily, floor_to_day(used_at), prompt_id)
+        return used_at
+
+    @staticmethod
+    def get_timeseries(
+        db: Session,
+        granularity: str = "day",
+        periods: int = 30,
+        prompt_id: Optional[int] = None,
+        now: Optional[datetime] = None
+    ) -> Dict:
+        """
+        Временной ряд использования по агрегатам.
+
+        Args:
+            granularity: 'hour' или 'day'
+            periods: Количество последних интервалов (включая текущий)
+            prompt_id: Ограничить рядом одного промпта
+
+        Returns:
+            Словарь с границами периода, суммой и рядом без пропусков
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity: {granularity}")
+
+        model, step = GRANULARITIES[granularity]
+        now = now or datetime.utcnow()
+        until = floor_to_hour(now) if granularity == "hour" else floor_to_day(now)
+        since = until - step * (periods - 1)
+
+        q = db.query(model.bucket, func.sum(model.count)).filter(model.bucket >= since)
+        if prompt_id is not None:
+            q = q.filter(model.prompt_id == prompt_id)
+        counts = {bucket: int(total or 0) for bucket, total in q.group_by(model.bucket).all()}
+
+        series: List[Dict] = []
+        bucket = since
+        while bucket <= until:
+            series.append({"bucket": bucket.isoformat(), "count": counts.get(bucket, 0)})
+            bucket += step
+
+        return {
+            "granularity": granularity,
+            "since": since.isoformat(),
+            "until": (until + step).isoformat(),
+            "total": sum(point["count"] for point in series),
+            "series": series,
+        }
+
+    @staticmethod
+    def get_period_total(db: Session, since: datetime, until: Optional[datetime] = None) -> int:
+        """Сумма использований за период по посуточным агрегатам"""
+        q = db.query(func.sum(UsageDaily.count)).filter(UsageDaily.bucket >= floor_to_day(since))
+        if until is not None:
+            q = q.filter(UsageDaily.bucket < floor_to_day(until))
+        return int(q.scalar() or 0)
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""
+Кэш статики фронтенда в памяти.
+
+Файл читается один раз (вместе с заранее сжатыми копиями .br/.gz), дальше
+ответ собирается из памяти: ETag, 304 на If-None-Match, Cache-Control.
+Файлы с хэшем содержимого в имени (app.3f2a9c1b.js) кэшируются клиентом
+навсегда (immutable), остальные - с обязательной проверкой ETag.
+
+В dev-режиме (watch=True) перед ответом файл сверяется по stat (mtime, размер)
+и перечитывается после правки; в собранном приложении диск не трогается.
+
+Собранный фронтенд (desktop/frontend_bundler.py) лежит в dist/ вместе с
+manifest.json: его список immutable задаёт файлы, которые не меняются никогда.
+"""
+
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import stat
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Mapping, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.types import Receive, Scope, Send
+
+from app.compression import PRECOMPRESSED, negotiate_encoding
+
+# Крупнее этого файл не держится в памяти (отдаётся с диска)
+MAX_CACHED_SIZE = 4 * 1024 * 1024
+# Сколько несуществующих путей помнить (SPA-маршруты, опечатки)
+MAX_MISSING_CACHED = 1024
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# <name>.<hex-хэш от 8 символов>.<ext>
+HASHED_NAME = re.compile(r"\.[0-9a-f]{8,}\.[A-Za-z0-9]+$")
+
+BUNDLE_DIR = "dist"
+MANIFEST_NAME = "manifest.json"
+
+
+def normalize_path(path: str) -> Optional[str]:
+    """Относительный путь внутри папки фронтенда или None (выход за её пределы)"""
+    parts = []
+    for part in path.replace("\\", "/").split("/"):
+        if part in ("", "."):
+            continue
+        if part == ".." or ":" in part or "\0" in part:
+            return None
+        parts.append(part)
+    return "/".join(parts)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match совпадает с ETag (слабое сравнение)"""
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    plain = etag[2:] if etag.startswith("W/") else etag
+    return "*" in tags or any((tag[2:] if tag.startswith("W/") else tag) == plain for tag in tags)
+
+
+def load_manifest(root: Path) -> Optional[dict]:
+    """manifest.json собранного фронтенда (None - сборки нет или файл битый)"""
+    try:
+        manifest = json.loads((root / BUNDLE_DIR / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or not isinstance(manifest.get("index"), str):
+        return None
+    return manifest
+
+
+def manifest_paths(manifest: dict) -> Tuple[str, Iterable[str]]:
+    """(index.html, immutable-файлы) манифеста - пути относительно папки фронтенда"""
+    return (f"{BUNDLE_DIR}/{manifest['index']}",
+            [f"{BUNDLE_DIR}/{name}" for name in manifest.get("immutable", [])])
+
+
+class StaticAsset:
+    """Файл фронтенда в памяти со сжатыми вариантами"""
+
+    __slots__ = ("path", "media_type", "immutable", "stamp", "variants")
+
+    def __init__(self, path: Path, rel_path: str, stamp: Tuple[int, int], immutable: bool = False):
+        self.path = path
+        self.media_type = mimetypes.guess_type(rel_path)[0] or "application/octet-stream"
+        if self.media_type.startswith("text/") or self.media_type == "application/javascript":
+            self.media_type += "; charset=utf-8"
+        self.immutable = immutable or bool(HASHED_NAME.search(rel_path))
+        self.stamp = stamp
+        # encoding ("" - без сжатия) -> (тело, ETag); None - файл слишком большой
+        self.variants: Optional[Dict[str, Tuple[bytes, str]]] = None
+
+        if stamp[1] > MAX_CACHED_SIZE:
+            return
+        body = path.read_bytes()
+        digest = hashlib.sha1(body).hexdigest()[:20]
+        self.variants = {"": (body, f'"{digest}"')}
+        for encoding, suffix in PRECOMPRESSED:
+            sibling = path.with_name(path.name + suffix)
+            try:
+                if sibling.stat().st_mtime_ns < stamp[0]:
+                    continue  # копия старше исходника
+                self.variants[encoding] = (sibling.read_bytes(), f'"{digest}-{encoding}"')
+            except OSError:
+                continue
+
+    def response(self, headers: Mapping[str, str], cache_control: Optional[str] = None) -> Response:
+        """Ответ с учётом Accept-Encoding и If-None-Match"""
+        cache_control = cache_control or (
+            IMMUTABLE_CACHE_CONTROL if self.immutable else REVALIDATE_CACHE_CONTROL
+        )
+        if self.variants is None:
+            return FileResponse(self.path, media_type=self.media_type,
+                                headers={"Cache-Control": cache_control})
+
+        encoding = ""
+        if len(self.variants) > 1:
+            available = [enc for enc, _ in PRECOMPRESSED if enc in self.variants]
+            encoding = negotiate_encoding(headers.get("accept-encoding", ""), available) or ""
+        body, etag = self.variants[encoding]
+
+        response_headers = {"ETag": etag, "Cache-Control": cache_control}
+        if len(self.variants) > 1:
+            response_headers["Vary"] = "Accept-Encoding"
+        if_none_match = headers.get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=response_headers)
+        if encoding:
+            response_headers["Content-Encoding"] = encoding
+        return Response(body, media_type=self.media_type, headers=response_headers)
+
+
+class StaticAssets:
+    """Кэш файлов папки фронтенда"""
+
+    def __init__(self, root: Path, watch: bool = False, immutable: Iterable[str] = ()):
+        self.root = root
+        self.watch = watch
+        # Файлы из манифеста сборки: immutable и без проверки stat даже при watch
+        self.immutable = frozenset(filter(None, map(normalize_path, immutable)))
+        self._assets: Dict[str, StaticAsset] = {}
+        self._missing: set = set()
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> Optional[StaticAsset]:
+        """Файл по относительному пути (None - нет такого файла или путь вне папки)"""
+        rel_path = normalize_path(path)
+        if not rel_path:
+            return None
+
+        asset = self._assets.get(rel_path)
+        if asset is not None and (not self.watch or rel_path in self.immutable):
+            return asset
+        if asset is None and not self.watch and rel_path in self._missing:
+            return None
+
+        full_path = self.root / rel_path
+        try:
+            stat_result = os.stat(full_path)
+        except OSError:
+            stat_result = None
+        if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+            with self._lock:
+                self._assets.pop(rel_path, None)
+                if len(self._missing) < MAX_MISSING_CACHED:
+                    self._missing.add(rel_path)
+            return None
+
+        stamp = (stat_result.st_mtime_ns, stat_result.st_size)
+        if asset is not None and asset.stamp == stamp:
+            return asset
+        asset = StaticAsset(full_path, rel_path, stamp, immutable=rel_path in self.immutable)
+        with self._lock:
+            self._assets[rel_path] = asset
+            self._missing.discard(rel_path)
+        return asset
+
+    def response(self, path: str, headers: Mapping[str, str]) -> Optional[Response]:
+        asset = self.get(path)
+        return asset.response(headers) if asset is not None else None
+
+    def clear(self):
+        with self._lock:
+            self._assets.clear()
+            self._missing.clear()
+
+
+class StaticAssetsApp:
+    """ASGI-приложение для app.mount: подпапка prefix кэша StaticAssets"""
+
+    def __init__(self, assets: StaticAssets, prefix: str):
+        self.assets = assets
+        self.prefix = prefix.strip("/")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["method"] not in ("GET", "HEAD"):
+            response = Response("Method Not Allowed", status_code=405, headers={"Allow": "GET, HEAD"})
+        else:
+            path = scope["path"]
+            root_path = scope.get("root_path", "")
+            if root_path and path.startswith(root_path):
+                path = path[len(root_path):]
+            response = self.assets.response(f"{self.prefix}/{path}", Headers(scope=scope))
+            if response is None:
+                response = Response("Not Found", status_code=404, media_type="text/plain")
+        await response(scope, receive, send)
@@ -1,6 +1,6 @@
 import json
 from pathlib import Path
-from typing import List
+from typing import BinaryIO, Iterator, List, Optional
 from app.config import settings
 from app.models.schemas import PromptCreate, CategoryEnum
 
@@ -35,6 +35,20 @@ class PromptImporter:
         
         return prompts
     
+    @staticmethod
+    def iter_json_stream(stream: BinaryIO, source_name: str) -> Iterator[Optional[PromptCreate]]:
+        """
+        Потоково разобрать JSON-массив, обёртку {"prompts"/"agents": [...]}
+        или NDJSON. Невалидные элементы отдаются как None (для подсчёта).
+        """
+        from app.utils.json_stream import JsonStreamParser
+        
+        for key, item in JsonStreamParser.iter_stream(stream):
+            if key == 'agents':
+                yield PromptImporter._parse_agent(item, source_name)
+            else:
+                yield PromptImporter._parse_prompt(item, source_name)
+    
     @staticmethod
     def _parse_prompt(item: dict, source_name: str) -> PromptCreate:
         """Парсирует одиночный промпт из JSON"""
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+Инкрементальный разбор JSON из потока.
+
+Поддерживаемые форматы:
+    [ {...}, {...} ]                  - JSON-массив
+    {"prompts": [...]} / {"agents": [...]} - обёртка (ключ первым)
+    {...}\\n{...}\\n                    - NDJSON (и просто подряд идущие значения)
+
+Элементы отдаются по мере чтения, поэтому память ограничена размером
+одного элемента, а не всего файла.
+"""
+
+import codecs
+import json
+from typing import Any, BinaryIO, Iterator, List, Optional, Tuple
+
+# Размер блока чтения из потока
+CHUNK_SIZE = 64 * 1024
+# Максимальный размер одного элемента (защита от бесконечного буфера
+# на битом JSON, когда ошибка неотличима от незаконченного значения)
+MAX_ITEM_SIZE = 16 * 1024 * 1024
+# Ключи обёртки, значения которых стримятся поэлементно
+ITEM_KEYS = ("prompts", "agents")
+
+_WHITESPACE = " \t\r\n"
+
+Item = Tuple[Optional[str], Any]
+
+
+class JsonStreamParser:
+    """
+    Потоковый парсер: feed() принимает очередной блок байт и возвращает
+    элементы, которые уже можно разобрать, close() - остаток.
+    Каждый элемент - (ключ обёртки или None, значение).
+    """
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self._json = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self._state = "start"
+        self._key: Optional[str] = None
+        self.items_count = 0
+
+    def feed(self, chunk: bytes) -> List[Item]:
+        """Добавить блок данных"""
+        self._buf = self._buf[self._pos:] + self._decoder.decode(chunk)
+        self._pos = 0
+        return self._parse()
+
+    def close(self) -> List[Item]:
+        """Конец потока: разобрать остаток и проверить, что JSON завершён"""
+        self._buf = self._buf[self._pos:] + self._decoder.decode(b"", final=True)
+        self._pos = 0
+        self._eof = True
+        items = self._parse()
+        if self._state in ("array_first", "array_value", "array_sep"):
+            raise ValueError("Unexpected end of JSON: array is not closed")
+        return items
+
+    @classmethod
+    def iter_stream(cls, stream: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Iterator[Item]:
+        """Читать бинарный поток блоками и отдавать элементы"""
+        parser = cls()
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            yield from parser.feed(chunk)
+        yield from parser.close()
+
+    # ---------------------------------------------------------------
+
+    def _skip_ws(self) -> str:
+        """Пропустить пробелы; '' - данных пока нет"""
+        buf, pos = self._buf, self._pos
+        while pos < len(buf) and buf[pos] in _WHITESPACE:
+            pos += 1
+        self._pos = pos
+        return buf[pos] if pos < len(buf) else ""
+
+    def _error(self, message: str):
+        raise ValueError(f"{message} (item {self.items_count + 1})")
+
+    def _value(self, start: Optional[int] = None):
+        """
+        Разобрать значение с текущей позиции.
+        Returns: (True, value, end) или (False, None, None) - нужно больше данных
+        """
+        start = self._pos if start is None else start
+        try:
+            value, end = self._json.raw_decode(self._buf, start)
+        except json.JSONDecodeError as e:
+            if self._eof:
+                self._error(f"Invalid JSON: {e.msg}")
+            if len(self._buf) - start > MAX_ITEM_SIZE:
+                self._error("Invalid JSON or item too large")
+            return False, None, None
+        # Число в конце буфера может продолжиться в следующем блоке ("3." + "25")
+        if isinstance(value, (int, float)) and not self._eof:
+            if end == len(self._buf) or self._buf[end] not in _WHITESPACE + ",]}":
+                return False, None, None
+        return True, value, end
+
+    def _parse(self) -> List[Item]:
+        items: List[Item] = []
+        while True:
+            state = self._state
+
+            if state == "done":
+                # Хвост обёртки (другие ключи) не нужен
+                self._pos = len(self._buf)
+                return items
+
+            ch = self._skip_ws()
+            if not ch:
+                return items
+
+            if state == "start":
+                if ch == "[":
+                    self._pos += 1
+                    self._state = "array_first"
+                elif ch == "{":
+                    wrapper = self._wrapper_key()
+                    if wrapper is None:
+                        return items
+                    if not wrapper:
+                        self._state = "values"
+                else:
+                    self._error("Expected JSON array, object or NDJSON")
+
+            elif state == "array_first":
+                if ch == "]":
+                    self._pos += 1
+                    self._state = "done"
+                else:
+                    self._state = "array_value"
+
+            elif state == "array_value":
+                ok, value, end = self._value()
+                if not ok:
+                    return items
+                self._pos = end
+                self._state = "array_sep"
+                items.append((self._key, value))
+                self.items_count += 1
+
+            elif state == "array_sep":
+                if ch == ",":
+                    self._pos += 1
+                    self._state = "array_value"
+                elif ch == "]":
+                    self._pos += 1
+                    self._state = "done"
+                else:
+                    self._error("Expected ',' or ']'")
+
+            elif state == "values":
+                ok, value, end = self._value()
+                if not ok:
+                    return items
+                self._pos = end
+                items.extend(self._expand(value))
+
+    def _wrapper_key(self) -> Optional[bool]:
+        """
+        Объект в начале потока: обёртка {"prompts": [...]} или первая строка NDJSON.
+        Returns: True - обёртка, False - поток значений, None - нужно больше данных
+        """
+        buf = self._buf
+        pos = self._pos + 1
+        while pos < len(buf) and buf[pos] in _WHITESPACE:
+            pos += 1
+        if pos >= len(buf):
+            return None if not self._eof else False
+        if buf[pos] != '"':
+            return False
+
+        ok, key, end = self._value(pos)
+        if not ok:
+            return None
+        if key not in ITEM_KEYS:
+            return False
+
+        # "key" : [
+        while end < len(buf) and buf[end] in _WHITESPACE + ":":
+            end += 1
+        if end >= len(buf):
+            return None if not self._eof else False
+        if buf[end] != "[" or ":" not in buf[pos:end]:
+            return False
+
+        self._key = key
+        self._pos = end + 1
+        self._state = "array_first"
+        return True
+
+    def _expand(self, value) -> List[Item]:
+        """Значение из потока: обёртку и массив раскрываем в элементы"""
+        if isinstance(value, list):
+            items = [(None, item) for item in value]
+        elif isinstance(value, dict) and any(isinstance(value.get(k), list) for k in ITEM_KEYS):
+            key = next(k for k in ITEM_KEYS if isinstance(value.get(k), list))
+            items = [(key, item) for item in value[key]]
+        else:
+            items = [(None, value)]
+        self.items_count += len(items)
+        return items
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Предварительное сжатие статики фронтенда (шаг сборки).
+
+Рядом с каждым текстовым файлом крупнее порога создаются file.gz и, если
+установлен пакет brotli, file.br; сервер отдаёт их без сжатия на лету
+(app.compression). Актуальные копии не пересоздаются.
+
+    python -m app.utils.precompress ../frontend
+"""
+
+import gzip
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Iterable
+
+try:
+    import brotli
+except ImportError:  # brotli - необязательная зависимость
+    brotli = None
+
+PRECOMPRESS_SUFFIXES = (".js", ".mjs", ".css", ".html", ".json", ".svg", ".txt", ".map")
+# Файлы меньше этого отдаются как есть
+PRECOMPRESS_MIN_SIZE = 1024
+
+
+def _write_if_smaller(target: Path, data: bytes, original_size: int, mtime_ns: int) -> bool:
+    if len(data) >= original_size:
+        target.unlink(missing_ok=True)
+        return False
+    tmp_path = target.with_name(f".{target.name}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, target)
+    # mtime копии точно как у исходника (в нс: float теряет точность) -
+    # по нему сервер проверяет актуальность
+    os.utime(target, ns=(mtime_ns, mtime_ns))
+    return True
+
+
+def precompress_file(path: Path) -> Dict[str, bool]:
+    """Создать .gz/.br копии файла; возвращает, какие копии записаны"""
+    source = path.stat()
+    written = {}
+    variants = [("gzip", ".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(("br", ".br", lambda data: brotli.compress(data, quality=11)))
+
+    data = None
+    for encoding, suffix, compressor in variants:
+        target = path.with_name(path.name + suffix)
+        if target.exists() and target.stat().st_mtime_ns >= source.st_mtime_ns:
+            continue
+        if data is None:
+            data = path.read_bytes()
+        written[encoding] = _write_if_smaller(target, compressor(data), source.st_size, source.st_mtime_ns)
+    return written
+
+
+def precompress_tree(roots: Iterable[Path], min_size: int = PRECOMPRESS_MIN_SIZE) -> Dict[str, int]:
+    """Сжать все подходящие файлы в папках; статистика по кодировкам"""
+    stats = {"files": 0, "gzip": 0, "br": 0}
+    for root in roots:
+        for path in Path(root).rglob("*"):
+            if (not path.is_file() or path.suffix not in PRECOMPRESS_SUFFIXES
+                    or path.stat().st_size < min_size):
+                continue
+            stats["files"] += 1
+            for encoding, done in precompress_file(path).items():
+                stats[encoding] += int(done)
+    return stats
+
+
+def main(argv=None) -> int:
+    roots = [Path(arg) for arg in (argv if argv is not None else sys.argv[1:])]
+    if not roots:
+        print("Usage: python -m app.utils.precompress <dir> [<dir> ...]")
+        return 2
+    stats = precompress_tree(roots)
+    print(f"[PRECOMPRESS] {stats['files']} files: {stats['gzip']} .gz, {stats['br']} .br written"
+          + ("" if brotli is not None else " (brotli not installed)"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,20 +4,29 @@ Pytest configuration and fixtures for PANDORA tests
 
 import pytest
 import tempfile
+from types import SimpleNamespace
 from pathlib import Path
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
 # Импортируем app и models
 import sys
 from pathlib import Path
 
-project_root = Path(__file__).parent.parent.parent
-sys.path.insert(0, str(project_root))
+backend_root = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_root))
 
-from backend.app.main import app
-from backend.app.database import Base, get_db
+# Тесты работают на своей БД в памяти: фоновую инициализацию рабочей БД не запускаем
+import os
+os.environ["INIT_DB_ON_STARTUP"] = "False"
+os.environ["PROMPTS_MIRROR"] = "False"
+os.environ["WATCH_REFERENCES"] = "False"
+
+from app.main import app
+from app.db import get_db
+from app.db.migrations import run_migrations
 
 
 @pytest.fixture(scope="session")
@@ -26,11 +35,12 @@ def test_db():
     # Используем SQLite в памяти для быстрых тестов
     engine = create_engine(
         "sqlite:///:memory:",
-        connect_args={"check_same_thread": False}
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
     )
     
-    # Создаём все таблицы
-    Base.metadata.create_all(bind=engine)
+    # Создаём схему тем же путём, что и приложение
+    run_migrations(engine)
     
     return engine
 
@@ -63,6 +73,40 @@ def client(db_session):
         yield test_client
     
     app.dependency_overrides.clear()
+    # Данные откатываются вместе с транзакцией, кэш снимка тоже сбрасываем
+    from app.services.dashboard_service import DashboardService
+    DashboardService.invalidate()
+
+
+@pytest.fixture
+def files(tmp_path, monkeypatch):
+    """Отдельный FileService с данными во временной папке"""
+    from app.services import file_service as file_service_module
+    from app.services.file_service import FileService
+    service = FileService(tmp_path)
+    monkeypatch.setattr(file_service_module, "file_service", service)
+    return service
+
+
+@pytest.fixture
+def references(tmp_path, monkeypatch):
+    """
+    Папка references во временной папке и своя файловая БД: синхронизация
+    (DatabaseInitializer) открывает сессии через app.db.SessionLocal и коммитит.
+    """
+    import app.db
+    from app.services.references_importer import ReferencesImporter
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'references.db'}", connect_args={"check_same_thread": False})
+    run_migrations(engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(app.db, "SessionLocal", session_factory)
+
+    root = tmp_path / "references"
+    (root / "library").mkdir(parents=True)
+    monkeypatch.setattr(ReferencesImporter, "find_references_dir", staticmethod(lambda: root))
+    yield SimpleNamespace(root=root, source=root / "library", session=session_factory)
+    engine.dispose()
 
 
 @pytest.fixture
@@ -71,7 +115,7 @@ def sample_prompt_data():
     return {
         "title": "Test Prompt",
         "content": "This is a test prompt content",
-        "category": "general",
+        "category": "custom",
         "tags": []
     }
 
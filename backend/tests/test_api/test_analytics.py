@@ -0,0 +1,89 @@
+"""
+API Tests for analytics endpoints
+"""
+
+import pytest
+from fastapi import status
+
+
+class TestUsageAnalytics:
+    """Тесты для журнала использования и /api/analytics/usage"""
+
+    def test_usage_series_counts_uses(self, client, sample_prompt_data):
+        """Каждое использование попадает в посуточный агрегат"""
+        prompt_id = client.post("/api/prompts", json=sample_prompt_data).json()["id"]
+        for _ in range(3):
+            client.post(f"/api/prompts/{prompt_id}/use")
+
+        response = client.get("/api/analytics/usage?granularity=day&periods=7")
+        assert response.status_code == status.HTTP_200_OK
+
+        data = response.json()
+        assert len(data["series"]) == 7
+        assert data["series"][-1]["count"] >= 3
+
+    def test_usage_series_per_prompt_hourly(self, client, sample_prompt_data):
+        """Почасовой ряд фильтруется по промпту"""
+        prompt_id = client.post("/api/prompts", json=sample_prompt_data).json()["id"]
+        client.post(f"/api/prompts/{prompt_id}/use")
+
+        response = client.get(f"/api/analytics/usage?granularity=hour&periods=24&prompt_id={prompt_id}")
+        assert response.status_code == status.HTTP_200_OK
+
+        data = response.json()
+        assert data["total"] == 1
+        assert data["series"][-1]["count"] == 1
+
+    def test_usage_removed_with_prompt(self, client, sample_prompt_data, db_session):
+        """Удаление промпта каскадно удаляет его журнал и агрегаты использования"""
+        from app.db.models import UsageDaily, UsageEvent, UsageHourly
+
+        prompt_id = client.post("/api/prompts", json=sample_prompt_data).json()["id"]
+        client.post(f"/api/prompts/{prompt_id}/use")
+        client.delete(f"/api/prompts/{prompt_id}")
+
+        for model in (UsageEvent, UsageHourly, UsageDaily):
+            assert db_session.query(model).filter(model.prompt_id == prompt_id).count() == 0
+        response = client.get(f"/api/analytics/usage?granularity=day&periods=7&prompt_id={prompt_id}")
+        assert response.json()["total"] == 0
+
+    def test_usage_invalid_granularity(self, client):
+        """Неизвестная гранулярность отклоняется"""
+        response = client.get("/api/analytics/usage?granularity=week")
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def test_insights_without_errors(self, client):
+        """Insights больше не падают на отсутствующем last_used_at"""
+        response = client.get("/api/analytics/insights")
+        assert response.status_code == status.HTTP_200_OK
+        assert "error" not in response.json()
+
+
+class TestDashboardSnapshot:
+    """Тесты кэшированного снимка дашборда"""
+
+    def test_dashboard_reflects_writes(self, client, sample_prompt_data):
+        """Запись инвалидирует кэш снимка"""
+        before = client.get("/api/analytics/dashboard").json()["totals"]["prompts"]
+        client.post("/api/prompts", json=sample_prompt_data)
+
+        after = client.get("/api/analytics/dashboard").json()["totals"]["prompts"]
+        assert after == before + 1
+
+    def test_stats_and_summary_agree(self, client, sample_prompt_data):
+        """/api/stats и /api/analytics/summary читают один снимок"""
+        client.post("/api/prompts", json=sample_prompt_data)
+
+        stats = client.get("/api/stats").json()
+        summary = client.get("/api/analytics/summary").json()
+        assert stats["total_prompts"] == summary["total_prompts"]
+        assert stats["total_tags"] == summary["total_tags"]
+        assert len(stats["top_prompts"]) <= 5
+
+    def test_counters_follow_deletes(self, client, sample_prompt_data):
+        """Счётчики уменьшаются при удалении промпта"""
+        prompt_id = client.post("/api/prompts", json=sample_prompt_data).json()["id"]
+        before = client.get("/api/stats").json()["total_prompts"]
+
+        client.delete(f"/api/prompts/{prompt_id}")
+        assert client.get("/api/stats").json()["total_prompts"] == before - 1
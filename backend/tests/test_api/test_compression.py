@@ -0,0 +1,61 @@
+"""
+Tests for response compression
+"""
+
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.compression import CompressionMiddleware, choose_encoding, negotiate_encoding
+
+
+class TestCompression:
+    """Тесты для сжатия ответов API и заранее сжатой статики"""
+
+    def test_large_api_response_is_gzipped(self, client):
+        """Крупный JSON сжимается, если клиент принимает gzip"""
+        for i in range(20):
+            client.post("/api/prompts", json={"title": f"Prompt {i}", "content": "text " * 50})
+
+        response = client.get("/api/prompts?limit=20", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert len(response.json()) == 20
+
+        plain = client.get("/api/prompts?limit=20", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in plain.headers
+
+    def test_small_response_not_compressed(self, client):
+        """Ответы меньше порога отдаются как есть"""
+        response = client.get("/api/tags", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+
+    def test_head_not_compressed(self):
+        """HEAD отдаёт заголовки несжатого ответа: Content-Length без Content-Encoding"""
+        body = "text " * 1000
+        app = Starlette(routes=[Route("/api/data", lambda request: PlainTextResponse(body))])
+        client = TestClient(CompressionMiddleware(app))
+
+        head = client.head("/api/data", headers={"Accept-Encoding": "gzip"})
+        assert head.status_code == 200
+        assert "content-encoding" not in head.headers
+        assert head.headers["content-length"] == str(len(body))
+        assert client.get("/api/data", headers={"Accept-Encoding": "gzip"}).headers["content-encoding"] == "gzip"
+
+    def test_negotiation(self):
+        """q=0 исключает кодировку"""
+        assert choose_encoding("gzip;q=0, deflate") is None
+        assert choose_encoding("deflate, gzip") == "gzip"
+
+    def test_negotiation_q_values(self):
+        """Выбирается кодировка с наибольшим q, q=0 запрещает её, при равенстве - br"""
+        available = ("br", "gzip")
+        assert negotiate_encoding("gzip;q=1, br;q=0.1", available) == "gzip"
+        assert negotiate_encoding("br;q=0, gzip;q=0.5", available) == "gzip"
+        assert negotiate_encoding("br;q=0, gzip;q=0", available) is None
+        assert negotiate_encoding("gzip, br", available) == "br"
+        assert negotiate_encoding("gzip;q=0.5, *;q=0.8", available) == "br"
+        assert negotiate_encoding("*, br;q=0", available) == "gzip"
+        assert negotiate_encoding("GZIP ; q=0.7", available) == "gzip"
+        assert choose_encoding("br;q=0, gzip") == "gzip"
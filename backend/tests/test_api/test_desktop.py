@@ -0,0 +1,288 @@
+"""
+Tests for the desktop build and launcher helpers (frontend bundler, import
+profiler, startup timeline)
+"""
+
+import builtins
+import json
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+desktop_root = Path(__file__).parent.parent.parent.parent / "desktop"
+sys.path.insert(0, str(desktop_root))
+
+import startup_timeline
+from frontend_bundler import BundleError, bundle_frontend, minify_css, minify_js, transform_module
+from import_profiler import ImportProfiler
+from startup_timeline import HISTORY_FILE, TIMELINE_FILE, StartupTimeline
+
+requires_node = pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+
+
+def run_node(code: str) -> str:
+    return subprocess.run(["node", "-e", code], capture_output=True, text=True, check=True, timeout=30).stdout
+
+
+class TestFrontendBundler:
+    """Тесты для frontend_bundler"""
+
+    LITERALS = r"""
+const url = "http://example.com/*not a comment*/"; // comment one
+const single = 'it\'s // still a string';
+const re = /\/\/+|\/\*[^/]*/g;
+const inClass = /[/]+/;
+/* comment two */
+const t = `a // b ${ {k: "/* c */"}.k } ${`nested ${1 + 1}`} d`;
+let x = 10 / 2 / 5
+let y = x
+++y
+const f = function () {
+  return /=+/.source
+}
+print([url, single, re.source, inClass.source, t, x, y, f()]);
+"""
+
+    def test_minify_js_keeps_literals(self):
+        """Строки, regex и шаблоны с // и /* не задеваются, комментарии убраны"""
+        minified = minify_js(self.LITERALS)
+        for literal in ('"http://example.com/*not a comment*/"', "'it\\'s // still a string'",
+                        "/\\/\\/+|\\/\\*[^/]*/g", "/[/]+/", '`a // b ${', '"/* c */"'):
+            assert literal in minified
+        assert "comment one" not in minified and "comment two" not in minified
+        assert "let y=x\n++y" in minified
+
+    @requires_node
+    def test_minify_js_same_result(self):
+        """Минифицированный код вычисляет то же, что исходный (в том числе ASI)"""
+        prelude = "const print = (value) => console.log(JSON.stringify(value));\n"
+        assert run_node(prelude + minify_js(self.LITERALS)) == run_node(prelude + self.LITERALS)
+
+    def test_minify_css(self):
+        """Комментарии и пробелы убираются, строки остаются"""
+        css = '/* header */\nbody {\n  color: red;\n  font-family: "A  B";\n}\na > b , c { margin: 0 auto; }\n'
+        assert minify_css(css) == 'body{color:red;font-family:"A  B"}a>b,c{margin:0 auto}\n'
+
+    def test_transform_module(self):
+        """import/export переписываются в __require/__exports, включая реэкспорт и default"""
+        src = "\n".join([
+            "import Api, { get, post as send } from './api.js';",
+            "import * as utils from '../utils/index.js';",
+            "import './side-effect.js';",
+            "export const answer = 42;",
+            "export function helper() { return import('./views/Lazy.js'); }",
+            "const hidden = 1;",
+            "export { hidden as visible };",
+            "export { format, parse as read } from '../utils/format.js';",
+            "export * from './all.js';",
+            "export * as extra from './extra.js';",
+            "export default class Widget {}",
+        ])
+        code, static_deps, dynamic_deps = transform_module("src/core/app.js", src)
+
+        assert static_deps == ["src/core/api.js", "src/utils/index.js", "src/core/side-effect.js",
+                               "src/utils/format.js", "src/core/all.js", "src/core/extra.js"]
+        assert dynamic_deps == ["src/core/views/Lazy.js"]
+        assert 'const Api = __require("src/core/api.js").default;' in code
+        assert 'const { get, post: send } = __require("src/core/api.js");' in code
+        assert 'const utils = __require("src/utils/index.js");' in code
+        assert '__import("src/core/views/Lazy.js")' in code
+        for line in ("__exports.answer = answer;", "__exports.helper = helper;", "__exports.visible = hidden;",
+                     "__exports.format = __reexport4.format;", "__exports.read = __reexport4.parse;",
+                     "__exports.extra = __reexport6;", "__exports.default = Widget;"):
+            assert line in code
+        assert "if (__name !== \"default\") __exports[__name] = __reexport5[__name];" in code
+        assert "export " not in code and "import " not in code
+
+        default_expression, _, _ = transform_module("src/a.js", "export default { name: 'a' };")
+        assert default_expression.startswith("__exports.default = { name: 'a' };")
+
+    def test_unsupported_syntax(self):
+        """Импорт пакета по имени и неизвестный синтаксис - BundleError"""
+        with pytest.raises(BundleError):
+            transform_module("src/a.js", "import lodash from 'lodash';")
+        with pytest.raises(BundleError):
+            transform_module("src/a.js", "export let a, b;")
+        with pytest.raises(BundleError):
+            transform_module("src/a.js", "export const { a, b } = obj;")
+
+    def _frontend(self, root: Path) -> Path:
+        files = {
+            "index.html": (
+                '<html><head><link rel="stylesheet" href="css/main.css">'
+                '<link rel="stylesheet" href="/css/extra.css"></head>\n\n<body>'
+                '<script type="module" src="src/core/app.js"></script></body></html>'
+            ),
+            "css/main.css": "body { color: red; }\n",
+            "src/css/extra.css": "/* extra */ a { color: blue; }\n",
+            "src/core/app.js": (
+                "import { greet } from '../utils/index.js';\n"
+                "export const lazy = () => import('../views/PromptsView.js');\n"
+                "window.result = greet('bundle');\n"
+            ),
+            "src/utils/index.js": "export * from './greet.js';\n",
+            "src/utils/greet.js": "export default 1;\nexport function greet(name) { return `hi ${name}`; }\n",
+            "src/views/PromptsView.js": "import { greet } from '../utils/greet.js';\nexport default greet;\n",
+        }
+        for name, content in files.items():
+            path = root / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(content, encoding="utf-8")
+        return root
+
+    def test_bundle_layout(self, tmp_path):
+        """dist: хэшированные app.js/css и чанк представления, index.html и manifest.json"""
+        frontend = self._frontend(tmp_path / "frontend")
+        manifest = bundle_frontend(frontend)
+        dist = frontend / "dist"
+
+        files = manifest["files"]
+        assert set(files) == {"app.js", "app.css", "PromptsView.js"}
+        assert manifest["immutable"] == sorted(files.values())
+        assert manifest["index"] == "index.html" and manifest["stylesheets"] == 2
+        assert manifest["modules"] == 4
+        assert json.loads((dist / "manifest.json").read_text(encoding="utf-8")) == manifest
+        assert sorted(path.name for path in dist.iterdir()) == sorted([*files.values(), "index.html", "manifest.json"])
+
+        html = (dist / "index.html").read_text(encoding="utf-8")
+        assert f'<link rel="stylesheet" href="/dist/{files["app.css"]}">' in html
+        assert f'<script src="/dist/{files["app.js"]}" defer></script>' in html
+        assert "type=\"module\"" not in html and html.count("<link") == 1
+        assert (dist / files["app.css"]).read_text(encoding="utf-8") == "body{color:red}\na{color:blue}\n"
+        app_js = (dist / files["app.js"]).read_text(encoding="utf-8")
+        assert f'"/dist/{files["PromptsView.js"]}"' in app_js
+        assert 'r.modules["src/views/PromptsView.js"]' not in app_js
+
+    @requires_node
+    def test_bundle_runs(self, tmp_path):
+        """Собранный app.js выполняется: реэкспорт и шаблон работают"""
+        frontend = self._frontend(tmp_path / "frontend")
+        app_js = frontend / "dist" / bundle_frontend(frontend)["files"]["app.js"]
+        output = run_node(f"globalThis.window = globalThis; require({json.dumps(str(app_js))}); "
+                          "console.log(window.result);")
+        assert output == "hi bundle\n"
+
+    def test_dist_guard(self, tmp_path):
+        """Прошлая сборка заменяется, чужая папка dist и ссылка не удаляются"""
+        frontend = self._frontend(tmp_path / "frontend")
+        first = bundle_frontend(frontend)
+        (frontend / "dist" / "stale.js").write_text("old", encoding="utf-8")
+        bundle_frontend(frontend)
+        assert not (frontend / "dist" / "stale.js").exists()
+        assert (frontend / "dist" / first["files"]["app.js"]).exists()
+
+        (frontend / "dist" / "manifest.json").unlink()
+        with pytest.raises(BundleError):
+            bundle_frontend(frontend)
+        assert (frontend / "dist" / first["files"]["app.js"]).exists()
+
+        shutil.rmtree(frontend / "dist")
+        (tmp_path / "elsewhere").mkdir()
+        (frontend / "dist").symlink_to(tmp_path / "elsewhere", target_is_directory=True)
+        with pytest.raises(BundleError):
+            bundle_frontend(frontend)
+
+
+class TestImportProfiler:
+    """Тесты для ImportProfiler"""
+
+    def test_records_nested_imports(self, tmp_path, monkeypatch):
+        """Модуль и его вложенный импорт записываются с self/cumulative и глубиной"""
+        (tmp_path / "profiled_outer.py").write_text("import profiled_inner\n", encoding="utf-8")
+        (tmp_path / "profiled_inner.py").write_text("VALUE = 1\n", encoding="utf-8")
+        monkeypatch.syspath_prepend(str(tmp_path))
+        for name in ("profiled_outer", "profiled_inner"):
+            monkeypatch.delitem(sys.modules, name, raising=False)
+
+        original = builtins.__import__
+        profiler = ImportProfiler()
+        profiler.install()
+        try:
+            import profiled_outer  # noqa: F401
+        finally:
+            profiler.uninstall()
+        assert builtins.__import__ is original
+
+        records = {record["module"]: record for record in profiler.records}
+        outer, inner = records["profiled_outer"], records["profiled_inner"]
+        assert (outer["depth"], inner["depth"]) == (0, 1)
+        assert outer["cumulative_ms"] >= inner["cumulative_ms"]
+        assert outer["self_ms"] <= outer["cumulative_ms"]
+        assert profiler.total_ms() == outer["cumulative_ms"]
+
+    def test_loaded_module_not_recorded(self):
+        """Уже загруженные модули идут быстрым путём без записи"""
+        profiler = ImportProfiler()
+        profiler.install()
+        try:
+            import json as _json  # noqa: F401
+        finally:
+            profiler.uninstall()
+        assert profiler.records == []
+
+    def test_report(self, tmp_path):
+        """Текстовый отчёт и JSON содержат модули и время до первого ответа"""
+        profiler = ImportProfiler()
+        profiler.records = [
+            {"module": "fast", "self_ms": 1.0, "cumulative_ms": 1.0, "depth": 0},
+            {"module": "slow", "self_ms": 9.0, "cumulative_ms": 12.0, "depth": 0},
+        ]
+
+        lines = profiler.format_report(limit=1, time_to_first_response=0.25)
+        assert lines[0] == "Imports: 2 modules, 13.0 ms total"
+        assert lines[1] == "Time to first response: 250.0 ms"
+        assert len(lines) == 4 and lines[-1].endswith("slow")
+
+        report = json.loads(profiler.write_report(tmp_path / "logs" / "profile.json").read_text(encoding="utf-8"))
+        assert report["modules"] == 2
+        assert report["total_import_ms"] == 13.0
+        assert report["time_to_first_response_ms"] is None
+        assert [record["module"] for record in report["slowest"]] == ["slow", "fast"]
+
+
+class TestStartupTimeline:
+    """Тесты для StartupTimeline"""
+
+    def test_spans_serialized(self):
+        """Фазы пишутся в мс от старта процесса, незавершённая фаза без длительности"""
+        timeline = StartupTimeline(origin=100.0)
+        timeline.start("splash", at=100.0)
+        timeline.end("splash", at=100.25)
+        timeline.record("import", 100.1, 100.6)
+        timeline.start("window", at=100.7)
+        timeline.end("missing", at=101.0)
+
+        data = timeline.to_dict()
+        assert [(p["name"], p["start_ms"], p["end_ms"], p["duration_ms"]) for p in data["phases"]] == [
+            ("splash", 0.0, 250.0, 250.0),
+            ("import", 100.0, 600.0, 500.0),
+            ("window", 700.0, None, None),
+        ]
+        assert data["total_ms"] == 600.0 and data["within_budget"]
+
+    def test_save_compares_with_previous(self, tmp_path):
+        """save возвращает прошлый запуск, сводка показывает разницу"""
+        first = StartupTimeline(origin=0.0)
+        first.record("import", 0.0, 0.5)
+        assert first.save(tmp_path) is None
+
+        second = StartupTimeline(origin=0.0)
+        second.record("import", 0.0, 0.3)
+        previous = second.save(tmp_path)
+        assert previous["phases"][0]["duration_ms"] == 500.0
+        assert second.format_summary(previous)[1].endswith("(-200 ms vs last run)")
+        assert json.loads((tmp_path / TIMELINE_FILE).read_text(encoding="utf-8"))["total_ms"] == 300.0
+
+    def test_history_capped(self, tmp_path, monkeypatch):
+        """История хранит только последние HISTORY_LIMIT запусков"""
+        monkeypatch.setattr(startup_timeline, "HISTORY_LIMIT", 3)
+        for run in range(5):
+            timeline = StartupTimeline(origin=0.0)
+            timeline.record("import", 0.0, run / 10)
+            timeline.save(tmp_path)
+
+        lines = (tmp_path / HISTORY_FILE).read_text(encoding="utf-8").splitlines()
+        assert [json.loads(line)["total_ms"] for line in lines] == [200.0, 300.0, 400.0]
@@ -0,0 +1,65 @@
+"""
+API Tests for health and readiness endpoints
+"""
+
+import pytest
+from fastapi import status
+
+from app.services.startup_status import StartupStatus, PHASE_IMPORTING
+
+
+class TestReadiness:
+    """Тесты для /ready"""
+
+    def test_ready_after_startup(self, client):
+        """Без фоновой инициализации приложение готово сразу"""
+        response = client.get("/ready")
+        assert response.status_code == status.HTTP_200_OK
+
+        data = response.json()
+        assert data["ready"] is True
+        assert data["serving"] is True
+
+    def test_ready_reports_import_progress(self, client):
+        """Во время импорта /ready отдаёт 503 и прогресс, API продолжает работать"""
+        StartupStatus.reset()
+        StartupStatus.set_phase(PHASE_IMPORTING)
+        StartupStatus.mark_schema_ready()
+        StartupStatus.set_progress(25, 100)
+        try:
+            response = client.get("/ready")
+            assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+            data = response.json()
+            assert data["phase"] == PHASE_IMPORTING
+            assert data["progress"]["percent"] == 25.0
+
+            assert client.get("/api/prompts").status_code == status.HTTP_200_OK
+        finally:
+            StartupStatus.mark_ready()
+
+    def test_serving_callback_fires_when_bound_and_migrated(self, client):
+        """Лаунчер получает сигнал только когда порт привязан и схема готова"""
+        calls = []
+        StartupStatus.reset()
+        try:
+            StartupStatus.on_serving(lambda: calls.append("serving"))
+            StartupStatus.mark_schema_ready()
+            assert calls == []
+
+            StartupStatus.mark_bound()
+            assert calls == ["serving"]
+            assert StartupStatus.serving.is_set()
+        finally:
+            StartupStatus.mark_ready()
+
+    def test_background_work_shares_app_engine(self):
+        """Инициализация и watcher берут сессии из app.db: соединение на поток, не одно общее"""
+        from sqlalchemy.pool import StaticPool
+        import app.db
+        import app.db.database
+
+        assert app.db.database.engine is app.db.engine
+        assert app.db.database.SessionLocal is app.db.SessionLocal
+        if ":memory:" not in str(app.db.engine.url):
+            assert not isinstance(app.db.engine.pool, StaticPool)
@@ -0,0 +1,203 @@
+"""
+API Tests for Import and Export endpoints
+"""
+
+import io
+import json
+import time
+import zipfile
+
+from fastapi import status
+
+
+class TestJsonImport:
+    """Тесты для /api/import/json"""
+    
+    def _upload(self, client, body: bytes, name: str = "prompts.json"):
+        return client.post(
+            "/api/import/json",
+            params={"source_name": "upload"},
+            files={"file": (name, body, "application/json")}
+        )
+    
+    def test_import_json_array(self, client):
+        """JSON-массив импортируется, ответ содержит только итоги"""
+        items = [{"title": f"Prompt {i}", "content": f"Content {i}"} for i in range(3)]
+        items.append({"title": "No content"})
+        
+        response = self._upload(client, json.dumps(items).encode("utf-8"))
+        assert response.status_code == status.HTTP_200_OK
+        
+        data = response.json()
+        assert data["imported_count"] == 3
+        assert data["skipped_count"] == 1
+        assert "prompts" not in data
+        
+        prompts = client.get("/api/prompts").json()
+        assert [p["title"] for p in prompts] == ["Prompt 0", "Prompt 1", "Prompt 2"]
+    
+    def test_import_ndjson_and_wrapper(self, client):
+        """NDJSON и обёртка {"prompts": [...]}"""
+        ndjson = "\n".join(
+            json.dumps({"title": f"Line {i}", "content": "text", "category": "writing"})
+            for i in range(2)
+        )
+        response = self._upload(client, ndjson.encode("utf-8"), "prompts.ndjson")
+        assert response.json()["imported_count"] == 2
+        
+        wrapper = {"prompts": [{"name": "Wrapped", "prompt": "text"}]}
+        response = self._upload(client, json.dumps(wrapper).encode("utf-8"))
+        assert response.json()["imported_count"] == 1
+        
+        titles = {p["title"] for p in client.get("/api/prompts").json()}
+        assert titles == {"Line 0", "Line 1", "Wrapped"}
+    
+    def test_import_invalid_json(self, client):
+        """Битый JSON - 400"""
+        response = self._upload(client, b'[{"title": "A", "content": "B"}, {"title": ')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class TestBatchImport:
+    """Тесты для /api/import/batch"""
+    
+    def test_batch_import_returns_ids(self, client):
+        """По умолчанию возвращаются только id и количество"""
+        tag_id = client.post("/api/tags", json={"name": "batch"}).json()["id"]
+        payload = {
+            "import_source": "batch-test",
+            "prompts": [
+                {"title": f"Batch {i}", "content": "text", "tag_ids": [tag_id, 999]}
+                for i in range(5)
+            ]
+        }
+        
+        response = client.post("/api/import/batch", json=payload)
+        assert response.status_code == status.HTTP_200_OK
+        
+        data = response.json()
+        assert data["imported_count"] == 5
+        assert len(data["prompt_ids"]) == 5
+        assert "prompts" not in data
+        
+        prompt = client.get(f"/api/prompts/{data['prompt_ids'][0]}").json()
+        assert prompt["title"] == "Batch 0"
+        assert prompt["imported_from"] == "batch-test"
+        assert [t["id"] for t in prompt["tags"]] == [tag_id]
+    
+    def test_batch_import_include_prompts(self, client):
+        """include_prompts=true возвращает созданные промпты"""
+        payload = {"import_source": "x", "prompts": [{"title": "One", "content": "text"}]}
+        
+        data = client.post("/api/import/batch?include_prompts=true", json=payload).json()
+        assert [p["title"] for p in data["prompts"]] == ["One"]
+
+
+class TestImportJobs:
+    """Тесты для фоновых задач /api/import/jobs"""
+    
+    def _wait(self, client, job_id: str, timeout: float = 10.0) -> dict:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            job = client.get(f"/api/import/jobs/{job_id}").json()
+            if job["status"] in ("completed", "failed", "cancelled"):
+                return job
+            time.sleep(0.05)
+        raise AssertionError(f"Import job {job_id} did not finish")
+    
+    def test_json_job_completes(self, client):
+        """Задача импортирует файл, SSE-поток заканчивается событием completed"""
+        items = [{"title": f"Job {i}", "content": "text"} for i in range(3)] + [{"title": "bad"}]
+        response = client.post(
+            "/api/import/jobs/json",
+            params={"source_name": "job"},
+            files={"file": ("prompts.json", json.dumps(items).encode("utf-8"), "application/json")}
+        )
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        job_id = response.json()["id"]
+        
+        job = self._wait(client, job_id)
+        assert job["status"] == "completed"
+        assert job["progress"]["inserted"] == 3
+        assert job["progress"]["skipped"] == 1
+        assert job["progress"]["percent"] == 100.0
+        
+        events = client.get(f"/api/import/jobs/{job_id}/events")
+        assert events.headers["content-type"].startswith("text/event-stream")
+        assert "event: completed" in events.text
+        
+        # Завершённую задачу отменить нельзя
+        assert client.post(f"/api/import/jobs/{job_id}/cancel").status_code == status.HTTP_409_CONFLICT
+        assert len(client.get("/api/prompts").json()) == 3
+    
+    def test_references_job_counts(self, client, references):
+        """Задача синхронизации references отдаёт счётчики импорта"""
+        for name in ("a", "b"):
+            (references.source / f"{name}.md").write_text(
+                f"# Prompt {name}\n\nYou are an assistant. Summarize the text the user provides.\n"
+                "Keep the answer short.\nUse plain language.\n",
+                encoding="utf-8"
+            )
+        job_id = client.post("/api/import/jobs/references").json()["id"]
+        
+        job = self._wait(client, job_id)
+        assert job["status"] == "completed"
+        assert job["progress"]["inserted"] == 2
+        assert job["progress"]["errors"] == 0
+        assert "2 added" in job["message"]
+    
+    def test_references_job_failed(self, client, references, monkeypatch):
+        """Ошибка импорта помечает задачу failed, а не completed"""
+        from app.services.db_initializer import DatabaseInitializer
+        
+        def fail(*args, **kwargs):
+            raise RuntimeError("disk full")
+        monkeypatch.setattr(DatabaseInitializer, "import_references_prompts", staticmethod(fail))
+        (references.source / "a.md").write_text(
+            "# Prompt a\n\nYou are an assistant. Summarize the text the user provides.\n", encoding="utf-8"
+        )
+        job_id = client.post("/api/import/jobs/references").json()["id"]
+        
+        job = self._wait(client, job_id)
+        assert job["status"] == "failed"
+        assert job["error"] == "disk full"
+    
+    def test_unknown_job(self, client):
+        """Несуществующая задача - 404"""
+        assert client.get("/api/import/jobs/missing").status_code == status.HTTP_404_NOT_FOUND
+        assert client.get("/api/import/jobs/missing/events").status_code == status.HTTP_404_NOT_FOUND
+
+
+class TestExport:
+    """Тесты для /api/export"""
+    
+    def _create(self, client, title: str, category: str = "writing"):
+        client.post("/api/prompts", json={"title": title, "content": f"{title} text", "category": category})
+    
+    def test_export_ndjson(self, client):
+        """NDJSON: строка на промпт, фильтр по категории"""
+        self._create(client, "First")
+        self._create(client, "Second", "analysis")
+        
+        response = client.get("/api/export")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [row["title"] for row in rows] == ["First", "Second"]
+        assert rows[0]["tags"] == []
+        
+        response = client.get("/api/export", params={"category": "analysis"})
+        assert [json.loads(line)["title"] for line in response.text.splitlines()] == ["Second"]
+    
+    def test_export_zip(self, client):
+        """ZIP с JSON-файлами по категориям"""
+        self._create(client, "Zipped prompt")
+        
+        response = client.get("/api/export", params={"format": "zip", "files": "json"})
+        assert response.status_code == status.HTTP_200_OK
+        
+        with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+            names = archive.namelist()
+            assert len(names) == 1 and names[0].startswith("writing/")
+            data = json.loads(archive.read(names[0]))
+        assert data["title"] == "Zipped prompt"
@@ -0,0 +1,52 @@
+"""
+Tests for the versioned schema migrations
+"""
+
+from sqlalchemy import create_engine, inspect, text
+
+from app.db.migrations import LATEST_VERSION, MIGRATIONS, PROMPT_METADATA_COLUMNS, run_migrations
+
+
+def _versions(engine):
+    with engine.connect() as conn:
+        return [row[0] for row in conn.execute(text("SELECT version FROM schema_version ORDER BY version"))]
+
+
+class TestMigrations:
+    """Тесты для run_migrations"""
+
+    def test_empty_database(self, tmp_path):
+        """Пустая БД получает всю схему и все шаги в schema_version"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'empty.db'}")
+        assert run_migrations(engine) == len(MIGRATIONS)
+        assert _versions(engine) == [migration.version for migration in MIGRATIONS]
+        assert {"prompts", "tags", "counters", "reference_files"} <= set(inspect(engine).get_table_names())
+        assert run_migrations(engine) == 0
+
+    def test_pre_v2_prompts_table(self, tmp_path):
+        """Таблица prompts до v2 получает недостающие колонки, данные сохраняются"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+        with engine.begin() as conn:
+            conn.execute(text("""
+                CREATE TABLE prompts (
+                    id INTEGER PRIMARY KEY, title VARCHAR(255) NOT NULL, content TEXT NOT NULL,
+                    description TEXT, category VARCHAR(50), version VARCHAR(20),
+                    usage_count INTEGER DEFAULT 0, imported_from VARCHAR(255),
+                    created_at DATETIME, updated_at DATETIME
+                )"""))
+            conn.execute(text(
+                "INSERT INTO prompts (title, content, category, usage_count) VALUES ('Old', 'text', 'writing', 2)"
+            ))
+
+        assert run_migrations(engine) == LATEST_VERSION
+        columns = {column["name"] for column in inspect(engine).get_columns("prompts")}
+        assert {name for name, _ in PROMPT_METADATA_COLUMNS} <= columns
+        assert _versions(engine) == list(range(1, LATEST_VERSION + 1))
+
+        with engine.connect() as conn:
+            row = conn.execute(text("SELECT title, difficulty, rating FROM prompts")).one()
+            counters = dict(conn.execute(text("SELECT name, value FROM counters")).all())
+        assert tuple(row) == ("Old", "intermediate", 0.0)
+        assert counters["prompts"] == 1 and counters["usage"] == 2
+
+        assert run_migrations(engine) == 0
@@ -0,0 +1,58 @@
+"""
+Tests for the incremental prompts mirror
+"""
+
+from app.services.mirror_service import MirrorService
+
+
+class TestPromptsMirror:
+    """Тесты для MirrorService.sync"""
+    
+    def _create(self, client, title: str, category: str = "writing") -> int:
+        response = client.post("/api/prompts", json={"title": title, "content": "text", "category": category})
+        return response.json()["id"]
+    
+    def test_sync_writes_only_changes(self, client, db_session, tmp_path):
+        """Первая синхронизация пишет файлы, повторная без изменений - ничего"""
+        first = self._create(client, "First")
+        self._create(client, "Second", "analysis")
+        
+        result = MirrorService.sync(db_session, root=tmp_path)
+        assert result["written"] == 2
+        assert (tmp_path / "writing" / f"{first}_First.txt").read_text(encoding="utf-8").count("First") == 1
+        assert MirrorService.pending(db_session) == 0
+        
+        assert MirrorService.sync(db_session, root=tmp_path)["written"] == 0
+    
+    def test_sync_moves_and_deletes(self, client, db_session, tmp_path):
+        """Смена категории переносит файл, удаление промпта удаляет его"""
+        moved = self._create(client, "Moved")
+        removed = self._create(client, "Removed")
+        MirrorService.sync(db_session, root=tmp_path)
+        
+        client.put(f"/api/prompts/{moved}", json={"category": "design"})
+        client.delete(f"/api/prompts/{removed}")
+        result = MirrorService.sync(db_session, root=tmp_path)
+        
+        assert result["moved"] == 1
+        assert result["deleted"] == 1
+        assert (tmp_path / "design" / f"{moved}_Moved.txt").exists()
+        assert not (tmp_path / "writing").exists()
+    
+    def test_remove_keeps_root_and_outside_folders(self, tmp_path):
+        """Опустевшие папки удаляются только внутри папки зеркала"""
+        root = tmp_path / "mirror"
+        inside = root / "writing" / "1_First.txt"
+        outside = tmp_path / "prompts" / "2_Second.txt"
+        top = root / "3_Third.txt"
+        for path in (inside, outside, top):
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("text", encoding="utf-8")
+        
+        MirrorService._remove(root, inside)
+        MirrorService._remove(root, outside)
+        MirrorService._remove(root, top)
+        
+        assert not (root / "writing").exists()
+        assert (tmp_path / "prompts").is_dir()
+        assert root.is_dir()
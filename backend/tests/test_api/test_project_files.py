@@ -0,0 +1,107 @@
+"""
+Tests for project tasks/process files
+"""
+
+import os
+from pathlib import Path
+
+
+class TestProjectFiles:
+    """Тесты для файлов проекта"""
+
+    def _create(self, client, name: str = "Demo Project") -> int:
+        return client.post("/api/projects", json={"name": name}).json()["id"]
+
+    def test_structure_and_roundtrip(self, client, files, tmp_path):
+        """Структура создаётся, записанное читается обратно"""
+        project_id = self._create(client)
+        assert client.post(f"/api/projects/{project_id}/create-structure").status_code == 200
+        assert (tmp_path / "projects" / f"{project_id}_Demo_Project" / "files").is_dir()
+
+        client.put(f"/api/projects/{project_id}/tasks", json={"content": "- write tests"})
+        assert client.get(f"/api/projects/{project_id}/tasks").json()["content"] == "- write tests"
+        assert client.get(f"/api/projects/{project_id}/process").json()["content"] == "# Project Process\n\n"
+
+    def test_cache_sees_external_edits(self, client, files):
+        """Кэш сверяется с mtime: правка файла снаружи видна при следующем чтении"""
+        project_id = self._create(client)
+        client.put(f"/api/projects/{project_id}/tasks", json={"content": "old"})
+
+        path = files.project_file_path(project_id, "Demo Project", "tasks")
+        path.write_text("edited outside", encoding="utf-8")
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        assert client.get(f"/api/projects/{project_id}/tasks").json()["content"] == "edited outside"
+
+        path.unlink()
+        assert client.get(f"/api/projects/{project_id}/tasks").json()["content"] == ""
+
+    def test_process_entries_append_and_tail(self, client, files):
+        """Записи дописываются в process.txt, хвост читается по индексу"""
+        project_id = self._create(client)
+        ids = [
+            client.post(f"/api/projects/{project_id}/process", params={"entry": f"step {i}"}).json()["id"]
+            for i in range(5)
+        ]
+
+        full = client.get(f"/api/projects/{project_id}/process").json()["content"]
+        assert [f"#{entry_id}" in full for entry_id in ids] == [True] * 5
+
+        tail = client.get(f"/api/projects/{project_id}/process", params={"tail_entries": 2}).json()
+        assert tail["content"].startswith("[") and f"#{ids[3]}\nstep 3" in tail["content"]
+        assert "step 2" not in tail["content"]
+        assert tail["size"] == len(full.encode("utf-8"))
+
+        since = client.get(f"/api/projects/{project_id}/process", params={"offset": tail["size"]}).json()
+        assert since["content"] == ""
+
+    def test_process_index_rebuilt_after_rewrite(self, client, files):
+        """После перезаписи файла через PUT индекс строится заново"""
+        project_id = self._create(client)
+        client.post(f"/api/projects/{project_id}/process", params={"entry": "first"})
+        client.put(f"/api/projects/{project_id}/process", json={"content": "# Rewritten\n\n"})
+        client.post(f"/api/projects/{project_id}/process", params={"entry": "second"})
+
+        tail = client.get(f"/api/projects/{project_id}/process", params={"tail_entries": 1}).json()
+        assert "second" in tail["content"]
+        assert "first" not in tail["content"]
+
+    def test_put_then_post_does_not_duplicate(self, client, files):
+        """После PUT без заголовков записей POST дописывает только новую запись"""
+        project_id = self._create(client)
+        for entry in ("first", "second"):
+            client.post(f"/api/projects/{project_id}/process", params={"entry": entry})
+        client.put(f"/api/projects/{project_id}/process", json={"content": "# Rewritten by hand\n\n"})
+        client.post(f"/api/projects/{project_id}/process", params={"entry": "third"})
+
+        content = client.get(f"/api/projects/{project_id}/process").json()["content"]
+        assert content.startswith("# Rewritten by hand")
+        assert "first" not in content and "second" not in content
+        assert content.count("third") == 1
+
+    def test_empty_process_index_rebuilt(self, client, files):
+        """Пустой process.idx при записях в process.txt строится заново"""
+        project_id = self._create(client)
+        for entry in ("first", "second"):
+            client.post(f"/api/projects/{project_id}/process", params={"entry": entry})
+        path = files.project_file_path(project_id, "Demo Project", "process")
+        (path.parent / "process.idx").write_bytes(b"")
+
+        tail = client.get(f"/api/projects/{project_id}/process", params={"tail_entries": 1}).json()
+        assert "second" in tail["content"]
+        assert "first" not in tail["content"]
+
+    def test_export_after_category_folder_removed(self, client, files):
+        """Папку категории удалили снаружи: экспорт создаёт её снова"""
+        prompt_id = client.post("/api/prompts", json={"title": "Export", "content": "text", "category": "writing"}).json()["id"]
+        first = client.post(f"/api/prompts/{prompt_id}/export-txt")
+        assert first.status_code == 200
+
+        path = Path(first.json()["file_path"])
+        path.unlink()
+        path.parent.rmdir()
+        assert not path.parent.exists()
+
+        assert client.post(f"/api/prompts/{prompt_id}/export-txt").status_code == 200
+        assert path.exists()
@@ -0,0 +1,112 @@
+"""
+API Tests for Projects endpoints
+"""
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _isolated_files(files):
+    """process.txt пишется во временную папку"""
+
+
+class TestProjectsList:
+    """Тесты для списка и карточки проекта"""
+
+    def _create(self, client, name: str) -> int:
+        return client.post("/api/projects", json={"name": name}).json()["id"]
+
+    def test_list_has_counts_and_latest_entry(self, client):
+        """Список отдаёт счётчики и последнюю запись вместо связей"""
+        busy = self._create(client, "Busy")
+        self._create(client, "Empty")
+        for i in range(3):
+            client.post(f"/api/projects/{busy}/process", params={"entry": f"entry {i}"})
+        client.post(f"/api/projects/{busy}/tasks", json={"title": "Task", "project_id": busy, "status": "done"})
+
+        projects = {p["name"]: p for p in client.get("/api/projects").json()}
+        assert projects["Busy"]["process_entries_count"] == 3
+        assert projects["Busy"]["tasks_count"] == 1
+        assert projects["Busy"]["tasks_done_count"] == 1
+        assert projects["Busy"]["latest_entry"]["entry"] == "entry 2"
+        assert "process_entries" not in projects["Busy"]
+        assert projects["Empty"]["latest_entry"] is None
+
+    def test_detail_paginates_entries(self, client):
+        """Записи процесса отдаются страницами по курсору, новые первыми"""
+        project_id = self._create(client, "Paged")
+        for i in range(5):
+            client.post(f"/api/projects/{project_id}/process", params={"entry": f"entry {i}"})
+
+        first = client.get(f"/api/projects/{project_id}", params={"limit": 2}).json()
+        assert [e["entry"] for e in first["process_entries"]] == ["entry 4", "entry 3"]
+        assert first["process_entries_count"] == 5
+
+        seen = [e["entry"] for e in first["process_entries"]]
+        cursor = first["process_entries_next_cursor"]
+        while cursor is not None:
+            page = client.get(f"/api/projects/{project_id}",
+                              params={"limit": 2, "entries_cursor": cursor}).json()
+            seen += [e["entry"] for e in page["process_entries"]]
+            cursor = page["process_entries_next_cursor"]
+        assert seen == [f"entry {i}" for i in range(4, -1, -1)]
+
+    def test_detail_not_found(self, client):
+        """Несуществующий проект - 404"""
+        assert client.get("/api/projects/99999").status_code == 404
+
+    def test_list_not_modified_until_task_changes(self, client):
+        """Список проектов отдаёт 304, пока не изменились проекты, записи или задачи"""
+        project_id = self._create(client, "Cached")
+        etag = client.get("/api/projects").headers["etag"]
+        assert client.get("/api/projects", headers={"If-None-Match": etag}).status_code == 304
+
+        client.post(f"/api/projects/{project_id}/tasks", json={"title": "Task", "project_id": project_id})
+        response = client.get("/api/projects", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()[0]["tasks_count"] == 1
+
+
+class TestTaskBoard:
+    """Тесты для доски задач и массового перемещения"""
+
+    def _setup(self, client):
+        project_id = client.post("/api/projects", json={"name": "Board"}).json()["id"]
+        ids = [
+            client.post(f"/api/projects/{project_id}/tasks",
+                        json={"title": f"Task {i}", "project_id": project_id}).json()["id"]
+            for i in range(3)
+        ]
+        return project_id, ids
+
+    def test_bulk_move_and_board(self, client):
+        """Перемещения применяются разом, доска группирует по статусу"""
+        project_id, ids = self._setup(client)
+        response = client.patch("/api/tasks", json={"tasks": [
+            {"id": ids[0], "status": "done"},
+            {"id": ids[1], "status": "in_progress", "priority": "high"},
+        ]})
+        assert response.status_code == 200
+        assert response.json()["updated"] == 2
+
+        board = client.get(f"/api/projects/{project_id}/board").json()
+        assert [t["id"] for t in board["columns"]["done"]] == [ids[0]]
+        assert board["columns"]["in_progress"][0]["priority"] == "high"
+        assert board["counts"] == {"todo": 1, "in_progress": 1, "done": 1}
+
+    def test_bulk_move_is_atomic(self, client):
+        """Неизвестная задача - 404, остальные перемещения не применяются"""
+        project_id, ids = self._setup(client)
+        response = client.patch("/api/tasks", json={"tasks": [
+            {"id": ids[0], "status": "done"},
+            {"id": 999999, "status": "done"},
+        ]})
+        assert response.status_code == 404
+        assert client.get(f"/api/projects/{project_id}/board").json()["counts"]["done"] == 0
+
+    def test_invalid_fields_rejected(self, client):
+        """Неизвестные поля и статусы отклоняются"""
+        _, ids = self._setup(client)
+        assert client.patch("/api/tasks", json={"tasks": [{"id": ids[0], "status": "archived"}]}).status_code == 422
+        assert client.put(f"/api/tasks/{ids[0]}", json={"project_id": 5}).status_code == 422
+        assert client.put(f"/api/tasks/{ids[0]}", json={"status": "done"}).json()["status"] == "done"
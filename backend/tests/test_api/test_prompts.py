@@ -93,6 +93,26 @@ class TestPromptsAPI:
         assert data["title"] == updated_data["title"]
         assert data["content"] == updated_data["content"]
 
+    def test_list_not_modified(self, client, sample_prompt_data, monkeypatch):
+        """If-None-Match с актуальным ETag - 304 без выборки, после изменения - 200"""
+        from app.services.database import PromptService
+
+        prompt_id = client.post("/api/prompts", json=sample_prompt_data).json()["id"]
+        etag = client.get("/api/prompts").headers["etag"]
+        assert etag.startswith("W/")
+
+        def fail(*args, **kwargs):
+            raise AssertionError("query must not run for 304")
+        with monkeypatch.context() as patch:
+            patch.setattr(PromptService, "get_all_prompts", fail)
+            response = client.get("/api/prompts", headers={"If-None-Match": etag})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+        client.put(f"/api/prompts/{prompt_id}", json={"title": "Changed"})
+        response = client.get("/api/prompts", headers={"If-None-Match": etag})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["etag"] != etag
+
 
 class TestPromptsFiltering:
     """Тесты фильтрации промптов"""
@@ -0,0 +1,137 @@
+"""
+Tests for the incremental references sync (manifest + bulk import)
+"""
+
+import sqlite3
+
+import pytest
+
+from app.db.models import Prompt, ReferenceFile
+from app.services.db_initializer import DatabaseInitializer
+
+
+def quiet(done, total=None):
+    pass
+
+
+def write_prompt(path, title: str, body: str = "You are an assistant. Summarize the text the user provides."):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(f"# {title}\n\n{body}\nKeep the answer short.\nUse plain language.\n", encoding="utf-8")
+
+
+def sync(**kwargs):
+    return DatabaseInitializer.sync_references(scan_progress=quiet, import_progress=quiet, **kwargs)
+
+
+def manifest(references):
+    with references.session() as db:
+        return {path: prompt_id for path, prompt_id in db.query(ReferenceFile.path, ReferenceFile.prompt_id)}
+
+
+def prompts(references):
+    with references.session() as db:
+        return {prompt.id: (prompt.title, prompt.content) for prompt in db.query(Prompt)}
+
+
+class TestReferencesSync:
+    """Тесты для DatabaseInitializer.sync_references"""
+
+    def test_new_file_imported(self, references):
+        """Новый файл становится промптом, манифест запоминает его id"""
+        write_prompt(references.source / "a.md", "Alpha")
+        sync()
+
+        entries = manifest(references)
+        assert list(entries) == ["library/a.md"]
+        assert prompts(references)[entries["library/a.md"]][0] == "Alpha"
+
+    def test_edited_file_updates_prompt(self, references):
+        """Изменённый файл обновляет тот же промпт"""
+        path = references.source / "a.md"
+        write_prompt(path, "Alpha")
+        sync()
+        prompt_id = manifest(references)["library/a.md"]
+
+        write_prompt(path, "Alpha", body="You are an editor. Rewrite the paragraph the user sends, please.")
+        sync()
+        assert manifest(references)["library/a.md"] == prompt_id
+        assert "Rewrite the paragraph" in prompts(references)[prompt_id][1]
+        assert len(prompts(references)) == 1
+
+    def test_edited_file_with_deleted_prompt(self, references):
+        """Промпт из манифеста удалён: изменённый файл импортируется заново, без ошибки"""
+        path = references.source / "a.md"
+        write_prompt(path, "Alpha")
+        sync()
+        # Удаление мимо внешних ключей (старая БД): манифест ссылается на несуществующий id
+        with sqlite3.connect(references.root.parent / "references.db") as conn:
+            conn.execute("DELETE FROM prompts")
+
+        write_prompt(path, "Alpha", body="You are an editor. Rewrite the paragraph the user sends, please.")
+        sync()
+        prompt_id = manifest(references)["library/a.md"]
+        assert prompt_id is not None
+        assert "Rewrite the paragraph" in prompts(references)[prompt_id][1]
+
+    def test_renamed_title_keeps_prompt(self, references):
+        """Новый заголовок в том же файле обновляет его промпт, а не создаёт второй"""
+        path = references.source / "a.md"
+        write_prompt(path, "Alpha")
+        sync()
+        prompt_id = manifest(references)["library/a.md"]
+
+        write_prompt(path, "Alpha v2")
+        sync()
+        assert prompts(references) == {prompt_id: ("Alpha v2", prompts(references)[prompt_id][1])}
+
+    def test_same_title_in_two_files(self, references):
+        """Файлы с одинаковым заголовком - разные промпты; правка одного не трогает другой"""
+        write_prompt(references.source / "a.md", "Alpha")
+        write_prompt(references.source / "nested" / "a.md", "Alpha", body="You are a tutor. Explain the topic the user names, step by step.")
+        sync()
+        entries = manifest(references)
+        assert len(set(entries.values())) == 2
+
+        write_prompt(references.source / "a.md", "Alpha", body="You are an editor. Rewrite the paragraph the user sends, please.")
+        sync()
+        assert manifest(references) == entries
+        assert "Rewrite the paragraph" in prompts(references)[entries["library/a.md"]][1]
+        assert "Explain the topic" in prompts(references)[entries["library/nested/a.md"]][1]
+
+    def test_legacy_prompt_adopted(self, references):
+        """Промпт без source_path (импорт до привязки к файлам) принимается по заголовку"""
+        with references.session() as db:
+            db.add(Prompt(title="Alpha", content="old", imported_from="library"))
+            db.commit()
+        write_prompt(references.source / "a.md", "Alpha")
+        sync()
+
+        with references.session() as db:
+            assert db.query(Prompt.title, Prompt.source_path).all() == [("Alpha", "library/a.md")]
+
+    def test_removed_file_deletes_prompt(self, references):
+        """Удалённый файл пропадает из манифеста вместе со своим промптом"""
+        write_prompt(references.source / "a.md", "Alpha")
+        write_prompt(references.source / "b.md", "Beta")
+        sync()
+
+        (references.source / "a.md").unlink()
+        scan = sync().scan
+        assert scan.removed == ["library/a.md"]
+        assert list(manifest(references)) == ["library/b.md"]
+        assert [title for title, _ in prompts(references).values()] == ["Beta"]
+
+    def test_failed_import_keeps_manifest(self, references, monkeypatch):
+        """Ошибка импорта пробрасывается, файлы не записываются в манифест"""
+        write_prompt(references.source / "a.md", "Alpha")
+
+        def fail(*args, **kwargs):
+            raise RuntimeError("disk full")
+        with monkeypatch.context() as patch:
+            patch.setattr(DatabaseInitializer, "import_references_prompts", staticmethod(fail))
+            with pytest.raises(RuntimeError):
+                sync()
+        assert manifest(references) == {}
+
+        sync()
+        assert list(manifest(references)) == ["library/a.md"]
@@ -0,0 +1,89 @@
+"""
+Tests for the references watcher (debounce loop on the polling source)
+"""
+
+import threading
+import time
+
+import pytest
+
+from app.db.models import Prompt
+from app.services import references_watcher
+from app.services.db_initializer import DatabaseInitializer
+from app.services.references_watcher import ReferencesWatcher, _Poller
+
+
+def write_prompt(path, title: str, body: str = "You are an assistant. Summarize the text the user provides."):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(f"# {title}\n\n{body}\nKeep the answer short.\nUse plain language.\n", encoding="utf-8")
+
+
+def wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return
+        time.sleep(0.02)
+    raise AssertionError("Condition not met in time")
+
+
+@pytest.fixture
+def watch(monkeypatch):
+    """Запустить ReferencesWatcher.watch на _Poller в отдельном потоке"""
+    monkeypatch.setattr(references_watcher, "DEBOUNCE_SECONDS", 0.3)
+    stop = threading.Event()
+    threads = []
+
+    def start(root):
+        source = _Poller(root, interval=0.05)
+        thread = threading.Thread(target=ReferencesWatcher.watch, args=(source, stop), daemon=True)
+        thread.start()
+        threads.append(thread)
+
+    yield start
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+
+class TestReferencesWatcher:
+    """Тесты для ReferencesWatcher.watch"""
+
+    def test_debounce_batches_changes(self, tmp_path, watch, monkeypatch):
+        """Изменения подряд применяются одной пачкой после затишья"""
+        batches = []
+        monkeypatch.setattr(ReferencesWatcher, "apply", staticmethod(lambda paths: batches.append(set(paths))))
+        watch(tmp_path)
+
+        write_prompt(tmp_path / "a.md", "Alpha")
+        time.sleep(0.1)
+        write_prompt(tmp_path / "b.md", "Beta")
+        wait_for(lambda: batches)
+        time.sleep(0.4)
+        assert batches == [{tmp_path / "a.md", tmp_path / "b.md"}]
+
+    def test_change_and_removal_synced(self, references, watch, monkeypatch):
+        """Правка и удаление файла уходят в sync_references(paths=...)"""
+        write_prompt(references.source / "a.md", "Alpha")
+        write_prompt(references.source / "b.md", "Beta")
+        DatabaseInitializer.sync_references(scan_progress=lambda *a: None, import_progress=lambda *a: None)
+
+        calls = []
+        original = DatabaseInitializer.sync_references
+
+        def record(**kwargs):
+            result = original(**kwargs)
+            calls.append(kwargs.get("paths"))
+            return result
+        monkeypatch.setattr(DatabaseInitializer, "sync_references", staticmethod(record))
+        watch(references.root)
+
+        write_prompt(references.source / "a.md", "Alpha", body="You are an editor. Rewrite the paragraph the user sends, please.")
+        (references.source / "b.md").unlink()
+        wait_for(lambda: calls)
+        assert calls == [sorted([references.source / "a.md", references.source / "b.md"])]
+
+        with references.session() as db:
+            rows = db.query(Prompt.title, Prompt.content).all()
+        assert len(rows) == 1 and rows[0][0] == "Alpha"
+        assert "Rewrite the paragraph" in rows[0][1]
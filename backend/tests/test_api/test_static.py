@@ -0,0 +1,116 @@
+"""
+Tests for the in-memory static asset cache
+"""
+
+import gzip
+import json
+import os
+
+from app.static_assets import IMMUTABLE_CACHE_CONTROL, StaticAssets, load_manifest, manifest_paths
+from app.utils.precompress import precompress_file
+
+
+class TestStaticAssets:
+    """Тесты для StaticAssets"""
+
+    def test_etag_and_not_modified(self, tmp_path):
+        """Повторный запрос с If-None-Match получает 304"""
+        (tmp_path / "index.html").write_text("<html></html>", encoding="utf-8")
+        assets = StaticAssets(tmp_path)
+
+        response = assets.response("index.html", {})
+        assert response.status_code == 200
+        assert response.headers["cache-control"] == "no-cache"
+
+        etag = response.headers["etag"]
+        assert assets.response("index.html", {"if-none-match": etag}).status_code == 304
+        assert assets.response("index.html", {"if-none-match": f"W/{etag}"}).status_code == 304
+
+    def test_hashed_files_are_immutable(self, tmp_path):
+        """Файлы с хэшем в имени кэшируются навсегда"""
+        (tmp_path / "app.3f2a9c1b.js").write_text("console.log(1);", encoding="utf-8")
+        response = StaticAssets(tmp_path).response("app.3f2a9c1b.js", {})
+        assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+
+    def test_manifest_files_are_immutable(self, tmp_path):
+        """Файлы из манифеста сборки immutable, index.html сборки - с проверкой ETag"""
+        dist = tmp_path / "dist"
+        dist.mkdir()
+        (dist / "bundle-a1.js").write_text("1", encoding="utf-8")
+        (dist / "index.html").write_text("<html></html>", encoding="utf-8")
+        (dist / "manifest.json").write_text(json.dumps({
+            "index": "index.html", "files": {"app.js": "bundle-a1.js"}, "immutable": ["bundle-a1.js"],
+        }), encoding="utf-8")
+
+        index_path, immutable = manifest_paths(load_manifest(tmp_path))
+        assets = StaticAssets(tmp_path, watch=True, immutable=immutable)
+        assert index_path == "dist/index.html"
+        assert assets.response("dist/bundle-a1.js", {}).headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+        assert assets.response(index_path, {}).headers["cache-control"] == "no-cache"
+        assert load_manifest(tmp_path / "missing") is None
+
+    def test_precompressed_variant(self, tmp_path):
+        """Готовая .gz копия отдаётся клиенту, который принимает gzip"""
+        source = tmp_path / "app.js"
+        source.write_text("console.log(1);" * 200, encoding="utf-8")
+        (tmp_path / "app.js.gz").write_bytes(gzip.compress(source.read_bytes()))
+        assets = StaticAssets(tmp_path)
+
+        response = assets.response("app.js", {"accept-encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["content-type"].startswith("text/javascript")
+        assert "content-encoding" not in assets.response("app.js", {}).headers
+
+    def test_precompressed_variant_q_values(self, tmp_path):
+        """Из готовых .br и .gz отдаётся кодировка с большим q"""
+        source = tmp_path / "app.js"
+        source.write_text("console.log(1);" * 200, encoding="utf-8")
+        (tmp_path / "app.js.gz").write_bytes(gzip.compress(source.read_bytes()))
+        (tmp_path / "app.js.br").write_bytes(b"brotli body")
+        assets = StaticAssets(tmp_path)
+
+        assert assets.response("app.js", {"accept-encoding": "gzip, br"}).headers["content-encoding"] == "br"
+        assert assets.response("app.js", {"accept-encoding": "gzip;q=1, br;q=0.1"}).headers["content-encoding"] == "gzip"
+        assert "content-encoding" not in assets.response("app.js", {"accept-encoding": "br;q=0"}).headers
+
+    def test_precompress_file_variant_served(self, tmp_path):
+        """Копии из precompress_file не считаются устаревшими при любом mtime исходника"""
+        paths = []
+        for i in range(20):
+            path = tmp_path / f"chunk{i}.js"
+            path.write_text(f"console.log({i});" * 200, encoding="utf-8")
+            # Наносекунды, которые не представимы точно в float секундах
+            os.utime(path, ns=(1_700_000_000_123_456_789 + i * 7, 1_700_000_000_123_456_789 + i * 7))
+            assert precompress_file(path)["gzip"]
+            paths.append(path.name)
+
+        assets = StaticAssets(tmp_path)
+        for name in paths:
+            assert assets.response(name, {"accept-encoding": "gzip"}).headers.get("content-encoding") == "gzip"
+
+    def test_watch_reloads_changed_file(self, tmp_path):
+        """В режиме watch правка файла видна сразу, без watch - после clear()"""
+        path = tmp_path / "style.css"
+        path.write_text("a{}", encoding="utf-8")
+        watched, cached = StaticAssets(tmp_path, watch=True), StaticAssets(tmp_path)
+        assert watched.response("style.css", {}).body == cached.response("style.css", {}).body == b"a{}"
+
+        path.write_text("body{color:red}", encoding="utf-8")
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert watched.response("style.css", {}).body == b"body{color:red}"
+        assert cached.response("style.css", {}).body == b"a{}"
+
+    def test_traversal_rejected(self, tmp_path):
+        """Путь за пределы папки не отдаётся"""
+        (tmp_path / "secret.txt").write_text("secret", encoding="utf-8")
+        assets = StaticAssets(tmp_path / "frontend")
+        assert assets.get("../secret.txt") is None
+
+    def test_spa_fallback_served_from_cache(self, client):
+        """Неизвестный путь без расширения отдаёт index.html"""
+        response = client.get("/some/client/route")
+        assert response.status_code == 200
+        assert "etag" in response.headers
+        assert client.get("/some/client/route",
+                          headers={"If-None-Match": response.headers["etag"]}).status_code == 304
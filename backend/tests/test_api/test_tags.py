@@ -0,0 +1,48 @@
+"""
+API Tests for tags endpoints
+"""
+
+import pytest
+from fastapi import status
+
+
+class TestTagCloud:
+    """Тесты для /api/tags/cloud и Tag.usage_count"""
+
+    def test_usage_count_follows_prompt_tags(self, client, sample_prompt_data):
+        """usage_count меняется при изменении тегов промпта"""
+        tag_id = client.post("/api/tags", json={"name": "cloud-test"}).json()["id"]
+        prompt = dict(sample_prompt_data, tag_ids=[tag_id])
+        prompt_id = client.post("/api/prompts", json=prompt).json()["id"]
+
+        tags = {tag["id"]: tag for tag in client.get("/api/tags").json()}
+        assert tags[tag_id]["usage_count"] == 1
+
+        client.put(f"/api/prompts/{prompt_id}", json={"tag_ids": []})
+        tags = {tag["id"]: tag for tag in client.get("/api/tags").json()}
+        assert tags[tag_id]["usage_count"] == 0
+
+    def test_cloud_orders_by_count(self, client, sample_prompt_data):
+        """Облако отсортировано по количеству промптов"""
+        popular = client.post("/api/tags", json={"name": "popular"}).json()["id"]
+        rare = client.post("/api/tags", json={"name": "rare"}).json()["id"]
+        client.post("/api/prompts", json=dict(sample_prompt_data, tag_ids=[popular, rare]))
+        client.post("/api/prompts", json=dict(sample_prompt_data, tag_ids=[popular]))
+
+        response = client.get("/api/tags/cloud?limit=10")
+        assert response.status_code == status.HTTP_200_OK
+
+        cloud = [entry["name"] for entry in response.json()]
+        assert cloud.index("popular") < cloud.index("rare")
+        assert response.json()[0]["weight"] == 1.0
+
+    def test_list_etag_follows_usage(self, client, sample_prompt_data):
+        """ETag списка тегов меняется, когда триггер пересчитывает usage_count"""
+        tag_id = client.post("/api/tags", json={"name": "etag-test"}).json()["id"]
+        etag = client.get("/api/tags").headers["etag"]
+        assert client.get("/api/tags", headers={"If-None-Match": etag}).status_code == 304
+
+        client.post("/api/prompts", json=dict(sample_prompt_data, tag_ids=[tag_id]))
+        response = client.get("/api/tags", headers={"If-None-Match": etag})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["etag"] != etag
@@ -14,10 +14,12 @@ PANDORA v2.0 - Professional Windows EXE Builder (Version 3)
 Архитектура сборки:
     1. Проверка окружения (Python, PyInstaller, файлы, зависимости, место на диске)
     2. Очистка старых артефактов
-    3. PyInstaller сборка (использует PANDORA.spec)
-    4. Верификация результатов
-    5. Тестирование exe
-    6. Генерация отчета
+    3. Сборка фронтенда: бандлы с хэшем в имени + manifest.json (frontend_bundler.py)
+    4. Предварительное сжатие статики (.gz/.br)
+    5. PyInstaller сборка (использует PANDORA.spec)
+    6. Верификация результатов
+    7. Тестирование exe
+    8. Генерация отчета
 """
 
 import os
@@ -40,6 +42,7 @@ class Config:
     PANDORA_DIR = DIST_DIR / "PANDORA"
     SPEC_FILE = PROJECT_ROOT / "PANDORA.spec"
     LAUNCHER = PROJECT_ROOT / "desktop" / "launcher.py"
+    FRONTEND_BUNDLER = PROJECT_ROOT / "desktop" / "frontend_bundler.py"
     REQUIREMENTS = PROJECT_ROOT / "requirements.txt"
     
     # Директории для включения в exe
@@ -151,6 +154,7 @@ def check_project_files() -> bool:
     """Проверить наличие критических файлов"""
     required_files = [
         Config.LAUNCHER,
+        Config.FRONTEND_BUNDLER,
         Config.SPEC_FILE,
         Config.PROJECT_ROOT / "backend" / "app" / "main.py",
         Config.PROJECT_ROOT / "frontend" / "index.html",
@@ -263,18 +267,70 @@ def clean_build_artifacts():
 
 
 # ==================== СБОРКА ====================
+def bundle_frontend() -> bool:
+    """Собрать frontend/dist: минифицированные JS/CSS с хэшем в имени и manifest.json"""
+    try:
+        result = subprocess.run(
+            [sys.executable, str(Config.FRONTEND_BUNDLER), str(Config.INCLUDE_DIRS['frontend'])],
+            cwd=str(Config.PROJECT_ROOT),
+            capture_output=True,
+            text=True
+        )
+    except Exception as e:
+        print_error(f"Bundle error: {e}")
+        return False
+    
+    if result.returncode != 0:
+        print_error(f"Bundling failed with code {result.returncode}")
+        print((result.stdout + result.stderr)[-1000:])
+        return False
+    
+    print(f"  ✓ {result.stdout.strip()}")
+    return True
+
+
+def precompress_frontend() -> bool:
+    """Создать .gz/.br копии статики фронтенда (сервер отдаёт их без сжатия на лету)"""
+    try:
+        result = subprocess.run(
+            [sys.executable, "-m", "app.utils.precompress", str(Config.INCLUDE_DIRS['frontend'])],
+            cwd=str(Config.INCLUDE_DIRS['backend']),
+            capture_output=True,
+            text=True
+        )
+    except Exception as e:
+        print_error(f"Precompress error: {e}")
+        return False
+    
+    if result.returncode != 0:
+        print_error(f"Precompress failed with code {result.returncode}")
+        print(result.stderr[-1000:])
+        return False
+    
+    print(f"  ✓ {result.stdout.strip()}")
+    return True
+
+
 def build_exe(quick: bool = False) -> bool:
     """Собрать EXE файл с помощью PyInstaller"""
     print_info("build", "Starting Windows EXE build...")
     print_separator()
     
     if not quick:
-        print_info("step", "Step 1/4: Cleaning old artifacts")
+        print_info("step", "Step 1/6: Cleaning old artifacts")
         clean_build_artifacts()
     else:
         print_info("step", "Skipping cleanup (quick build)")
     
-    print_info("step", "Step 2/4: Running PyInstaller")
+    print_info("step", "Step 2/6: Bundling frontend")
+    if not bundle_frontend():
+        return False
+    
+    print_info("step", "Step 3/6: Precompressing frontend assets")
+    if not precompress_frontend():
+        return False
+    
+    print_info("step", "Step 4/6: Running PyInstaller")
     print(f"  └─ Spec file: {Config.SPEC_FILE.name}")
     print(f"  └─ Timeout: {Config.BUILD_TIMEOUT_SEC // 60} minutes")
     print()
@@ -307,7 +363,7 @@ def build_exe(quick: bool = False) -> bool:
         print_error(f"Build error: {e}")
         return False
     
-    print_info("step", "Step 3/4: Verifying build results")
+    print_info("step", "Step 5/6: Verifying build results")
     
     # Проверить что exe создан
     if not Config.PANDORA_DIR.exists():
@@ -325,7 +381,7 @@ def build_exe(quick: bool = False) -> bool:
     if exe_size_mb > Config.MAX_EXE_SIZE_MB:
         print_warning(f"EXE is larger than {Config.MAX_EXE_SIZE_MB} MB (consider optimization)")
     
-    print_info("step", "Step 4/4: Finalizing")
+    print_info("step", "Step 6/6: Finalizing")
     
     # Скопировать в корень проекта
     if Config.OUTPUT_FILE.exists():
@@ -0,0 +1,549 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PANDORA v2.0 - Frontend Bundler
+Сборка фронтенда без Node.js: ES-модули из frontend/src склеиваются в пару
+файлов, CSS - в один, всё минифицируется и получает хэш содержимого в имени.
+
+Результат в frontend/dist:
+    app.<hash>.js    - точка входа и её статические импорты
+    <View>.<hash>.js - чанк на каждый динамический import() (представления),
+                       грузится при первом переходе
+    app.<hash>.css   - стили из <link rel="stylesheet"> index.html
+    index.html       - index.html со ссылками на файлы выше
+    manifest.json    - исходное имя -> имя с хэшем, список immutable-файлов
+                       (по нему backend отдаёт Cache-Control: immutable)
+
+Поддерживается подмножество синтаксиса модулей, которое использует проект
+(import default/именованные/namespace, export объявлений и default,
+export {...}/* from, import('...') с относительным путём); остальное -
+BundleError.
+
+Использование:
+    python frontend_bundler.py [path/to/frontend]
+"""
+
+import hashlib
+import json
+import posixpath
+import re
+import shutil
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+FRONTEND_DIR = Path(__file__).parent.parent / "frontend"
+ENTRY = "src/core/app.js"
+DIST_NAME = "dist"
+HASH_LENGTH = 10
+
+
+class BundleError(Exception):
+    """Неподдерживаемая конструкция или битый путь импорта"""
+
+
+# ==================== МИНИФИКАЦИЯ ====================
+# Перед regex-литералом, а не делением, стоит оператор, открывающая скобка или одно из слов
+_REGEX_PREFIX_CHARS = set("(,=:[!&|?{};+-*%<>~^")
+_REGEX_PREFIX_WORDS = {"return", "typeof", "instanceof", "in", "of", "new", "delete", "void",
+                       "throw", "case", "do", "else", "yield", "await"}
+# Пробел рядом с этими символами не нужен
+_TIGHT = set("{}()[];,:=")
+# Перевод строки после/перед ними не влияет на автоподстановку ';'
+_NO_NEWLINE_AFTER = set("{([,;:=")
+_NO_NEWLINE_BEFORE = set("})],;:=.")
+
+
+def _skip_string(src: str, i: int) -> int:
+    """Конец строкового литерала '...' или "..." начиная с кавычки в i"""
+    quote = src[i]
+    i += 1
+    while i < len(src):
+        if src[i] == "\\":
+            i += 2
+            continue
+        if src[i] == quote:
+            return i + 1
+        if src[i] == "\n":
+            raise BundleError("Unterminated string literal")
+        i += 1
+    raise BundleError("Unterminated string literal")
+
+
+def _skip_regex(src: str, i: int) -> int:
+    """Конец regex-литерала /.../flags"""
+    i += 1
+    in_class = False
+    while i < len(src):
+        ch = src[i]
+        if ch == "\\":
+            i += 2
+            continue
+        if ch == "\n":
+            raise BundleError("Unterminated regex literal")
+        if in_class:
+            in_class = ch != "]"
+        elif ch == "[":
+            in_class = True
+        elif ch == "/":
+            i += 1
+            while i < len(src) and (src[i].isalnum() or src[i] == "_"):
+                i += 1
+            return i
+        i += 1
+    raise BundleError("Unterminated regex literal")
+
+
+def minify_js(src: str) -> str:
+    """
+    Безопасная минификация: убираются комментарии и отступы, пробелы вокруг
+    скобок и разделителей. Значимые переводы строк сохраняются (ASI), строки,
+    шаблоны и regex-литералы не меняются.
+    """
+    out: List[str] = []
+    # Глубина фигурных скобок внутри каждого открытого ${...} шаблона
+    brace_stack: List[int] = []
+    pending = ""  # пробел или перевод строки перед следующим токеном
+    last_token = ""
+    i, n = 0, len(src)
+
+    def put(text: str):
+        nonlocal pending
+        if pending and out:
+            prev = out[-1][-1]
+            if pending == "\n" and prev not in _NO_NEWLINE_AFTER and text[0] not in _NO_NEWLINE_BEFORE:
+                out.append("\n")
+            elif pending == " " and prev not in _TIGHT and text[0] not in _TIGHT:
+                out.append(" ")
+        pending = ""
+        out.append(text)
+
+    def template(i: int) -> int:
+        """Текст шаблона с позиции i (после ` или }) до ` или ${; возвращает позицию после"""
+        start = i
+        while i < n:
+            ch = src[i]
+            if ch == "\\":
+                i += 2
+                continue
+            if ch == "`":
+                put(src[start - 1:i + 1])
+                return i + 1
+            if ch == "$" and i + 1 < n and src[i + 1] == "{":
+                put(src[start - 1:i + 2])
+                brace_stack.append(0)
+                return i + 2
+            i += 1
+        raise BundleError("Unterminated template literal")
+
+    while i < n:
+        ch = src[i]
+
+        if ch in " \t\r\n":
+            j = i
+            while j < n and src[j] in " \t\r\n":
+                j += 1
+            if "\n" in src[i:j]:
+                pending = "\n"
+            elif not pending:
+                pending = " "
+            i = j
+            continue
+
+        if ch == "/" and i + 1 < n and src[i + 1] == "/":
+            j = src.find("\n", i)
+            i = n if j == -1 else j
+            continue
+
+        if ch == "/" and i + 1 < n and src[i + 1] == "*":
+            j = src.find("*/", i + 2)
+            if j == -1:
+                raise BundleError("Unterminated comment")
+            if not pending:
+                pending = "\n" if "\n" in src[i:j] else " "
+            i = j + 2
+            continue
+
+        if ch in "'\"":
+            j = _skip_string(src, i)
+            put(src[i:j])
+            last_token, i = "str", j
+            continue
+
+        if ch == "`" or (ch == "}" and brace_stack and brace_stack[-1] == 0):
+            if ch == "}":
+                brace_stack.pop()  # конец ${...}: дальше снова текст шаблона
+            i = template(i + 1)
+            last_token = "str"
+            continue
+
+        if ch == "/" and (not last_token or last_token in _REGEX_PREFIX_CHARS
+                          or last_token in _REGEX_PREFIX_WORDS):
+            j = _skip_regex(src, i)
+            put(src[i:j])
+            last_token, i = "regex", j
+            continue
+
+        if brace_stack and ch in "{}":
+            brace_stack[-1] += 1 if ch == "{" else -1
+
+        if ch.isalnum() or ch in "_$":
+            j = i
+            while j < n and (src[j].isalnum() or src[j] in "_$"):
+                j += 1
+            put(src[i:j])
+            last_token, i = src[i:j], j
+            continue
+
+        put(ch)
+        last_token = ch if ch not in ")]}" else "close"
+        i += 1
+
+    return "".join(out).strip() + "\n"
+
+
+def minify_css(src: str) -> str:
+    """Убрать комментарии и лишние пробелы (строки и url(...) не трогаются)"""
+    out: List[str] = []
+    i, n = 0, len(src)
+    while i < n:
+        ch = src[i]
+        if ch == "/" and i + 1 < n and src[i + 1] == "*":
+            j = src.find("*/", i + 2)
+            i = n if j == -1 else j + 2
+            continue
+        if ch in "'\"":
+            j = _skip_string(src, i)
+            out.append(src[i:j])
+            i = j
+            continue
+        if ch in " \t\r\n":
+            j = i
+            while j < n and src[j] in " \t\r\n":
+                j += 1
+            prev = out[-1][-1:] if out else ""
+            nxt = src[j] if j < n else ""
+            if prev and prev not in "{};,:>" and nxt not in "{};,>":
+                out.append(" ")
+            i = j
+            continue
+        if ch in "};" and out and out[-1] == " ":
+            out.pop()
+        out.append(ch)
+        i += 1
+    return "".join(out).replace(";}", "}").strip() + "\n"
+
+
+# ==================== МОДУЛИ ====================
+_IDENT = r"[A-Za-z_$][\w$]*"
+# Клауза без кавычек и ';': иначе import './x.js' захватил бы код до следующего from
+_IMPORT = re.compile(r"^import\s+(?:([^'\";]*?)\s+from\s+)?(['\"])([^'\"]+)\2\s*;?", re.M)
+_DYNAMIC_IMPORT = re.compile(r"\bimport\(\s*(['\"])([^'\"]+)\1\s*\)")
+_EXPORT_DEFAULT_DECL = re.compile(rf"^export\s+default\s+((?:async\s+)?function\s*\*?|class)\s*({_IDENT})?", re.M)
+_EXPORT_DEFAULT = re.compile(r"^export\s+default\s+", re.M)
+# export let a, b - не поддерживается (экспортировался бы только a)
+_EXPORT_DECL = re.compile(rf"^export\s+((?:async\s+)?function\s*\*?|class|const|let|var)\s+({_IDENT})(?![\w$])(?!\s*,)", re.M)
+_EXPORT_LIST = re.compile(r"^export\s*\{([^}]*)\}\s*(?:from\s*(['\"])([^'\"]+)\2)?\s*;?", re.M)
+_EXPORT_ALL = re.compile(rf"^export\s*\*\s*(?:as\s+({_IDENT})\s+)?from\s*(['\"])([^'\"]+)\2\s*;?", re.M)
+
+
+def resolve_import(module_id: str, spec: str) -> str:
+    """Id модуля (путь от папки фронтенда) по относительному импорту"""
+    if not spec.startswith(("./", "../")):
+        raise BundleError(f"{module_id}: only relative imports are supported ({spec!r})")
+    return posixpath.normpath(posixpath.join(posixpath.dirname(module_id), spec))
+
+
+def _import_bindings(clause: str, target: str) -> str:
+    """Объявления const для import-клаузы"""
+    required = f"__require({json.dumps(target)})"
+    clause = clause.strip()
+    statements = []
+    if clause.startswith("* as "):
+        return f"const {clause[5:].strip()} = {required};"
+    default, _, rest = clause.partition(",") if not clause.startswith("{") else ("", "", clause)
+    if default.strip():
+        statements.append(f"const {default.strip()} = {required}.default;")
+    rest = rest.strip()
+    if rest:
+        if not (rest.startswith("{") and rest.endswith("}")):
+            raise BundleError(f"Unsupported import clause: {clause!r}")
+        names = [part.strip() for part in rest[1:-1].split(",") if part.strip()]
+        fields = [re.sub(r"\s+as\s+", ": ", name) for name in names]
+        statements.append(f"const {{ {', '.join(fields)} }} = {required};")
+    return " ".join(statements)
+
+
+def transform_module(module_id: str, src: str) -> Tuple[str, List[str], List[str]]:
+    """
+    ES-модуль -> тело фабрики (__exports, __require, __import).
+    Returns: (код, статические зависимости, динамические зависимости)
+    """
+    static_deps: List[str] = []
+    dynamic_deps: List[str] = []
+    exported: List[Tuple[str, str]] = []
+    star_exports: List[str] = []
+
+    def replace_import(match):
+        target = resolve_import(module_id, match.group(3))
+        static_deps.append(target)
+        if match.group(1) is None:
+            return f"__require({json.dumps(target)});"
+        return _import_bindings(match.group(1), target)
+
+    def replace_dynamic(match):
+        target = resolve_import(module_id, match.group(2))
+        dynamic_deps.append(target)
+        return f"__import({json.dumps(target)})"
+
+    def replace_default_decl(match):
+        name = match.group(2)
+        if name is None:
+            return f"__exports.default = {match.group(1)} "
+        exported.append(("default", name))
+        return f"{match.group(1)} {name}"
+
+    def replace_decl(match):
+        exported.append((match.group(2), match.group(2)))
+        return f"{match.group(1)} {match.group(2)}"
+
+    def reexport_source(spec: str) -> Tuple[str, str]:
+        """Переменная с модулем для export ... from"""
+        target = resolve_import(module_id, spec)
+        static_deps.append(target)
+        name = f"__reexport{len(static_deps)}"
+        return name, f"const {name} = __require({json.dumps(target)});"
+
+    def replace_list(match):
+        source, statement = reexport_source(match.group(3)) if match.group(3) else (None, "")
+        for part in match.group(1).split(","):
+            part = part.strip()
+            if part:
+                local, _, alias = part.partition(" as ")
+                local = local.strip()
+                exported.append(((alias or local).strip(), f"{source}.{local}" if source else local))
+        return statement
+
+    def replace_all(match):
+        source, statement = reexport_source(match.group(3))
+        if match.group(1):
+            exported.append((match.group(1), source))
+        else:
+            star_exports.append(source)
+        return statement
+
+    code = _IMPORT.sub(replace_import, src)
+    code = _DYNAMIC_IMPORT.sub(replace_dynamic, code)
+    code = _EXPORT_DEFAULT_DECL.sub(replace_default_decl, code)
+    code = _EXPORT_DEFAULT.sub("__exports.default = ", code)
+    code = _EXPORT_DECL.sub(replace_decl, code)
+    code = _EXPORT_LIST.sub(replace_list, code)
+    code = _EXPORT_ALL.sub(replace_all, code)
+
+    leftover = re.search(r"^(import|export)\b(?!\()", code, re.M)
+    if leftover:
+        line = code[leftover.start():code.find("\n", leftover.start())]
+        raise BundleError(f"{module_id}: unsupported module syntax: {line.strip()!r}")
+
+    # export * from: всё, кроме default (как в ES-модулях)
+    code += "".join(
+        f"\nfor (const __name in {source}) if (__name !== \"default\") __exports[__name] = {source}[__name];"
+        for source in star_exports
+    )
+    if exported:
+        code += "\n" + "\n".join(f"__exports.{name} = {local};" for name, local in exported)
+    return code, static_deps, dynamic_deps
+
+
+# ==================== СБОРКА ====================
+RUNTIME = """(function (r) {
+"use strict";
+r.modules = r.modules || {};
+r.cache = r.cache || {};
+r.chunks = r.chunks || {};
+r.require = function (id) {
+  if (!(id in r.cache)) {
+    if (!(id in r.modules)) throw new Error("Module not found: " + id);
+    var exports = r.cache[id] = {};
+    r.modules[id](exports, r.require, r.import);
+  }
+  return r.cache[id];
+};
+r.import = function (id) {
+  if (id in r.modules) return Promise.resolve().then(function () { return r.require(id); });
+  var url = r.lazy[id];
+  if (!url) return Promise.reject(new Error("Module not found: " + id));
+  r.chunks[url] = r.chunks[url] || new Promise(function (resolve, reject) {
+    var script = document.createElement("script");
+    script.src = url;
+    script.onload = resolve;
+    script.onerror = function () { delete r.chunks[url]; reject(new Error("Failed to load " + url)); };
+    document.head.appendChild(script);
+  });
+  return r.chunks[url].then(function () { return r.require(id); });
+};
+"""
+
+
+def collect_modules(frontend_dir: Path, entries: List[str], exclude: set) -> Tuple[Dict[str, str], List[str]]:
+    """Модули, статически достижимые из entries (кроме exclude), в порядке обхода"""
+    modules: Dict[str, str] = {}
+    dynamic: List[str] = []
+    stack = list(reversed(entries))
+    while stack:
+        module_id = stack.pop()
+        if module_id in modules or module_id in exclude:
+            continue
+        path = frontend_dir / module_id
+        if not path.is_file():
+            raise BundleError(f"Module not found: {module_id}")
+        code, static_deps, dynamic_deps = transform_module(module_id, path.read_text(encoding="utf-8"))
+        modules[module_id] = code
+        stack.extend(reversed(static_deps))
+        dynamic.extend(dep for dep in dynamic_deps if dep not in dynamic)
+    return modules, dynamic
+
+
+def _factories(modules: Dict[str, str]) -> str:
+    """Регистрация модулей; общий модуль двух чанков регистрируется один раз"""
+    return "".join(
+        f"if (!({json.dumps(module_id)} in r.modules)) "
+        f"r.modules[{json.dumps(module_id)}] = function (__exports, __require, __import) {{\n{code}\n}};\n"
+        for module_id, code in modules.items()
+    )
+
+
+def _hashed_name(stem: str, content: str, suffix: str) -> str:
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()[:HASH_LENGTH]
+    return f"{stem}.{digest}{suffix}"
+
+
+def _stylesheets(index_html: str) -> List[Tuple[str, str]]:
+    """(тег, href) локальных <link rel="stylesheet"> из index.html"""
+    links = []
+    for match in re.finditer(r"<link\b[^>]*>", index_html):
+        tag = match.group(0)
+        href = re.search(r"href=(['\"])([^'\"]+)\1", tag)
+        if "stylesheet" in tag and href and not re.match(r"^(https?:)?//", href.group(2)):
+            links.append((tag, href.group(2)))
+    return links
+
+
+def _find_asset(frontend_dir: Path, href: str) -> Path:
+    """Файл по ссылке из index.html (относительно frontend/ или frontend/src/)"""
+    rel = href.split("?")[0].lstrip("/")
+    for base in (frontend_dir, frontend_dir / "src"):
+        candidate = base / rel
+        if candidate.is_file():
+            return candidate
+    raise BundleError(f"Stylesheet not found: {href}")
+
+
+def _clear_dist(dist_dir: Path):
+    """Удалить прошлую сборку; папку без manifest.json (не результат сборки) не трогаем"""
+    if dist_dir.is_symlink() or (dist_dir.exists() and not dist_dir.is_dir()):
+        raise BundleError(f"{dist_dir} is not a bundle output directory")
+    if not dist_dir.exists():
+        return
+    if any(dist_dir.iterdir()) and not (dist_dir / "manifest.json").is_file():
+        raise BundleError(f"{dist_dir} has no manifest.json, refusing to delete it")
+    shutil.rmtree(dist_dir)
+
+
+def bundle_frontend(frontend_dir: Path = FRONTEND_DIR, entry: str = ENTRY) -> Dict:
+    """Собрать frontend/dist; возвращает манифест"""
+    frontend_dir = Path(frontend_dir)
+    dist_dir = frontend_dir / DIST_NAME
+    index_html = (frontend_dir / "index.html").read_text(encoding="utf-8")
+
+    # JS: точка входа со статическими зависимостями; каждый import(...) -
+    # отдельный чанк, чтобы ошибка или вес одного представления не задевали остальные
+    main_modules, queue = collect_modules(frontend_dir, [entry], set())
+    chunks: Dict[str, Tuple[str, str]] = {}  # модуль import() -> (имя файла, код)
+    bundled = set(main_modules)
+    while queue:
+        chunk_entry = queue.pop(0)
+        if chunk_entry in chunks:
+            continue
+        chunk_modules, nested = collect_modules(frontend_dir, [chunk_entry], set(main_modules))
+        bundled.update(chunk_modules)
+        chunk_js = minify_js("(function (r) {\n\"use strict\";\n" + _factories(chunk_modules)
+                             + "})(window.__pandora);\n")
+        stem = posixpath.splitext(posixpath.basename(chunk_entry))[0]
+        chunks[chunk_entry] = (_hashed_name(stem, chunk_js, ".js"), chunk_js)
+        queue.extend(dep for dep in nested if dep not in chunks)
+    lazy_map = {module_id: f"/{DIST_NAME}/{name}" for module_id, (name, _) in chunks.items()}
+
+    app_js = minify_js(
+        "window.__pandora = window.__pandora || {};\n" + RUNTIME
+        + f"r.lazy = {json.dumps(lazy_map)};\n" + _factories(main_modules)
+        + f"r.require({json.dumps(entry)});\n" + "})(window.__pandora);\n"
+    )
+    app_name = _hashed_name("app", app_js, ".js")
+
+    # CSS: в порядке <link> из index.html
+    links = _stylesheets(index_html)
+    app_css = "".join(minify_css(_find_asset(frontend_dir, href).read_text(encoding="utf-8"))
+                      for _, href in links)
+    css_name = _hashed_name("app", app_css, ".css") if links else None
+
+    # index.html: один <link> вместо всех, скрипт бандла вместо загрузчика модулей
+    html = index_html
+    for position, (tag, _) in enumerate(links):
+        replacement = f'<link rel="stylesheet" href="/{DIST_NAME}/{css_name}">' if position == 0 else ""
+        html = html.replace(tag, replacement, 1)
+    html, replaced = re.subn(
+        r"<script\s+type=[\"']module[\"'][^>]*>[\s\S]*?</script>",
+        f'<script src="/{DIST_NAME}/{app_name}" defer></script>', html, count=1
+    )
+    if not replaced:
+        raise BundleError("index.html: module <script> loading the entry point not found")
+    html = re.sub(r"\n\s*\n", "\n", html)
+
+    # Запись: старые файлы dist удаляются целиком
+    _clear_dist(dist_dir)
+    dist_dir.mkdir(parents=True)
+    files = {"app.js": app_name}
+    (dist_dir / app_name).write_text(app_js, encoding="utf-8")
+    for chunk_entry, (name, chunk_js) in chunks.items():
+        files[posixpath.basename(chunk_entry)] = name
+        (dist_dir / name).write_text(chunk_js, encoding="utf-8")
+    if css_name:
+        files["app.css"] = css_name
+        (dist_dir / css_name).write_text(app_css, encoding="utf-8")
+    (dist_dir / "index.html").write_text(html, encoding="utf-8")
+
+    source_size = sum((frontend_dir / module_id).stat().st_size for module_id in bundled) \
+        + sum(_find_asset(frontend_dir, href).stat().st_size for _, href in links)
+    manifest = {
+        "version": 1,
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "index": "index.html",
+        "files": files,
+        "immutable": sorted(files.values()),
+        "modules": len(bundled),
+        "stylesheets": len(links),
+        "source_bytes": source_size,
+        "bundle_bytes": sum((dist_dir / name).stat().st_size for name in files.values()),
+    }
+    (dist_dir / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    frontend_dir = Path(argv[0]) if argv else FRONTEND_DIR
+    try:
+        manifest = bundle_frontend(frontend_dir)
+    except BundleError as e:
+        print(f"[BUNDLE] ✗ {e}")
+        return 1
+    print(f"[BUNDLE] {manifest['modules']} modules + {manifest['stylesheets']} stylesheets -> "
+          f"{', '.join(manifest['files'].values())} "
+          f"({manifest['source_bytes'] // 1024} KB -> {manifest['bundle_bytes'] // 1024} KB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
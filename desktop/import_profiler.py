@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PANDORA v2.0 - Import Time Profiler
+Встроенный аналог `python -X importtime`, работающий и в exe (PyInstaller),
+где флаги интерпретатора передать нельзя.
+
+Перехватывает builtins.__import__ и для каждого впервые загруженного модуля
+записывает собственное время (self) и время вместе с вложенными импортами
+(cumulative). Включается лаунчером: `launcher.py --profile-imports` или
+PANDORA_PROFILE_IMPORTS=1.
+"""
+
+import builtins
+import importlib.util
+import json
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+class ImportProfiler:
+    """Замер времени импорта модулей"""
+
+    def __init__(self):
+        self._original = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.records: List[Dict] = []
+
+    def install(self):
+        """Начать перехват импортов"""
+        if self._original is None:
+            self._original = builtins.__import__
+            builtins.__import__ = self._import
+
+    def uninstall(self):
+        """Вернуть стандартный __import__"""
+        if self._original is not None:
+            builtins.__import__ = self._original
+            self._original = None
+
+    @staticmethod
+    def _resolve(name: str, globals_: Optional[dict], level: int) -> str:
+        if level == 0:
+            return name
+        package = (globals_ or {}).get('__package__') or ''
+        try:
+            return importlib.util.resolve_name('.' * level + name, package)
+        except (ImportError, ValueError):
+            return name
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original or builtins.__import__
+        full_name = self._resolve(name, globals, level)
+        candidates = [full_name] + [
+            f"{full_name}.{item}" for item in (fromlist or ()) if item != '*'
+        ]
+        pending = [candidate for candidate in candidates if candidate not in sys.modules]
+
+        # Уже загружено - обычный быстрый путь без замеров
+        if not pending:
+            return original(name, globals, locals, fromlist, level)
+
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+
+            loaded = [candidate for candidate in pending if candidate in sys.modules]
+            if loaded:
+                with self._lock:
+                    self.records.append({
+                        'module': ', '.join(loaded),
+                        'self_ms': round((elapsed - children) * 1000, 3),
+                        'cumulative_ms': round(elapsed * 1000, 3),
+                        'depth': len(stack),
+                    })
+
+    def total_ms(self) -> float:
+        """Суммарное время импортов верхнего уровня"""
+        with self._lock:
+            return round(sum(r['cumulative_ms'] for r in self.records if r['depth'] == 0), 3)
+
+    def slowest(self, limit: int = 20) -> List[Dict]:
+        """Самые медленные импорты по собственному времени"""
+        with self._lock:
+            records = list(self.records)
+        return sorted(records, key=lambda r: r['self_ms'], reverse=True)[:limit]
+
+    def format_report(self, limit: int = 20, time_to_first_response: Optional[float] = None) -> List[str]:
+        """Отчёт в формате -X importtime"""
+        lines = [f"Imports: {len(self.records)} modules, {self.total_ms():.1f} ms total"]
+        if time_to_first_response is not None:
+            lines.append(f"Time to first response: {time_to_first_response * 1000:.1f} ms")
+        lines.append("import time:   self [ms] | cumulative [ms] | imported module")
+        for record in self.slowest(limit):
+            lines.append(
+                f"import time: {record['self_ms']:11.2f} | {record['cumulative_ms']:15.2f} | "
+                f"{'  ' * record['depth']}{record['module']}"
+            )
+        return lines
+
+    def write_report(self, path: Path, limit: int = 50,
+                     time_to_first_response: Optional[float] = None) -> Path:
+        """Сохранить отчёт в JSON"""
+        report = {
+            'generated_at': datetime.now().isoformat(),
+            'modules': len(self.records),
+            'total_import_ms': self.total_ms(),
+            'time_to_first_response_ms': (
+                round(time_to_first_response * 1000, 3)
+                if time_to_first_response is not None else None
+            ),
+            'slowest': self.slowest(limit),
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding='utf-8')
+        return path
@@ -13,6 +13,10 @@ PANDORA v2.0 Desktop Launcher (Version 4)
 - Поддержка FROZEN (exe) и DEV (Python) режимов
 - Правильное определение путей для обоих режимов
 - Лучшая обработка ошибок подключения
+- --profile-imports (или PANDORA_PROFILE_IMPORTS=1): отчёт о самых медленных
+  импортах и времени до первого ответа backend (logs/import_profile.json)
+- Хронология фаз запуска пишется в startup_timeline.json рядом со splash.log
+  и выводится в конце splash (startup_timeline.py)
 
 КРИТИЧНО:
 ✓ Одно окно (не множественные)
@@ -35,6 +39,23 @@ from typing import Optional
 from threading import Thread, Event
 from datetime import datetime
 
+# Точка отсчёта для хронологии запуска и "time to first response"
+_PROCESS_START = time.monotonic()
+
+# ==================== ПРОФИЛИРОВАНИЕ ИМПОРТОВ ====================
+# Ставится до импорта webview и backend, чтобы попали все тяжёлые модули
+PROFILE_IMPORTS = '--profile-imports' in sys.argv or os.getenv('PANDORA_PROFILE_IMPORTS') == '1'
+_import_profiler = None
+if PROFILE_IMPORTS:
+    from import_profiler import ImportProfiler
+    _import_profiler = ImportProfiler()
+    _import_profiler.install()
+
+from startup_timeline import StartupTimeline
+
+# Хронология фаз запуска (см. startup_timeline.py)
+_timeline = StartupTimeline(origin=_PROCESS_START)
+
 # ==================== КОНФИГУРАЦИЯ ЛОГИРОВАНИЯ ====================
 logging.basicConfig(
     level=logging.INFO,
@@ -61,12 +82,6 @@ except ImportError:
     HAS_WEBVIEW = False
     logger.warning("[WARN] PyWebView not installed. Install: pip install pywebview")
 
-try:
-    import requests
-except ImportError:
-    requests = None
-    logger.warning("[WARN] requests not installed. Install: pip install requests")
-
 try:
     from splash_screen_v3 import create_splash_and_manager
     HAS_SPLASH = True
@@ -106,6 +121,7 @@ else:
 BACKEND_HOST = '127.0.0.1'
 BACKEND_PORT = 8000
 BACKEND_URL = f'http://{BACKEND_HOST}:{BACKEND_PORT}'
+BACKEND_READY_TIMEOUT = 20.0  # сек
 
 # PyWebView
 APP_NAME = 'PANDORA v2.0 - Professional Prompt Manager'
@@ -154,6 +170,10 @@ class UvicornBackend:
         self.exception: Optional[Exception] = None
         self.splash = splash
         self.manager = manager
+        # Выставляется in-process: сервер слушает порт и БД мигрирована
+        # (StartupStatus.on_serving), либо поток сервера завершился
+        self.ready_event = Event()
+        self.is_serving = False
     
     def _log(self, message: str, status: str = "info"):
         """Логировать с поддержкой splash screen"""
@@ -166,6 +186,11 @@ class UvicornBackend:
         else:
             logger.info(message)
     
+    def _on_serving(self):
+        """Callback из потока сервера: порт привязан, БД готова"""
+        self.is_serving = True
+        self.ready_event.set()
+    
     def run_server(self):
         """Запустить Uvicorn server в этом потоке"""
         try:
@@ -240,7 +265,8 @@ class UvicornBackend:
             # Импортируем FastAPI app
             try:
                 self._log("Importing FastAPI app from app.main...", "info")
-                from app.main import app
+                with _timeline.phase('backend_import'):
+                    from app.main import app
                 self._log("✓ FastAPI app imported successfully", "success")
             except ImportError as e:
                 self._log(f"✗ Import error: {e}", "error")
@@ -279,7 +305,19 @@ class UvicornBackend:
             
             # Создаём server
             try:
-                server = uvicorn.Server(config)
+                from app.services.startup_status import StartupStatus
+                
+                class NotifyingServer(uvicorn.Server):
+                    """Сообщает StartupStatus, когда сокет привязан"""
+                    
+                    async def startup(self, sockets=None):
+                        await super().startup(sockets=sockets)
+                        if self.started:
+                            _timeline.end('uvicorn_bind')
+                            StartupStatus.mark_bound()
+                
+                StartupStatus.on_serving(self._on_serving)
+                server = NotifyingServer(config)
                 self._log("✓ Uvicorn server created", "success")
             except Exception as e:
                 self._log(f"✗ Failed to create Uvicorn server: {e}", "error")
@@ -292,6 +330,7 @@ class UvicornBackend:
             self.is_running = True
             
             try:
+                _timeline.start('uvicorn_bind')
                 server.run()
             except Exception as e:
                 self._log(f"✗ Server runtime error: {e}", "error")
@@ -303,6 +342,9 @@ class UvicornBackend:
             logger.error(f"Backend exception:\n{traceback.format_exc()}")
             self.exception = e
             self.is_running = False
+        finally:
+            # Не держим лаунчер до таймаута, если сервер упал или остановился
+            self.ready_event.set()
     
     def start(self) -> bool:
         """Запустить backend в daemon потоке"""
@@ -317,36 +359,28 @@ class UvicornBackend:
             self.thread = Thread(target=self.run_server, daemon=True)
             self.thread.start()
             
-            # Ждём когда backend будет готов
+            # Ждём сигнала из потока сервера, без опроса /health
             self._log("Waiting for backend initialization...", "info")
+            started = time.monotonic()
             
-            for attempt in range(80):  # 80 * 0.25 сек = 20 сек максимум
-                try:
-                    if requests:
-                        try:
-                            response = requests.get(f"{BACKEND_URL}/health", timeout=1)
-                            if response.status_code < 500:
-                                health_data = response.json() if response.status_code == 200 else {}
-                                self._log("Backend is ready!", "success")
-                                self._log(f"URL: {BACKEND_URL}", "info")
-                                if health_data:
-                                    prompts_count = health_data.get('total_prompts', '?')
-                                    self._log(f"Prompts loaded: {prompts_count}", "info")
-                                return True
-                        except requests.exceptions.ConnectionError:
-                            pass
-                        except Exception:
-                            pass
-                except Exception:
-                    pass
-                
-                if attempt % 8 == 0 and attempt > 0:
-                    self._log(f"Initializing... {attempt*0.25:.1f}s")
-                
-                time.sleep(0.25)
+            if not self.ready_event.wait(timeout=BACKEND_READY_TIMEOUT):
+                self._log("Backend readiness timeout, continuing anyway...", "warning")
+                self._log(f"Try opening {BACKEND_URL}/ manually if needed", "warning")
+                return True
+            
+            if not self.is_serving:
+                self._log(f"Backend failed to start: {self.exception or 'server stopped'}", "error")
+                return False
             
-            self._log("Backend health check timeout, continuing anyway...", "warning")
-            self._log(f"Try opening {BACKEND_URL}/ manually if needed", "warning")
+            self._log(f"Backend is ready! ({time.monotonic() - started:.2f}s)", "success")
+            self._log(f"URL: {BACKEND_URL}", "info")
+            
+            from app.services.startup_status import StartupStatus
+            status = StartupStatus.snapshot()
+            if status["phase"] == "importing":
+                self._log("Importing prompts in background, UI will fill in as they arrive", "info")
+            elif status["error"]:
+                self._log(f"Database initialization error: {status['error']}", "warning")
             return True
         
         except Exception as e:
@@ -382,6 +416,61 @@ class AppLauncher:
         else:
             logger.info(message)
     
+    def _finish_timeline(self):
+        """Сохранить хронологию запуска рядом со splash.log и показать её в splash"""
+        try:
+            # Фазы backend замеряются в потоке инициализации БД (StartupStatus)
+            from app.services.startup_status import StartupStatus
+            backend_phases = {'init': 'db_init', 'migrating': 'migration', 'importing': 'import'}
+            for phase, (start, end) in StartupStatus.timings().items():
+                if phase in backend_phases:
+                    _timeline.record(backend_phases[phase], start, end)
+        except Exception as e:
+            logger.warning(f"Backend timings unavailable: {e}")
+        
+        log_dir = self.splash.log_file.parent if self.splash else LOGS_DIR
+        previous = None
+        try:
+            previous = _timeline.save(log_dir)
+        except Exception as e:
+            logger.warning(f"Failed to save startup timeline: {e}")
+        
+        for line in _timeline.format_summary(previous):
+            self._log(line)
+    
+    def _report_import_profile(self):
+        """Отчёт о медленных импортах и времени до первого ответа (--profile-imports)"""
+        if _import_profiler is None:
+            return
+        
+        import urllib.error
+        import urllib.request
+        time_to_first_response = None
+        try:
+            # /ready отвечает 503, пока идёт импорт: любой HTTP-ответ - сервер уже отвечает
+            try:
+                with urllib.request.urlopen(f"{BACKEND_URL}/ready", timeout=5) as response:
+                    response.read()
+            except urllib.error.HTTPError as e:
+                e.read()
+            time_to_first_response = time.monotonic() - _PROCESS_START
+        except Exception as e:
+            self._log(f"First response probe failed: {e}", "warning")
+        
+        _import_profiler.uninstall()
+        self._log("=" * 70)
+        for line in _import_profiler.format_report(limit=15, time_to_first_response=time_to_first_response):
+            self._log(line)
+        self._log("=" * 70)
+        try:
+            report_path = _import_profiler.write_report(
+                LOGS_DIR / 'import_profile.json',
+                time_to_first_response=time_to_first_response
+            )
+            self._log(f"Import profile saved: {report_path}", "info")
+        except Exception as e:
+            self._log(f"Failed to save import profile: {e}", "warning")
+    
     def _get_frontend_url(self) -> Optional[str]:
         """Определить URL для загрузки фронтенда"""
         if FROZEN:
@@ -453,7 +542,7 @@ class AppLauncher:
                     self.splash.close(error_delay=True)
                 return False
             
-            time.sleep(0.5)
+            self._report_import_profile()
             
             # Определяем URL фронтенда
             if self.manager:
@@ -481,6 +570,7 @@ class AppLauncher:
             
             self._log("Creating application window...", "info")
             try:
+                _timeline.start('webview_create')
                 self.window = webview.create_window(
                     APP_NAME,
                     frontend_url,
@@ -490,9 +580,12 @@ class AppLauncher:
                     background_color='#ffffff',
                     text_select=True,
                 )
+                _timeline.end('webview_create')
                 self._log("Window created", "success")
                 self._log(f"Frontend URL: {frontend_url}", "info")
                 
+                self._finish_timeline()
+                
                 # Скрыть splash перед запуском UI
                 if self.splash:
                     try:
@@ -562,11 +655,12 @@ def main():
         if HAS_SPLASH:
             try:
                 from splash_screen_v3 import create_splash_and_manager
-                _splash, _manager = create_splash_and_manager()
-                
-                # Убедимся что окно видимо
-                _splash.window.deiconify()
-                _splash.window.update()
+                with _timeline.phase('splash'):
+                    _splash, _manager = create_splash_and_manager()
+                    
+                    # Убедимся что окно видимо
+                    _splash.window.deiconify()
+                    _splash.window.update()
                 
                 # Добавляем шаги инициализации
                 _manager.add_step("Starting Backend Server", "Initializing API and loading prompts")
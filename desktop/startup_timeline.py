@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PANDORA v2.0 - Startup Timeline
+Структурированная хронология запуска: для каждой фазы (splash, импорт backend,
+bind uvicorn, инициализация БД, миграции, импорт промптов, создание окна)
+сохраняются отметки time.monotonic() относительно старта процесса.
+
+Результат пишется рядом со splash.log:
+- startup_timeline.json          - последний запуск
+- startup_timeline_history.jsonl - по строке на запуск (последние
+  HISTORY_LIMIT), для сравнения
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Бюджет времени запуска ("< 5 sec")
+STARTUP_BUDGET_MS = 5000
+
+TIMELINE_FILE = "startup_timeline.json"
+HISTORY_FILE = "startup_timeline_history.jsonl"
+# Сколько последних запусков хранить в истории
+HISTORY_LIMIT = 100
+
+
+class StartupTimeline:
+    """Хронология фаз запуска"""
+
+    def __init__(self, origin: Optional[float] = None):
+        self.origin = origin if origin is not None else time.monotonic()
+        self.started_at = datetime.now()
+        self._phases: Dict[str, List[Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    def start(self, name: str, at: Optional[float] = None):
+        """Отметить начало фазы"""
+        with self._lock:
+            self._phases[name] = [at if at is not None else time.monotonic(), None]
+
+    def end(self, name: str, at: Optional[float] = None):
+        """Отметить конец фазы (если фаза была начата)"""
+        with self._lock:
+            span = self._phases.get(name)
+            if span is not None and span[1] is None:
+                span[1] = at if at is not None else time.monotonic()
+
+    def record(self, name: str, start: float, end: Optional[float]):
+        """Добавить фазу, замеренную в другом месте (например, в backend)"""
+        with self._lock:
+            self._phases[name] = [start, end]
+
+    @contextmanager
+    def phase(self, name: str):
+        """with timeline.phase('backend_import'): ..."""
+        self.start(name)
+        try:
+            yield
+        finally:
+            self.end(name)
+
+    def _ms(self, value: Optional[float]) -> Optional[float]:
+        return round((value - self.origin) * 1000, 1) if value is not None else None
+
+    def to_dict(self) -> Dict:
+        """Хронология в виде JSON-совместимого словаря"""
+        with self._lock:
+            spans = sorted(self._phases.items(), key=lambda item: item[1][0])
+            phases = []
+            for name, (start, end) in spans:
+                phases.append({
+                    "name": name,
+                    "start_ms": self._ms(start),
+                    "end_ms": self._ms(end),
+                    "duration_ms": round((end - start) * 1000, 1) if end is not None else None,
+                })
+
+        finished = [phase["end_ms"] for phase in phases if phase["end_ms"] is not None]
+        total = max(finished) if finished else 0.0
+        return {
+            "started_at": self.started_at.isoformat(),
+            "total_ms": total,
+            "budget_ms": STARTUP_BUDGET_MS,
+            "within_budget": total <= STARTUP_BUDGET_MS,
+            "phases": phases,
+        }
+
+    def save(self, log_dir: Path) -> Optional[Dict]:
+        """
+        Записать хронологию и добавить её в историю запусков.
+
+        Returns:
+            Хронология предыдущего запуска (для сравнения) или None
+        """
+        log_dir.mkdir(parents=True, exist_ok=True)
+        previous = load_last_timeline(log_dir)
+        data = self.to_dict()
+
+        (log_dir / TIMELINE_FILE).write_text(
+            json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8"
+        )
+        history_path = log_dir / HISTORY_FILE
+        try:
+            history = [line for line in history_path.read_text(encoding="utf-8").splitlines() if line.strip()]
+        except OSError:
+            history = []
+        history = history[-(HISTORY_LIMIT - 1):] + [json.dumps(data, ensure_ascii=False)]
+        history_path.write_text("\n".join(history) + "\n", encoding="utf-8")
+        return previous
+
+    def format_summary(self, previous: Optional[Dict] = None) -> List[str]:
+        """Строки для splash screen; с previous показывает разницу с прошлым запуском"""
+        data = self.to_dict()
+        before = {
+            phase["name"]: phase.get("duration_ms")
+            for phase in (previous or {}).get("phases", [])
+        }
+
+        lines = [
+            f"Startup timeline: {data['total_ms']:.0f} ms "
+            f"(budget {data['budget_ms']} ms{'' if data['within_budget'] else ', EXCEEDED'})"
+        ]
+        for phase in data["phases"]:
+            if phase["duration_ms"] is None:
+                timing = f"{phase['start_ms']:8.0f} ms  → running"
+            else:
+                timing = f"{phase['start_ms']:8.0f} ms  +{phase['duration_ms']:.0f} ms"
+            delta = ""
+            old = before.get(phase["name"])
+            if old is not None and phase["duration_ms"] is not None:
+                delta = f"  ({phase['duration_ms'] - old:+.0f} ms vs last run)"
+            lines.append(f"  {phase['name']:<16}{timing}{delta}")
+        return lines
+
+
+def load_last_timeline(log_dir: Path) -> Optional[Dict]:
+    """Прочитать хронологию последнего запуска"""
+    try:
+        return json.loads((log_dir / TIMELINE_FILE).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None